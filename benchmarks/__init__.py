@@ -0,0 +1,7 @@
+"""
+pymerit benchmarks
+------------------
+
+Performance measurements for pymerit, installed along with it so that
+pymerit.tests can run them, e.g., ``python -m benchmarks.importtime``.
+"""
@@ -0,0 +1,61 @@
+"""
+Command line for the benchmark suite
+"""
+import sys
+import json
+import argparse
+
+from . import suite
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="pymerit benchmark suite")
+    commands = parser.add_subparsers(dest="command")
+
+    p = commands.add_parser("run", help="Run the suite")
+    p.add_argument("--sizes", default="10,1000,100000",
+                   help="Comma-separated numbers of resources")
+    p.add_argument("--handlers", type=int, default=1,
+                   help="Number of custom resource handler schemas")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--ops", default=None,
+                   help="Comma-separated operations ({})".format(",".join(suite.operations)))
+    p.add_argument("-o", "--output", default=None, help="Results file (default: stdout)")
+
+    p = commands.add_parser("compare", help="Compare two results files")
+    p.add_argument("base")
+    p.add_argument("head")
+    p.add_argument("--threshold", type=float, default=1.2,
+                   help="Time ratio counted as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = [int(s) for s in args.sizes.split(",")]
+        ops = args.ops.split(",") if args.ops else None
+        results = suite.run(sizes, handlers=args.handlers, repeat=args.repeat,
+                            ops=ops, log=sys.stderr)
+        content = json.dumps(results, indent=4)
+        if args.output is None:
+            print(content)
+        else:
+            with open(args.output, 'w') as fd:
+                fd.write(content)
+        return 0
+
+    if args.command == "compare":
+        with open(args.base) as fd:
+            base = json.load(fd)
+        with open(args.head) as fd:
+            head = json.load(fd)
+        rows = suite.compare(base, head, threshold=args.threshold)
+        for op, size, handlers, b, h, ratio, regressed in rows:
+            print("{:>15} {:>9} {:>3} {:10.4f}s {:10.4f}s {:6.2f}x{}".format(
+                op, size, handlers, b, h, ratio, "  REGRESSION" if regressed else ""))
+        return 1 if any(r[-1] for r in rows) else 0
+
+    parser.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
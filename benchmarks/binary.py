@@ -0,0 +1,64 @@
+"""
+Binary format
+-------------
+
+Compare the size and speed of the binary format with JSON output.
+
+::
+
+    $ python -m benchmarks.binary --count 100000
+"""
+import sys
+import json
+import time
+import argparse
+
+import pymerit
+from pymerit import binary
+from .synthetic import make_document
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def compare(count):
+    """
+    Encode and decode a document with count resources in each format
+
+    :rtype: list
+    :return: One dict per format with size (bytes) and times (seconds)
+    """
+    obj = pymerit.new(make_document(count), lazy=True)
+    dumped = obj.dump()
+    backend = pymerit.get_json_backend()
+
+    formats = [
+        ('json-pretty', lambda d: backend.dumps(d, mode="pretty"), backend.loads),
+        ('json-compact', lambda d: backend.dumps(d, mode="bytes"), backend.loads),
+        ('binary', binary.encode, binary.decode),
+    ]
+
+    results = []
+    for name, encoder, decoder in formats:
+        data, encode_time = timed(encoder, dumped)
+        _, decode_time = timed(decoder, data)
+        results.append({
+            'format': name,
+            'backend': backend.name,
+            'resources': count,
+            'bytes': len(data),
+            'encode_seconds': encode_time,
+            'decode_seconds': decode_time,
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Binary format benchmark")
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args(argv)
+    print(json.dumps(compare(args.count), indent=4))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Import time
+-----------
+
+Measure the cold-start cost of ``import pymerit`` with
+``python -X importtime`` and check it against a budget. Optional or
+heavy dependencies (yaml, texttable, click, ...) must not be loaded
+by the import.
+
+::
+
+    $ python -m benchmarks.importtime --budget 100
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+budget_ms = 100
+"""
+Default budget for the cumulative import time of pymerit (ms)
+"""
+
+lazy_modules = [
+    'yaml',
+    'texttable',
+    'click',
+    'platform',
+    'sqlite3',
+    'concurrent.futures',
+    'inspect',
+    'hashlib',
+    'asyncio',
+]
+"""
+Modules that must only be loaded on first use
+"""
+
+def measure(module="pymerit", repeat=5):
+    """
+    Measure the cumulative import time of a module in fresh interpreters
+
+    :param str module: Module to import
+    :param int repeat: Number of interpreters; the fastest run is reported
+    :rtype: dict
+    :return: Import time in microseconds and lazy modules that were loaded
+    :raises RuntimeError: -X importtime is not supported (Python < 3.7)
+    """
+    if sys.version_info < (3, 7):
+        raise RuntimeError("-X importtime requires Python 3.7")
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+    code = "import sys, {0}; print(' '.join(m for m in {1!r} if m in sys.modules))".format(
+        module, lazy_modules)
+
+    best = None
+    loaded = []
+    for i in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              env=env, universal_newlines=True, check=True)
+        loaded = proc.stdout.split()
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2] == " " + module:
+                cumulative = int(parts[1])
+                best = cumulative if best is None else min(best, cumulative)
+
+    return {
+        'module': module,
+        'microseconds': best,
+        'loaded': loaded
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument("--budget", type=float, default=budget_ms,
+                        help="Budget in milliseconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    result = measure(repeat=args.repeat)
+    result['budget_ms'] = args.budget
+    print(json.dumps(result, indent=4))
+
+    if result['microseconds'] > args.budget * 1000 or len(result['loaded']) > 0:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Suite
+-----
+
+Time the main operations on synthetic MeritDefault documents of
+increasing size and record their peak memory. Results are written as
+JSON so that runs on different commits can be compared.
+
+::
+
+    $ python -m benchmarks run --sizes 10,1000,100000 --handlers 4 -o head.json
+    $ python -m benchmarks compare base.json head.json --threshold 1.2
+"""
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+
+import pymerit
+from .synthetic import make_document, make_handlers
+
+operations = [
+    'new',
+    'dump',
+    'dump-cached',
+    'dumps',
+    'dumps-compact',
+    'loads',
+    'validate',
+    'validate-cached',
+    'add_resource',
+    'add_resources',
+    'dumpb',
+    'loadb',
+    'prettyprint',
+]
+"""
+Benchmarked operations. Operations that validate start from an
+invalidated document (or resources) so that they time the checks;
+the -cached variants time an unchanged document.
+"""
+
+prettyprint_max = 1000
+"""
+Largest document rendered with prettyprint (texttable is quadratic)
+"""
+
+def prepare(size, schemas):
+    """
+    Build the inputs shared by all operations for one document size
+    """
+    metadata = make_document(size, schemas)
+    obj = pymerit.new(metadata)
+    return {
+        'metadata': metadata,
+        'obj': obj,
+        'json': obj.dumps(),
+        'binary': obj.dumpb(),
+        'resources': list(obj.metadata['resources']),
+    }
+
+def empty_document():
+    h = pymerit.MeritDefault()
+    h.namespace = "bench.scribbledata.io"
+    h.path = "project=bench/run=1"
+    h.name = "Benchmark run"
+    h.description = "Synthetic document"
+    return h
+
+def make_operation(op, data):
+    """
+    Return a no-argument callable that runs one operation
+    """
+    obj = data['obj']
+
+    def cold(func):
+        def run():
+            obj.invalidate()
+            return func()
+        return run
+
+    if op == 'new':
+        return lambda: pymerit.new(data['metadata'])
+    elif op == 'dump':
+        return cold(obj.dump)
+    elif op == 'dump-cached':
+        return obj.dump
+    elif op == 'dumps':
+        return cold(obj.dumps)
+    elif op == 'dumps-compact':
+        return cold(lambda: obj.dumps(mode="compact"))
+    elif op == 'loads':
+        return lambda: pymerit.MeritDefault().loads(data['json'])
+    elif op == 'validate':
+        return cold(obj.validate)
+    elif op == 'validate-cached':
+        return obj.validate
+    elif op == 'add_resource':
+        def add():
+            h = empty_document()
+            for r in data['resources']:
+                r.invalidate()
+                h.add_resource(r)
+        return add
+    elif op == 'add_resources':
+        return lambda: empty_document().add_resources(data['resources'])
+    elif op == 'dumpb':
+        return cold(obj.dumpb)
+    elif op == 'loadb':
+        return lambda: pymerit.MeritDefault().loadb(data['binary'])
+    elif op == 'prettyprint':
+        return obj.prettyprint
+    raise ValueError("Unknown operation: {}".format(op))
+
+def measure(func, repeat):
+    """
+    Best wall time over repeat runs, and peak traced memory of one run
+    """
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+def environment():
+    """
+    Description of the interpreter, backend and commit
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'json_backend': pymerit.get_json_backend().name,
+        'commit': commit,
+        'timestamp': time.time(),
+    }
+
+def run(sizes=(10, 1000, 100000), handlers=1, repeat=3, ops=None, log=None):
+    """
+    Run the suite
+
+    :param list sizes: Number of resources per document
+    :param int handlers: Number of custom resource handler schemas
+    :param int repeat: Timed runs per operation (the best is kept)
+    :param list ops: Operations to run (default: all)
+    :param log: File handle for progress messages
+    :rtype: dict
+    """
+    schemas = make_handlers(handlers)
+    results = []
+    for size in sizes:
+        data = prepare(size, schemas)
+        for op in (ops or operations):
+            if op == 'prettyprint' and size > prettyprint_max:
+                continue
+            seconds, peak = measure(make_operation(op, data), repeat)
+            results.append({
+                'op': op,
+                'size': size,
+                'handlers': handlers,
+                'seconds': seconds,
+                'peak_bytes': peak,
+            })
+            if log is not None:
+                log.write("{:>15} {:>9} {:10.4f}s {:12d}B\n".format(op, size, seconds, peak))
+        del data
+
+    return {
+        'environment': environment(),
+        'results': results
+    }
+
+def compare(base, head, threshold=1.2):
+    """
+    Compare two result sets
+
+    :param dict base: Results of the reference run
+    :param dict head: Results of the new run
+    :param float threshold: Time ratio (head/base) above which an
+           operation counts as a regression
+    :rtype: list
+    :return: List of (op, size, handlers, base seconds, head seconds, ratio, regressed)
+    """
+    key = lambda r: (r['op'], r['size'], r['handlers'])
+    reference = {key(r): r for r in base['results']}
+    rows = []
+    for r in head['results']:
+        b = reference.get(key(r))
+        if b is None:
+            continue
+        ratio = r['seconds'] / b['seconds'] if b['seconds'] > 0 else float('inf')
+        rows.append(key(r) + (b['seconds'], r['seconds'], ratio, ratio > threshold))
+    return rows
@@ -0,0 +1,80 @@
+"""
+Synthetic documents
+-------------------
+
+Generators of synthetic merit documents for benchmarks.
+"""
+
+def make_resource(i, schema="resource:filebase:v1", root="/data"):
+    """
+    Raw dict of a file resource
+    """
+    return {
+        "schema": schema,
+        "name": "File",
+        "description": "File saved on disk",
+        "path": "{}/part-{:07d}.parquet".format(root, i),
+        "attributes": {
+            "size": 1000 + i,
+            "rows": i % 997,
+            "extension": ".parquet"
+        }
+    }
+
+def make_document(count, schemas=("resource:filebase:v1",), root="/data"):
+    """
+    Raw dict of a global document with count resources. Resource
+    schemas are assigned round-robin.
+    """
+    return {
+        "schema": "global:default:v1",
+        "namespace": "bench.scribbledata.io",
+        "path": "project=bench/run=1",
+        "name": "Benchmark run",
+        "description": "Synthetic document",
+        "contexts": [
+            {
+                "schema": "context:platform:v1",
+                "name": "PlatformContext",
+                "description": "Host on which the execution took place",
+                "node": "bench",
+                "platform": "Linux-x86_64",
+                "python": "3.7.0"
+            }
+        ],
+        "resources": [make_resource(i, schemas[i % len(schemas)], root)
+                      for i in range(count)]
+    }
+
+def make_handlers(count):
+    """
+    Create and register count resource handler classes with distinct
+    schemas. Existing handlers are reused.
+
+    :rtype: list
+    :return: Schemas of the handlers
+    """
+    import pymerit
+
+    def initialize(self, *args, **kwargs):
+        self.metadata = {
+            "name": "File",
+            "description": "Benchmark resource",
+            "attributes": {}
+        }
+
+    schemas = []
+    for i in range(count):
+        schema = "resource:bench{}:v1".format(i)
+        try:
+            pymerit.find_handler(schema)
+        except pymerit.MeritNoHandler:
+            cls = type("MeritResourceBench{}".format(i), (pymerit.MeritResourceBase,), {
+                'schema': schema,
+                'required': pymerit.MeritResourceBase.required + ('path', 'attributes'),
+                'initialize': initialize,
+                '__module__': __name__,
+            })
+            pymerit.schema_register(cls)
+        schemas.append(schema)
+    return schemas
@@ -13,5 +13,11 @@ b. Handlers to load and store metadata
 
 from .utils import *
 from .exceptions import *
+from .backends import *
+from .fields import *
 from .base import * 
 from .contrib import *
+from .digest import MeritDigestCache
+from .reader import MeritReader
+from .instrument import (stats, reset_stats, enable_stats, disable_stats,
+                         add_stats_hook, remove_stats_hook)
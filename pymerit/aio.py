@@ -0,0 +1,217 @@
+"""
+Asyncio
+-------
+
+Async counterparts of the blocking operations, for use from an event
+loop. File reads, stat calls and writes run on a bounded thread pool,
+and resources are validated concurrently in chunks::
+
+    obj = await pymerit.anew("metadata.json")
+    await obj.avalidate()
+    await obj.asave("metadata.json")
+
+This module is imported on first use so that importing pymerit does
+not load asyncio.
+"""
+import asyncio
+import threading
+from .exceptions import *
+from .backends import get_json_backend
+from .fs import stat_paths, verified_paths
+
+max_workers = 8
+"""
+Number of threads in the default executor
+"""
+
+chunk_size = 64
+"""
+Number of resources validated per executor job
+"""
+
+_executor = None
+_lock = threading.Lock()
+
+def get_executor():
+    """
+    Default executor, created on first use with max_workers threads
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(max_workers=max_workers)
+        return _executor
+
+def set_executor(executor):
+    """
+    Replace the default executor (e.g., to share a pool with the
+    application). Returns the previous one, which is not shut down.
+    """
+    global _executor
+    with _lock:
+        previous, _executor = _executor, executor
+    return previous
+
+async def run(func, *args, executor=None):
+    """
+    Run func(*args) on the executor and wait for the result
+    """
+    # Called from a coroutine, so this is the running loop
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor or get_executor(), func, *args)
+
+def read_metadata(path, mode="json", backend=None):
+    """
+    Read and decode a metadata file (blocking)
+    """
+    from . import binary
+    from .utils import yaml_loader
+
+    with open(path, 'rb') as fd:
+        data = fd.read()
+
+    if mode == "binary" or binary.is_binary(data):
+        return binary.decode(data)
+    if mode == "json":
+        return get_json_backend(backend).loads(data)
+    if mode == "yaml":
+        import yaml
+        return yaml.load(data, Loader=yaml_loader())
+    raise ValueError("Unsupported mode: {}".format(mode))
+
+def build(metadata, lazy=False, root=".", backend=None):
+    """
+    Find the handler and load the metadata without validating it
+    (blocking). Shard manifests are expanded with the shards found
+    in root.
+    """
+    from .base import MeritBase
+    from . import shards
+
+    if shards.is_manifest(metadata):
+        metadata = shards.expand_manifest(metadata, root, pool="thread",
+                                          backend=backend)
+
+    cls = MeritBase.find_handler_for_dict(metadata)
+    obj = cls(lazy=True) if lazy else cls()
+    obj.load(metadata, validate=False)
+    return obj
+
+async def anew(source, mode="json", lazy=False, backend=None, executor=None):
+    """
+    Async pymerit.new. The file is read, decoded and loaded on the
+    executor and the object is then validated with avalidate().
+
+    :param source: Filename (including a shard manifest), metadata
+           dict, or bytes in the binary format
+    :param str mode: Format of the file (json, yaml, binary)
+    :param bool lazy: Build resource objects only when accessed
+    :param str backend: JSON backend. Default is the global backend
+    :param executor: concurrent.futures executor. Default is get_executor()
+    """
+    import os
+
+    root = "."
+    if isinstance(source, str):
+        root = os.path.dirname(os.path.abspath(source))
+        metadata = await run(read_metadata, source, mode, backend, executor=executor)
+    elif isinstance(source, (bytes, bytearray)):
+        from . import binary
+        metadata = binary.decode(source)
+    else:
+        metadata = source
+
+    obj = await run(build, metadata, lazy, root, backend, executor=executor)
+    await validate(obj, executor=executor)
+    return obj
+
+def validate_each(elements):
+    """
+    Validate each element (blocking)
+    """
+    for e in elements:
+        e.validate()
+
+def validate_chunk(resources):
+    """
+    Validate resources that changed since their last validation
+    (blocking). Resources with missing local paths are not validated.
+
+    :rtype: list
+    :return: Missing paths
+    """
+    resources = [r for r in resources if r.is_dirty()]
+    stats = stat_paths([p for r in resources for p in r.local_paths()],
+                       max_workers=1)
+
+    missing = []
+    with verified_paths(stats):
+        for r in resources:
+            paths = [p for p in r.local_paths() if stats[p] is None]
+            if len(paths) > 0:
+                missing.extend(paths)
+                continue
+            r.validate()
+    return missing
+
+async def validate(obj, executor=None):
+    """
+    Validate an object without blocking the event loop. For global
+    documents, the changed contexts are validated on the executor and
+    the changed resources concurrently in chunks of chunk_size. All
+    missing paths are reported in a single MeritMissingPaths exception.
+    """
+    from .base import MeritGlobalBase, MeritLazyList
+
+    if not isinstance(obj, MeritGlobalBase):
+        await run(obj.validate, executor=executor)
+        return
+
+    elements = []
+    for field in ['contexts', 'resources']:
+        values = obj.metadata.get(field, [])
+        if isinstance(values, MeritLazyList):
+            values = list(values.loaded())
+        elements.append([e for e in values if e.is_dirty()])
+    contexts, resources = elements
+
+    await run(validate_each, contexts, executor=executor)
+
+    jobs = []
+    for i in range(0, len(resources), chunk_size):
+        jobs.append(run(validate_chunk, resources[i:i + chunk_size],
+                        executor=executor))
+
+    missing = []
+    for result in await asyncio.gather(*jobs):
+        missing.extend(result)
+    if len(missing) > 0:
+        raise MeritMissingPaths(missing)
+
+    # Elements are now validated, so this only checks the document's
+    # own fields
+    obj.validate()
+
+def write(path, data):
+    """
+    Write str or bytes to a file atomically (blocking)
+    """
+    from .writer import atomic_write
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    atomic_write(path, lambda fd: fd.write(data))
+
+async def save(obj, path, mode="pretty", backend=None, executor=None):
+    """
+    Validate, encode and write an object without blocking the event loop
+
+    :param str path: Output filename
+    :param str mode: Output mode (pretty, compact, bytes)
+    :param str backend: JSON backend. Default is the global backend
+    :param executor: concurrent.futures executor. Default is get_executor()
+    """
+    await validate(obj, executor=executor)
+    data = await run(obj.dumps, mode, backend, executor=executor)
+    await run(write, path, data, executor=executor)
@@ -0,0 +1,226 @@
+"""
+Backends
+--------
+
+JSON encoding/decoding backends. orjson or ujson are used when
+installed; the standard library json module is the fallback. Fast
+backends hand over to the standard library for content they cannot
+encode or decode (integers outside the 64-bit range, NaN and Infinity
+literals), so every backend reads what the others write. JSON has no
+NaN or Infinity: orjson writes them as null. Fast backends may also
+format floats differently (e.g., 1e16 instead of 1e+16).
+
+Output modes:
+
+* pretty - indented text, identical across backends
+* compact - text without whitespace
+* bytes - compact UTF-8 encoded bytes
+"""
+import json
+from .exceptions import *
+
+json_modes = ('pretty', 'compact', 'bytes')
+"""
+Supported output modes
+"""
+
+class MeritJSONBackend(object):
+    """
+    Standard library JSON backend
+    """
+    name = "json"
+
+    def check_mode(self, mode):
+        if mode not in json_modes:
+            raise MeritUnknownBackend("Unknown output mode: {}".format(mode))
+
+    def pretty(self, obj):
+        return json.dumps(obj, indent=4)
+
+    def compact(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps(self, obj, mode="pretty"):
+        """
+        Encode obj in the given output mode
+        """
+        self.check_mode(mode)
+        if mode == "pretty":
+            return self.pretty(obj)
+        s = self.compact(obj)
+        if mode == "bytes":
+            return s.encode('utf-8')
+        return s
+
+    def loads(self, s):
+        """
+        Decode a str or UTF-8 encoded bytes
+        """
+        if isinstance(s, (bytes, bytearray)):
+            # json.loads only accepts bytes from Python 3.6
+            s = s.decode('utf-8')
+        return json.loads(s)
+
+    def load(self, fd):
+        """
+        Decode the content of a file handle
+        """
+        return self.loads(fd.read())
+
+_digits = bytes.maketrans(b'123456789', b'000000000')
+_int_range = (-2**63, 2**64 - 1)
+
+def has_long_integer(b):
+    """
+    Check if JSON bytes have an integer outside the range of orjson,
+    which reads such integers as floats. Digits are mapped to '0' so
+    that candidates (20 digits, or a sign and 19 digits) are found
+    with a plain substring search.
+    """
+    t = b.translate(_digits)
+    for run in (b'0' * 20, b'-' + b'0' * 19):
+        i = t.find(run)
+        while i >= 0:
+            start = i + 1 if t[i] == 0x2d else i
+            end = start
+            while end < len(t) and t[end] == 0x30:
+                end += 1
+            if start > 0 and t[start - 1] == 0x2d:
+                start -= 1
+            # Only numbers in value position, not digits within strings
+            # or floats
+            before = t[start - 1:start]
+            after = t[end:end + 1]
+            if before in b'[:, \t\r\n' and after in b']}, \t\r\n':
+                value = int(b[start:end])
+                if not _int_range[0] <= value <= _int_range[1]:
+                    return True
+            i = t.find(run, end)
+    return False
+
+class MeritOrjsonBackend(MeritJSONBackend):
+    """
+    orjson backend. Pretty output is left to the standard library
+    because orjson only supports two-space indentation.
+    """
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def dumps(self, obj, mode="pretty"):
+        self.check_mode(mode)
+        if mode == "pretty":
+            return self.pretty(obj)
+        try:
+            b = self.orjson.dumps(obj)
+        except TypeError:
+            # Integers outside the 64-bit range, non-string keys
+            return super().dumps(obj, mode)
+        if mode == "bytes":
+            return b
+        return b.decode('utf-8')
+
+    def loads(self, s):
+        try:
+            b = s.encode('utf-8') if isinstance(s, str) else s
+            if not has_long_integer(b):
+                return self.orjson.loads(b)
+        except ValueError:
+            # NaN/Infinity literals, lone surrogates
+            pass
+        return super().loads(s)
+
+class MeritUjsonBackend(MeritJSONBackend):
+    """
+    ujson backend
+    """
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def compact(self, obj):
+        try:
+            return self.ujson.dumps(obj, ensure_ascii=False,
+                                    escape_forward_slashes=False,
+                                    allow_nan=False)
+        except (OverflowError, TypeError, ValueError):
+            return super().compact(obj)
+
+    def loads(self, s):
+        try:
+            return self.ujson.loads(s)
+        except ValueError:
+            return super().loads(s)
+
+json_backends = ['orjson', 'ujson', 'json']
+"""
+Backend names in order of preference
+"""
+
+_backend_classes = {
+    'json': MeritJSONBackend,
+    'orjson': MeritOrjsonBackend,
+    'ujson': MeritUjsonBackend,
+}
+
+_backends = {}
+_default = [None]
+
+def load_json_backend(name):
+    """
+    Instantiate (once) the backend with the given name
+
+    :param str name: Backend name (json, orjson, ujson)
+    """
+    if name in _backends:
+        return _backends[name]
+
+    if name not in _backend_classes:
+        raise MeritUnknownBackend("Unknown JSON backend: {}".format(name))
+
+    try:
+        backend = _backend_classes[name]()
+    except ImportError:
+        raise MeritUnknownBackend("JSON backend not installed: {}".format(name))
+
+    _backends[name] = backend
+    return backend
+
+def available_json_backends():
+    """
+    List the names of the installed backends
+    """
+    available = []
+    for name in json_backends:
+        try:
+            load_json_backend(name)
+            available.append(name)
+        except MeritUnknownBackend:
+            pass
+    return available
+
+def get_json_backend(name=None):
+    """
+    Return the named backend, or the global default
+
+    :param str name: Backend name. Default is the backend selected by
+           set_json_backend or else the fastest installed backend
+    """
+    if name is not None:
+        return name if isinstance(name, MeritJSONBackend) else load_json_backend(name)
+
+    if _default[0] is None:
+        _default[0] = load_json_backend(available_json_backends()[0])
+    return _default[0]
+
+def set_json_backend(name):
+    """
+    Select the global default backend
+
+    :param str name: Backend name. None restores the automatic choice
+    """
+    _default[0] = None if name is None else load_json_backend(name)
@@ -7,37 +7,383 @@ Base classes for metadata including a metaclass to enable tracking of the schema
 """
 import os
 import sys
-import json
 import collections
+import collections.abc
+import types
 import abc
-import texttable
 from .exceptions import *
+from .backends import *
+from .fs import *
+from .fields import *
+from . import digest
+from . import binary
+from . import instrument
+from . import writer
+from . import pool
 from .utils import *
 
 class MeritBase(object):
     pass
 
+def static_hook(func):
+    """
+    Adapt a staticmethod field hook to the func(self, value) convention
+    """
+    return lambda self, value: func(value)
+
+class MeritMetadata(dict):
+    """
+    Metadata dict that remembers whether its content passed validation.
+    Any mutation clears the valid flag. Changes inside nested values
+    (e.g., a resource's attributes dict) are not tracked.
+    """
+    __slots__ = ('valid',)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.valid = False
+
+    def __setitem__(self, key, value):
+        self.valid = False
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.valid = False
+        dict.__delitem__(self, key)
+
+    def __ior__(self, other):
+        self.valid = False
+        return dict.__ior__(self, other)
+
+    def update(self, *args, **kwargs):
+        self.valid = False
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.valid = False
+        return dict.setdefault(self, key, default)
+
+    def pop(self, *args):
+        self.valid = False
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.valid = False
+        return dict.popitem(self)
+
+    def clear(self):
+        self.valid = False
+        dict.clear(self)
+
+class MeritRecord(collections.abc.MutableMapping):
+    """
+    Compact metadata storage with one slot per known field and an
+    overflow dict (allocated on demand) for any other key. Used in place
+    of a dict by classes that set compact = True. Like MeritMetadata,
+    it clears its valid flag on any mutation.
+    """
+    __slots__ = ('extra', 'valid')
+
+    fields = ()
+    """
+    Known fields, in order
+    """
+
+    slots = {}
+    """
+    Field name to slot descriptor
+    """
+
+    handler = None
+    """
+    Handler class of the record type (see make_record_type)
+    """
+
+    def __init__(self, data=()):
+        self.extra = None
+        self.valid = False
+        for k, v in (data.items() if hasattr(data, 'items') else data):
+            self[k] = v
+
+    def __getitem__(self, key):
+        slot = self.slots.get(key)
+        if slot is not None:
+            try:
+                return slot.__get__(self)
+            except AttributeError:
+                raise KeyError(key)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        self.valid = False
+        slot = self.slots.get(key)
+        if slot is not None:
+            slot.__set__(self, value)
+            return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.valid = False
+            try:
+                slot.__delete__(self)
+            except AttributeError:
+                raise KeyError(key)
+            return
+        if self.extra is None:
+            raise KeyError(key)
+        del self.extra[key]
+        self.valid = False
+
+    def __contains__(self, key):
+        slot = self.slots.get(key)
+        if slot is not None:
+            try:
+                slot.__get__(self)
+                return True
+            except AttributeError:
+                return False
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self):
+        for k, slot in self.slots.items():
+            try:
+                slot.__get__(self)
+            except AttributeError:
+                continue
+            yield k
+        if self.extra is not None:
+            yield from list(self.extra)
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, dict(self.items()))
+
+    def copy(self):
+        return dict(self.items())
+
+    def __reduce__(self):
+        # Record types are built at runtime and cannot be imported by
+        # name; they are rebuilt from their handler class
+        if self.handler is None:
+            return (dict, (self.copy(),))
+        return (load_record, (self.handler, self.copy()))
+
+def make_record_type(name, fields, handler=None):
+    """
+    Create a MeritRecord subclass with one slot per field
+
+    :param handler: Handler class the record type belongs to, used to
+           rebuild records when unpickled
+    """
+    slotnames = tuple("f{}".format(i) for i in range(len(fields)))
+    rec = type(name + "Record", (MeritRecord,), {
+        '__slots__': slotnames,
+        '__module__': __name__,
+        'fields': tuple(fields),
+        'handler': handler,
+    })
+    rec.slots = {f: getattr(rec, s) for f, s in zip(fields, slotnames)}
+    return rec
+
+def load_record(handler, data):
+    """
+    Build a record of the record type of a handler class
+    """
+    return handler.record_type()(data)
+
+class MeritFieldList(collections.abc.MutableSequence):
+    """
+    Instance view of a class-level field name tuple (required or
+    order). The tuple is copied into the instance on the first change
+    (copy-on-write), so initialize() can still extend it without
+    affecting other instances.
+    """
+    __slots__ = ('obj', 'name', 'names')
+
+    def __init__(self, obj, name, names):
+        self.obj = obj
+        self.name = name
+        self.names = names
+
+    def current(self):
+        specs = self.obj._specs
+        if specs is not None and self.name in specs:
+            return specs[self.name]
+        return self.names
+
+    def own(self):
+        specs = self.obj._specs
+        if specs is None:
+            specs = self.obj._specs = {}
+        if self.name not in specs:
+            specs[self.name] = list(self.names)
+        return specs[self.name]
+
+    def __len__(self):
+        return len(self.current())
+
+    def __getitem__(self, i):
+        return self.current()[i]
+
+    def __setitem__(self, i, value):
+        self.own()[i] = value
+
+    def __delitem__(self, i):
+        del self.own()[i]
+
+    def insert(self, i, value):
+        self.own().insert(i, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, MeritFieldList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return type(other)(list(other) + list(self))
+
+    def __repr__(self):
+        return repr(list(self.current()))
+
+class MeritFieldNames(object):
+    """
+    Class attribute holding field names (required or order). Read from
+    the class, it is a tuple shared by all instances. Read from an
+    instance, it is a MeritFieldList, and assigning a list to it sets
+    the names of that instance only.
+    """
+    __slots__ = ('name', 'names')
+
+    def __init__(self, name, names):
+        self.name = name
+        self.names = tuple(names)
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self.names
+        specs = obj._specs
+        if specs is not None and self.name in specs:
+            return specs[self.name]
+        return MeritFieldList(obj, self.name, self.names)
+
+    def __set__(self, obj, value):
+        if obj._specs is None:
+            obj._specs = {}
+        obj._specs[self.name] = list(value)
+
 class MeritMeta(abc.ABCMeta):
     """
     Meta class for all elements with schemas. This allows for
     registration, validation, and tracking of the schema implementors.
     """
+    hook_prefixes = ('dump', 'load', 'validate', 'stream')
+    """
+    Prefixes of per-field hook methods (e.g., dump_resources)
+    """
+
+    not_hooks = ('dump_stream',)
+    """
+    Methods that look like field hooks but are not
+    """
+
     def __init__(cls, name, bases, dct):
 
         if cls.__name__ in ['MeritBase']:
             super().__init__(name, bases, dct)
+            cls.compile_plan()
             return
 
         MeritBase.validate_cls(cls, dct)
 
         # Now initialize
         super().__init__(name, bases, dct)
-
+        cls.compile_plan()
 
         # Auto register classes
         if cls.__module__ in ['pymerit.base', 'pymerit.contrib']:
             MeritBase.schema_register(cls)
 
+    def compile_plan(cls):
+        """
+        Precompute the per-field dump/load/validate dispatch tables so
+        that the attribute probing happens once per class. Each table
+        maps a field name to a function called as func(self, value).
+        """
+        hooks = {p: {} for p in cls.hook_prefixes}
+        for klass in reversed(cls.__mro__):
+            for attr, value in vars(klass).items():
+                prefix, _, field = attr.partition('_')
+                if prefix not in hooks or len(field) == 0 or attr in cls.not_hooks:
+                    continue
+                if isinstance(value, types.FunctionType):
+                    hooks[prefix][field] = value
+                elif isinstance(value, staticmethod):
+                    hooks[prefix][field] = static_hook(value.__func__)
+                else:
+                    # Classmethods and other attributes are not field hooks
+                    hooks[prefix].pop(field, None)
+
+        cls._dump_hooks = hooks['dump']
+        cls._load_hooks = hooks['load']
+        cls._validate_hooks = hooks['validate']
+        cls._stream_hooks = hooks['stream']
+        cls._key_plans = {}
+        cls._validators = {}
+        cls._record_type = None
+
+        # Field names are tuples shared by all instances, copied into
+        # an instance only when it changes them
+        for attr in ['required', 'order']:
+            value = vars(cls).get(attr)
+            if value is not None and not isinstance(value, MeritFieldNames):
+                setattr(cls, attr, MeritFieldNames(attr, value))
+
+        # Declared fields, merged along the class hierarchy
+        specs = collections.OrderedDict()
+        for klass in reversed(cls.__mro__):
+            declared = vars(klass).get('fields', {})
+            if (not isinstance(declared, dict) or
+                not all(isinstance(f, Field) for f in declared.values())):
+                raise MeritInvalidSchema("fields must be a dict of Field specs")
+            specs.update(declared)
+        cls._fields = specs
+
+        # Required fields are required elements as well
+        missing = tuple(n for n, f in specs.items()
+                        if f.required and n not in cls.required)
+        if len(missing) > 0:
+            cls.required = MeritFieldNames('required', cls.required + missing)
+
+    def record_type(cls):
+        """
+        MeritRecord subclass with a slot for each known field of the
+        class (schema, order and required), built on first use
+        """
+        if cls._record_type is None:
+            fields = ['schema']
+            for k in tuple(cls.order) + tuple(cls.required):
+                if k not in fields:
+                    fields.append(k)
+            cls._record_type = make_record_type(cls.__name__, fields, cls)
+        return cls._record_type
+
 
 class MeritBase(metaclass=MeritMeta):
     """
@@ -49,27 +395,70 @@ class MeritBase(metaclass=MeritMeta):
     string or a list of strings)
     """
 
-    _registry = []
+    _registry = collections.OrderedDict()
+    """
+    Registry of schemas and handler classes, indexed by schema string
+    """
+
+    # Handlers keep a __dict__ for ad-hoc attributes. It is only
+    # allocated when used.
+    __slots__ = ('metadata', '__dict__', '__weakref__')
+
+    _specs = None
+    """
+    Instance-level required/order lists, if initialize() changed them
+    """
+
+    required = ('name', 'description')
+    """
+    Elements that must be present. Subclasses extend this at the
+    class level, e.g., required = MeritBase.required + ('path',), or
+    per instance with self.required.extend([...]) in initialize()
+    (see MeritFieldNames)
+    """
+
+    fields = {
+        'name': Field(str),
+        'description': Field(str),
+    }
+    """
+    Type, pattern and nested specs of elements (see pymerit.fields).
+    Merged with the fields of the base classes.
+    """
+
+    order = ()
+    """
+    Elements dumped first, before the required ones
+    """
+
+    compact = False
     """
-    Registy of schemas and handler classes
+    Store metadata in a slotted MeritRecord instead of a dict. Saves
+    memory when there are many objects with a fixed set of fields.
+    """
+
+    cache_validation = True
+    """
+    Skip validate() when the metadata has not changed since the last
+    successful validation. Checks that depend on external state (e.g.,
+    whether a file still exists) are not repeated; call invalidate()
+    to force them.
     """
 
     def __init__(self, *args, **kwargs):
         self.metadata = {}
         """
         Internal dict representation of the metadata
-
-        required elements: name, description
         """
-        self.required = [
-            'name',
-            'description',
-        ]
-        self.order = []
 
         # Now initialize
         self.initialize()
 
+        if self.compact:
+            self.metadata = type(self).record_type()(self.metadata)
+        else:
+            self.metadata = MeritMetadata(self.metadata)
+
     name = get_metadata_attribute('name')
     """
     Property-like access to metadata name element
@@ -107,19 +496,24 @@ class MeritBase(metaclass=MeritMeta):
     ####################################################
     # Schema management
     ####################################################
+    @staticmethod
+    def schema_names(schemas):
+        """
+        Normalize a schema specification to a list of strings
+        """
+        if isinstance(schemas, str):
+            return [schemas]
+        return list(schemas)
+
     @classmethod
     def schema_list(cls):
         """
         List known schemas and handling classes
         """
         summary = [('Schema', 'Class', 'Module')]
-        for c in cls._registry:
+        for s, c in cls._registry.items():
             mod = sys.modules[c.__module__]
-            schemas = c.schema
-            if isinstance(schemas, str):
-                schemas = [schemas]
-            for s in schemas:
-                summary.append((s, id(c), c.__name__, mod.__file__))
+            summary.append((s, id(c), c.__name__, mod.__file__))
 
         return summary
 
@@ -128,65 +522,155 @@ class MeritBase(metaclass=MeritMeta):
         """
         List known schemas and handling classes
         """
+        registry = cls._registry
+        for schema in cls.schema_names(schemas):
+            c = registry.get(schema)
+            if c is not None:
+                return c
+        raise MeritNoHandler("Unknown schema: {}".format(schemas))
 
-        if isinstance(schemas, str):
-            schemas = [schemas]
-        for schema in schemas:
-            for c in cls._registry:
-                if isinstance(c.schema, str) and c.schema == schema:
-                    return c
-                elif isinstance(c.schema, list):
-                    if schema in c.schema:
-                        return c
-        raise MeritNoHandler("Unknown schema: {}".format(schema))
+    @classmethod
+    def schema_registered(cls, targetcls):
+        """
+        Check whether targetcls is the registered handler for its schemas
+        """
+        registry = cls._registry
+        return any(registry.get(s) is targetcls
+                   for s in cls.schema_names(targetcls.schema))
+
+    @classmethod
+    def schema_ensure(cls, targetcls):
+        """
+        Register targetcls unless it is registered. Schemas already
+        handled by another class are left alone.
+        """
+        if cls.schema_registered(targetcls):
+            return
+        try:
+            cls.schema_register(targetcls)
+        except (MeritDuplicateSchema, MeritInvalidSchema, TypeError):
+            pass
 
     @classmethod
     def schema_unregister(cls, targetcls):
         """
         Unregister cls
         """
+        registry = cls._registry
+        schemas = [s for s in cls.schema_names(targetcls.schema)
+                   if registry.get(s) is targetcls]
+        if len(schemas) == 0:
+            raise MeritNotRegistered("Unknown handler")
 
-        for i, c in enumerate(cls._registry):
-            if id(c) == id(targetcls):
-                del cls._registry[i]
-                return
-
-        raise MeritNotRegistered("Unknown handler")
+        for s in schemas:
+            del registry[s]
 
     @classmethod
     def schema_register(cls, targetcls):
         """
         Register class
         """
-
-        try:
-            targetcls.schema_get(targetcls.schema)
-            raise MeritDuplicateSchema("Schema already present")
-        except MeritNoHandler:
-            pass
+        schemas = cls.schema_names(targetcls.schema)
+        registry = cls._registry
+        for s in schemas:
+            if s in registry:
+                raise MeritDuplicateSchema("Schema already present")
 
         # Now register
-        cls._registry.append(targetcls)
+        for s in schemas:
+            registry[s] = targetcls
+
+    def field_names(self, name):
+        """
+        Effective required or order names of this object, as a tuple
+        """
+        specs = self._specs
+        if specs is not None and name in specs:
+            return tuple(specs[name])
+        return getattr(type(self), name)
+
+    def key_plan(self):
+        """
+        Return the ordered keys (order followed by required) and the set
+        of those keys. The plan is computed once per class and
+        order/required combination.
+        """
+        # Objects that did not change their field names share the
+        # class plan
+        plankey = None
+        if self._specs is not None:
+            plankey = (self.field_names('order'), self.field_names('required'))
+        plan = self._key_plans.get(plankey)
+        if plan is None:
+            keys = list(self.field_names('order'))
+            for k in self.field_names('required'):
+                if k not in keys:
+                    keys.append(k)
+            plan = (tuple(keys), frozenset(keys))
+            self._key_plans[plankey] = plan
+        return plan
 
     def validate(self, metadata=None):
         """
         Check if the metadata is valid
 
         :param dict metadata: Optional metadata dict to be validated.
-              If not specified, will use the class's metadata attribute.
+              If not specified, will use the class's metadata attribute
+              and skip the checks if it is unchanged since the last
+              successful validation.
         """
-
-        if metadata is None:
+        own = metadata is None
+        if own:
             metadata = self.metadata
+            if self.cache_validation and getattr(metadata, 'valid', False):
+                return
 
-        for r in self.required:
+        if instrument.enabled:
+            with instrument.phase('validate', self.schema):
+                self.validator(timed=True)(self, metadata)
+        else:
+            self.validator()(self, metadata)
 
-            if r not in metadata:
-                raise MeritInvalidMetadata("Missing: {}".format(r))
+        if own and isinstance(metadata, (MeritMetadata, MeritRecord)):
+            metadata.valid = True
 
-            if hasattr(self, 'validate_' + r):
-                func = getattr(self, 'validate_' + r)
-                func(metadata[r])
+    def validator(self, timed=False):
+        """
+        Return the validator compiled from the fields, required
+        elements and validate_<field> hooks. It is compiled once per
+        class and required combination.
+
+        :param bool timed: Time each hook (used when instrumentation is on)
+        """
+        key = (None if self._specs is None else self.field_names('required'), timed)
+        func = self._validators.get(key)
+        if func is None:
+            func = compile_validator(self._fields, self.field_names('required'),
+                                     self._validate_hooks, timed)
+            self._validators[key] = func
+        return func
+
+    @classmethod
+    def json_schema(cls):
+        """
+        Export the fields and required elements as a JSON Schema document
+        """
+        return to_json_schema(cls._fields, cls.required,
+                              schema=cls.schema, title=cls.__name__)
+
+    def is_dirty(self):
+        """
+        Check if the metadata changed since the last successful validation
+        """
+        return not getattr(self.metadata, 'valid', False)
+
+    def invalidate(self):
+        """
+        Forget the last successful validation so that the next
+        validate() runs all checks again
+        """
+        if isinstance(self.metadata, (MeritMetadata, MeritRecord)):
+            self.metadata.valid = False
 
 
     @abc.abstractmethod
@@ -200,68 +684,205 @@ class MeritBase(metaclass=MeritMeta):
         """
         Return the metadata as a dictionary
         """
+        if instrument.enabled:
+            with instrument.phase('dump', self.schema):
+                return self._dump()
+        return self._dump()
+
+    def _dump(self):
         self.validate()
 
+        metadata = self.metadata
+        hooks = self._dump_hooks
+        keys, known = self.key_plan()
+
         d = [('schema', self.schema)]
 
-        # Take a union of order and required
-        order = self.order
-        for k in self.required:
-            if k not in order:
-                order.append(k)
+        # => Follow the precomputed order
+        for k in keys:
+            func = hooks.get(k)
+            v = metadata[k]
+            d.append((k, v if func is None else func(self, v)))
 
-        # => Now follow the order computed
-        for k in order:
+        for k, v in metadata.items():
+            if k in known:
+                continue
+            func = hooks.get(k)
+            d.append((k, v if func is None else func(self, v)))
 
-            if hasattr(self, 'dump_' + k):
-                func = getattr(self, 'dump_' + k)
-            else:
-                func = lambda x: x
-            d.append((k, func(self.metadata[k])))
+        return collections.OrderedDict(d)
+
+    def iter_dump(self):
+        """
+        Yield the (key, value) pairs of dump() in the same order without
+        building the dict. Elements with a stream_<field> hook are
+        yielded as an iterator over their dumped items, e.g., the
+        resources of a global document.
+        """
+        self.validate()
 
-        for k,v in self.metadata.items():
-            if k in self.order:
+        metadata = self.metadata
+        hooks = self._dump_hooks
+        streams = self._stream_hooks
+        keys, known = self.key_plan()
+
+        # As in dump(), the schema comes first, with the value from the
+        # metadata if it has one
+        order = ['schema'] + [k for k in keys if k != 'schema']
+        order += [k for k in metadata if k not in known and k != 'schema']
+
+        for k in order:
+            if k == 'schema' and k not in metadata:
+                yield k, self.schema
                 continue
-            if hasattr(self, 'dump_' + k):
-                func = getattr(self, 'dump_' + k)
-            else:
-                func = lambda x: x
-            d.append((k, func(v)))
+            v = metadata[k]
+            func = streams.get(k)
+            if func is not None:
+                yield k, func(self, v)
+                continue
+            func = hooks.get(k)
+            yield k, v if func is None else func(self, v)
 
-        return collections.OrderedDict(d)
+    def dump_stream(self, fp, backend=None, buffer_size=writer.buffer_size):
+        """
+        Write compact JSON to a file handle incrementally (see
+        pymerit.writer). The output is identical to dumps(mode="compact").
+
+        :param fp: File handle (text or binary). For a socket, use
+               sock.makefile('wb')
+        :param str backend: JSON backend. Default is the global backend
+        :param int buffer_size: Bytes buffered before each write
+        """
+        writer.write_json(fp, self.iter_dump(), backend=backend,
+                          buffer_size=buffer_size)
+
+    def save(self, target, backend=None, buffer_size=writer.buffer_size, fsync=True):
+        """
+        Write compact JSON incrementally to a file handle or, atomically,
+        to a file
+
+        :param target: Filename or file handle
+        :param str backend: JSON backend. Default is the global backend
+        :param int buffer_size: Bytes buffered before each write
+        :param bool fsync: Flush the file to disk before it is renamed
+        """
+        if hasattr(target, 'write'):
+            self.dump_stream(target, backend=backend, buffer_size=buffer_size)
+            return
 
-    def load(self, metadata):
+        writer.atomic_write(target,
+                            lambda fp: self.dump_stream(fp, backend, buffer_size),
+                            fsync=fsync)
+
+    def load(self, metadata, validate=True):
         """
         Load a dictionary. Call element-specific handler if it exists.
+
+        :param bool validate: Validate the loaded metadata. Containers
+              that validate their elements in a batch turn this off.
         """
+        if instrument.enabled:
+            with instrument.phase('load', self.schema):
+                return self._load(metadata, validate)
+        return self._load(metadata, validate)
+
+    def _load(self, metadata, validate=True):
         if not isinstance(metadata, dict):
             raise MeritInvalidMetadata("Metadata not a dict")
 
+        hooks = self._load_hooks
         final = {}
         for k, v in metadata.items():
-            if hasattr(self, 'load_' + k):
-                func = getattr(self, 'load_' + k)
-            else:
-                func = lambda x: x
-            final[k] = func(v)
+            func = hooks.get(k)
+            final[k] = v if func is None else func(self, v)
 
         # Check to make sure the metadata is complete and valid
-        self.validate(final)
+        if validate:
+            self.validate(final)
 
         # Save
+        if self.compact:
+            final = type(self).record_type()(final)
+        else:
+            final = MeritMetadata(final)
+        final.valid = validate
         self.metadata = final
 
-    def dumps(self):
+    def dumps(self, mode="pretty", backend=None):
         """
         Dump the internal structure into JSON-formatted string
+
+        :param str mode: Output mode (pretty, compact, bytes)
+        :param str backend: JSON backend. Default is the global backend
         """
-        return json.dumps(self.dump(), indent=4)
+        dumped = self.dump()
+        if instrument.enabled:
+            return instrument.call('encode', self.schema,
+                                   get_json_backend(backend).dumps, dumped, mode)
+        return get_json_backend(backend).dumps(dumped, mode=mode)
 
-    def loads(self, s):
+    def loads(self, s, backend=None):
         """
         Load a serialized string into a object
+
+        :param str backend: JSON backend. Default is the global backend
+        """
+        if instrument.enabled:
+            metadata = instrument.call('decode', self.schema,
+                                       get_json_backend(backend).loads, s)
+        else:
+            metadata = get_json_backend(backend).loads(s)
+        self.load(metadata)
+
+    def dumpb(self):
+        """
+        Dump the internal structure into the compact binary format
+        (see pymerit.binary)
         """
-        self.load(json.loads(s))
+        return binary.encode(self.dump())
+
+    def loadb(self, b):
+        """
+        Load bytes in the compact binary format into a object
+        """
+        self.load(binary.decode(b))
+
+    def dumps_yaml(self):
+        """
+        Dump the internal structure into a YAML-formatted string
+        """
+        return dump_yaml([self])
+
+    def loads_yaml(self, s):
+        """
+        Load a YAML string into a object
+        """
+        import yaml
+        self.load(yaml.load(s, Loader=yaml_loader()))
+
+    async def avalidate(self, executor=None):
+        """
+        Validate without blocking the event loop (see pymerit.aio)
+
+        :param executor: concurrent.futures executor. Default is a
+               shared bounded thread pool
+        """
+        from . import aio
+        await aio.validate(self, executor=executor)
+
+    async def asave(self, path, mode="pretty", backend=None, executor=None):
+        """
+        Validate, encode and write to a file without blocking the
+        event loop (see pymerit.aio)
+
+        :param str path: Output filename
+        :param str mode: Output mode (pretty, compact, bytes)
+        :param str backend: JSON backend. Default is the global backend
+        :param executor: concurrent.futures executor. Default is a
+               shared bounded thread pool
+        """
+        from . import aio
+        await aio.save(self, path, mode=mode, backend=backend, executor=executor)
 
     def prettyprint(self, max_width=80):
         """
@@ -273,21 +894,18 @@ class MeritBase(metaclass=MeritMeta):
             ('schema', self.schema)
         ]
 
-        # Take a union of order and required
-        order = self.order
-        for k in self.required:
-            if k not in order:
-                order.append(k)
-
-        allkeys = sorted(list(self.metadata.keys()))
-        for k in allkeys:
-            if k in self.order or k == 'schema':
+        # Precomputed order followed by the remaining keys, sorted
+        keys, known = self.key_plan()
+        order = list(keys)
+        for k in sorted(self.metadata.keys()):
+            if k in known or k == 'schema':
                 continue
             order.append(k)
+
         # => Now follow the order computed
         for k in order:
             summary = ""
-            if isinstance(self.metadata[k],list):
+            if isinstance(self.metadata[k], (list, MeritLazyList)):
                 for v in self.metadata[k]:
                     if hasattr(v, 'prettyprint'):
                         v = v.prettyprint(max_width=max_width-20)
@@ -302,6 +920,7 @@ class MeritBase(metaclass=MeritMeta):
                     summary = str(v)
             rows.append((k, summary))
 
+        import texttable
         table = texttable.Texttable(max_width=max_width)
         table.add_rows(rows)
         return table.draw()
@@ -316,17 +935,17 @@ class MeritBase(metaclass=MeritMeta):
 
         A class can load one or more schema types.
         """
-        for h in cls._registry:
-            if ((isinstance(h.schema, str)) and
-                (h.schema == schema)):
-                return h
-
-            if isinstance(h.schema, list):
-                for s in h.schema:
-                    if s == schema:
-                        return h
+        if instrument.enabled:
+            with instrument.phase('lookup', schema if isinstance(schema, str) else None):
+                return cls._lookup(schema)
+        return cls._lookup(schema)
 
-        raise MeritNoHandler()
+    @classmethod
+    def _lookup(cls, schema):
+        try:
+            return cls._registry[schema]
+        except (KeyError, TypeError):
+            raise MeritNoHandler()
 
     @classmethod
     def find_handler_for_dict(cls, dct):
@@ -357,6 +976,8 @@ class MeritContextBase(MeritBase):
     """
     schema = "context:base:v1"
 
+    __slots__ = ()
+
     def initialize(self, *args, **kwargs):
         super().initialize(*args, **kwargs)
 
@@ -366,29 +987,183 @@ class MeritResourceBase(MeritBase):
     """
     schema = "resource:base:v1"
 
+    __slots__ = ()
+
     def initialize(self, *args, **kwargs):
         pass
 
+    def local_paths(self):
+        """
+        Local filesystem paths that must exist for this resource to be
+        valid. Used to check many resources in one batch.
+        """
+        return []
+
+class MeritLazyList(collections.abc.MutableSequence):
+    """
+    List of handler objects backed by raw metadata dicts. Handler
+    objects are built and validated only when an element is accessed.
+    Elements that were never accessed are dumped as is.
+    """
+
+    def __init__(self, specs, basecls, message):
+        """
+        :param list specs: Sequence of raw metadata dicts
+        :param class basecls: Required baseclass of the handlers
+        :param str message: Error message when a handler is not a basecls
+        """
+        self.specs = specs
+        self.objects = [None] * len(specs)
+        self.basecls = basecls
+        self.message = message
+
+    def __len__(self):
+        return len(self.objects)
+
+    def materialize(self, i):
+        """
+        Build the handler object for element i
+        """
+        obj = self.objects[i]
+        if obj is not None:
+            return obj
+
+        spec = self.specs[i]
+        cls = MeritBase.find_handler_for_dict(spec)
+        if not issubclass(cls, self.basecls):
+            raise MeritInvalidMetadata(self.message)
+        obj = cls()
+        obj.load(spec)
+        self.objects[i] = obj
+        return obj
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.materialize(j) for j in range(len(self))[i]]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("list index out of range")
+        return self.materialize(i)
+
+    def own(self):
+        """
+        Make the raw specs a list aligned with the objects
+        """
+        if not isinstance(self.specs, list) or len(self.specs) != len(self.objects):
+            specs = list(self.specs)
+            specs.extend([None] * (len(self.objects) - len(specs)))
+            self.specs = specs
+
+    def __setitem__(self, i, value):
+        self.own()
+        if isinstance(i, slice):
+            value = list(value)
+            self.specs[i] = [None] * len(value)
+        self.objects[i] = value
+
+    def __delitem__(self, i):
+        self.own()
+        del self.specs[i]
+        del self.objects[i]
+
+    def insert(self, i, value):
+        if i >= len(self):
+            # Appends leave the raw specs untouched
+            self.objects.append(value)
+            return
+        self.own()
+        self.specs.insert(i, None)
+        self.objects.insert(i, value)
+
+    def loaded(self):
+        """
+        Iterate over the handler objects built so far
+        """
+        return (obj for obj in self.objects if obj is not None)
+
+    def dump(self):
+        """
+        Dump built objects and pass the untouched raw dicts through
+        """
+        specs = self.specs
+        return [specs[i] if obj is None else obj.dump()
+                for i, obj in enumerate(self.objects)]
+
+    def iter_dump(self, start=0, end=None):
+        """
+        Iterate over the dumped elements (see dump())
+
+        :param int start: First element
+        :param int end: Element after the last one. Default is the end.
+        """
+        specs = self.specs
+        objects = self.objects
+        for i in range(start, len(objects) if end is None else end):
+            obj = objects[i]
+            yield specs[i] if obj is None else obj.dump()
+
 class MeritGlobalBase(MeritBase):
     """
     Base abstract class for pymerit schema implementors
     """
     schema = "global:base:v1"
 
-    def __init__(self, *args, **kwargs):
-        self.metadata = {}
-        self.required = [
-            'namespace',
-            'path',
-            'name',
-            'description',
-            'contexts',
-            'resources'
-        ]
-        self.order = []
+    validate_workers = 8
+    """
+    Number of threads used to check resource paths during validation
+    """
 
-        #
-        self.initialize()
+    __slots__ = ()
+
+    lazy = False
+    """
+    Load resources lazily (see MeritLazyList)
+    """
+
+    # Always check the contexts and resources lists. Each element
+    # caches its own validation, so only changed elements are
+    # checked again.
+    cache_validation = False
+
+    context_refs = None
+    """
+    How contexts are dumped: None (inline), "table" (references plus a
+    context_table element in the document) or "pool" (references only,
+    with the contents added to the context pool). Loading a document
+    with references sets it accordingly.
+    """
+
+    context_pool = None
+    """
+    MeritContextPool used to resolve and store context references.
+    Default is pymerit.pool.get_context_pool()
+    """
+
+    context_table = None
+    """
+    MeritContextPool with the context_table element of a loaded document
+    """
+
+    required = (
+        'namespace',
+        'path',
+        'name',
+        'description',
+        'contexts',
+        'resources'
+    )
+
+    fields = {
+        'namespace': Field(str),
+        'path': Field(str),
+        'contexts': Field((list, MeritLazyList)),
+        'resources': Field((list, MeritLazyList)),
+    }
+
+    def __init__(self, *args, lazy=False, **kwargs):
+        self.lazy = lazy
+        super().__init__(*args, **kwargs)
 
     # New attributes
     namespace = get_metadata_attribute('namespace')
@@ -400,60 +1175,198 @@ class MeritGlobalBase(MeritBase):
             'resources': []
         }
 
+    def invalidate(self):
+        """
+        Forget the last successful validation of the document and of
+        all of its (loaded) contexts and resources
+        """
+        super().invalidate()
+        for field in ['contexts', 'resources']:
+            elements = self.metadata.get(field, [])
+            if isinstance(elements, MeritLazyList):
+                elements = elements.loaded()
+            for e in elements:
+                e.invalidate()
+
+    def check_elements(self, elements, basecls, error, label):
+        """
+        Check the types of elements in one pass and register each
+        distinct handler class once
+        """
+        classes = set()
+        for e in elements:
+            if e is None:
+                raise error("Null {}".format(label))
+            classes.add(e.__class__)
+
+        for c in classes:
+            if not issubclass(c, basecls):
+                raise error("Not a subclass")
+
+        # => Register if it doesnt already exist
+        for c in classes:
+            MeritBase.schema_ensure(c)
+
     def add_context(self, c):
         """
         Add a context (e.g., host info) to metadata
         """
-        if c is None:
-            raise MeritInvalidContext("Null context")
-
-        if not issubclass(c.__class__, MeritContextBase):
-            raise MeritInvalidContext("Not a subclass")
+        self.check_elements([c], MeritContextBase, MeritInvalidContext, "context")
 
         # Validate the context
         c.validate()
 
-        # => Register if it doesnt already exist
-        try:
-            MeritBase.schema_register(c.__class__)
-        except:
-            pass
+        self.metadata['contexts'].append(c)
 
+    def add_contexts(self, contexts):
+        """
+        Add many contexts. Validation is deferred to dump() or validate().
 
-        self.metadata['contexts'].append(c)
+        :param list contexts: Iterable of context objects
+        """
+        contexts = list(contexts)
+        self.check_elements(contexts, MeritContextBase, MeritInvalidContext, "context")
+        self.metadata['contexts'].extend(contexts)
 
     def add_resource(self, r):
         """
         Add a resource (e.g., file) to metadata
         """
-        if r is None:
-            raise MeritInvalidResource("Null resource")
-
-        if not issubclass(r.__class__, MeritResourceBase):
-            raise MeritInvalidResource("Not a subclass")
+        self.check_elements([r], MeritResourceBase, MeritInvalidResource, "resource")
 
         # Validate the resource
         r.validate()
 
-        # => Register if it doesnt already exist
-        try:
-            MeritBase.schema_register(r.__class__)
-        except:
-            pass
-
         self.metadata['resources'].append(r)
 
+    def add_resources(self, resources):
+        """
+        Add many resources. Validation is deferred to dump() or
+        validate(), where the paths of all resources are checked in
+        one batch.
+
+        :param list resources: Iterable of resource objects
+        """
+        resources = list(resources)
+        self.check_elements(resources, MeritResourceBase, MeritInvalidResource, "resource")
+        self.metadata['resources'].extend(resources)
+
+    def _load(self, metadata, validate=True):
+        # The context table is kept aside to resolve the references
+        if isinstance(metadata, dict) and 'context_table' in metadata:
+            self.context_table = pool.MeritContextPool(metadata['context_table'])
+            metadata = {k: v for k, v in metadata.items() if k != 'context_table'}
+        else:
+            self.context_table = None
+        super()._load(metadata, validate)
+
+    def get_context_pool(self):
+        """
+        Pool used to resolve and store context references
+        """
+        return self.context_pool or pool.get_context_pool()
+
+    def resolve_context(self, spec):
+        """
+        Return the content of a context reference, from the document's
+        context table or from the context pool
+        """
+        ref = spec['ref']
+        content = None
+        if self.context_table is not None:
+            content = self.context_table.get(ref, None)
+        if content is None:
+            shared = self.get_context_pool()
+            if shared is None:
+                raise MeritInvalidMetadata("Unknown context reference: {}".format(ref))
+            content = shared.get(ref)
+        if content.get('schema') != spec.get('schema'):
+            raise MeritInvalidMetadata("Context reference schema mismatch: {}".format(ref))
+        return content
+
+    def encode_contexts(self, contexts, target):
+        """
+        Return references to the contexts and add their contents to a
+        pool. References that were never resolved are passed through.
+
+        :param list contexts: Context objects or MeritLazyList
+        :param MeritContextPool target: Pool receiving the contents
+        """
+        specs = contexts.specs if isinstance(contexts, MeritLazyList) else None
+        refs = []
+        for i in range(len(contexts)):
+            if specs is not None and contexts.objects[i] is None:
+                spec = specs.entries[i] if isinstance(specs, pool.MeritContextRefs) else specs[i]
+                if pool.is_context_ref(spec):
+                    if target.get(spec['ref'], None) is None:
+                        target.put(spec['ref'], self.resolve_context(spec))
+                    refs.append(spec)
+                    continue
+                content = spec
+            else:
+                content = contexts[i].dump()
+            refs.append(pool.make_context_ref(content, target.add(content)))
+        return refs
+
+    def context_target(self):
+        """
+        Pool receiving the contents of dumped context references
+        """
+        if self.context_refs == "table":
+            return pool.MeritContextPool()
+        if self.context_refs == "pool":
+            shared = self.get_context_pool()
+            if shared is None:
+                raise MeritInvalidMetadata("No context pool to store context references")
+            return shared
+        raise MeritInvalidMetadata("Unknown context encoding: {}".format(self.context_refs))
+
+    def dumped_context_table(self):
+        """
+        Context table filled when the contexts were dumped (see
+        stream_contexts), encoding them again only if they were not
+        """
+        table = self.__dict__.pop('_context_table_dump', None)
+        if table is None:
+            table = self.context_target()
+            self.encode_contexts(self.metadata['contexts'], table)
+        return table
+
+    def _dump(self):
+        d = super()._dump()
+        if self.context_refs == "table":
+            d['context_table'] = self.dumped_context_table().contents
+        return d
+
+    def iter_dump(self):
+        yield from super().iter_dump()
+        if self.context_refs == "table":
+            yield 'context_table', self.dumped_context_table().contents
+
     def load_contexts(self, contexts):
         """
-        Validate and load contexts
+        Validate and load contexts. Contexts written by reference are
+        resolved when they are accessed.
         """
+        if any(pool.is_context_ref(spec) for spec in contexts):
+            # Only the form of the references is checked here; they are
+            # resolved by MeritContextRefs when accessed
+            for spec in contexts:
+                if pool.is_context_ref(spec):
+                    pool.check_context_ref(spec)
+            if self.context_refs is None:
+                self.context_refs = "pool" if self.context_table is None else "table"
+            return MeritLazyList(pool.MeritContextRefs(contexts, self.resolve_context),
+                                 MeritContextBase,
+                                 "Non-context specified in context field")
+
         final = []
         for spec in contexts:
             cls = MeritBase.find_handler_for_dict(spec)
             if not issubclass(cls, MeritContextBase):
                 raise MeritInvalidMetadata("Non-context specified in context field")
             c = cls()
-            c.load(spec)
+            c.load(spec, validate=False)
             final.append(c)
         return final
 
@@ -461,25 +1374,148 @@ class MeritGlobalBase(MeritBase):
         """
         Validate and load resourcess
         """
+        if self.lazy:
+            return MeritLazyList(resources, MeritResourceBase,
+                                 "Non-resource specified in resource field")
+
         final = []
         for spec in resources:
             cls = MeritBase.find_handler_for_dict(spec)
             if not issubclass(cls, MeritResourceBase):
                 raise MeritInvalidMetadata("Non-resource specified in resource field")
             c = cls()
-            c.load(spec)
+            c.load(spec, validate=False)
             final.append(c)
         return final
 
+    def validate_contexts(self, contexts):
+        """
+        Validate contexts
+        """
+        if isinstance(contexts, MeritLazyList):
+            contexts = list(contexts.loaded())
+        for c in contexts:
+            c.validate()
+
+    def validate_resources(self, resources):
+        """
+        Validate resources. The local paths of all resources are
+        checked in one batch and all missing paths are reported in a
+        single MeritMissingPaths exception.
+        """
+        if isinstance(resources, MeritLazyList):
+            resources = list(resources.loaded())
+
+        # Resources unchanged since their last validation are skipped
+        paths = []
+        for r in resources:
+            if r.is_dirty():
+                paths.extend(r.local_paths())
+
+        stats = {}
+        if len(paths) > 0:
+            if instrument.enabled:
+                with instrument.phase('stat', self.schema):
+                    stats = stat_paths(paths, max_workers=self.validate_workers)
+            else:
+                stats = stat_paths(paths, max_workers=self.validate_workers)
+            missing = [p for p in paths if stats[p] is None]
+            if len(missing) > 0:
+                raise MeritMissingPaths(missing)
+
+        # The paths were just checked; validate_path uses these results
+        # instead of a second stat
+        with verified_paths(stats):
+            for r in resources:
+                r.validate()
+
+    def add_digests(self, algorithms=digest.default_algorithms, max_workers=4, cache=None):
+        """
+        Record content digests for all file resources, hashing files in parallel
+
+        :param list algorithms: hashlib algorithm names (e.g., sha256, blake2b)
+        :param int max_workers: Number of files hashed concurrently
+        :param MeritDigestCache cache: Optional digest cache
+        """
+        digest.add_digests(self.metadata['resources'], algorithms,
+                           max_workers=max_workers, cache=cache)
+
+    def verify_digests(self, max_workers=4, cache=None):
+        """
+        Re-check recorded digests of all resources
+
+        :rtype: list
+        :return: List of (path, reason) for resources that do not match
+        """
+        resources = self.metadata['resources']
+        if isinstance(resources, MeritLazyList):
+            resources = resources.dump()
+        return digest.verify_digests(resources, max_workers=max_workers, cache=cache)
+
     def dump_contexts(self, contexts):
         """
         Dump contexts
         """
-        return [c.dump() for c in contexts]
+        return list(self.stream_contexts(contexts))
 
     def dump_resources(self, resources):
         """
         Dump resources
         """
+        if isinstance(resources, MeritLazyList):
+            return resources.dump()
         return [r.dump() for r in resources]
 
+    def save_shards(self, directory, size=None, max_workers=4, backend=None):
+        """
+        Write the document as a manifest and shard files of at most
+        size resources each (see pymerit.shards)
+
+        :param str directory: Output directory
+        :param int size: Resources per shard
+        :param int max_workers: Number of shards written concurrently
+        :param str backend: JSON backend. Default is the global backend
+        :rtype: str
+        :return: Manifest filename
+        """
+        from . import shards
+        return shards.save(self, directory, size=size,
+                           max_workers=max_workers, backend=backend)
+
+    def columns(self, attributes=None, use_numpy=True):
+        """
+        Columnar view of the resources (see pymerit.columnar). Resources
+        that were not accessed are read from their raw dicts.
+
+        :param list attributes: Attribute keys to include. Default is
+               every key with scalar values.
+        :param bool use_numpy: Use NumPy arrays if it is installed
+        :rtype: MeritColumns
+        """
+        from .columnar import MeritColumns
+        return MeritColumns.from_document(self, attributes=attributes,
+                                          use_numpy=use_numpy)
+
+    def stream_contexts(self, contexts):
+        """
+        Dump contexts one at a time (used by dump_stream)
+        """
+        if self.context_refs is not None:
+            target = self.context_target()
+            refs = self.encode_contexts(contexts, target)
+            if self.context_refs == "table":
+                # Reused for the context_table element of this dump
+                self._context_table_dump = target
+            return iter(refs)
+        if isinstance(contexts, MeritLazyList):
+            return contexts.iter_dump()
+        return (c.dump() for c in contexts)
+
+    def stream_resources(self, resources):
+        """
+        Dump resources one at a time (used by dump_stream)
+        """
+        if isinstance(resources, MeritLazyList):
+            return resources.iter_dump()
+        return (r.dump() for r in resources)
+
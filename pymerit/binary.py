@@ -0,0 +1,179 @@
+"""
+Binary
+------
+
+Compact binary encoding of dumped metadata. The format is
+msgpack-style (one tag byte per value, varint lengths) and is
+implemented with the standard library only. Every string, including
+dict keys, is stored once in a per-document table and referenced by
+index, so repeated schemas, context values and attribute keys cost a
+byte or two per occurrence.
+
+Layout::
+
+    magic | varint(#strings) | (varint(len) utf-8)* | value
+
+"""
+import struct
+from .exceptions import *
+
+magic = b"\x93MRT\x01"
+"""
+Header of binary merit documents (format version 1)
+"""
+
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_NEGINT = 4
+TAG_FLOAT = 5
+TAG_STR = 6
+TAG_LIST = 7
+TAG_DICT = 8
+
+_double = struct.Struct(">d")
+
+def is_binary(data):
+    """
+    Check whether bytes hold a binary merit document
+    """
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:len(magic)]) == magic
+
+def encode(obj):
+    """
+    Encode a JSON-compatible value (e.g., the output of dump())
+
+    :rtype: bytes
+    """
+    strings = {}
+    body = bytearray()
+    append = body.append
+
+    def varint(n):
+        while n >= 0x80:
+            append((n & 0x7f) | 0x80)
+            n >>= 7
+        append(n)
+
+    def string(s):
+        idx = strings.get(s)
+        if idx is None:
+            idx = strings[s] = len(strings)
+        varint(idx)
+
+    def value(v):
+        if isinstance(v, str):
+            append(TAG_STR)
+            string(v)
+        elif isinstance(v, dict):
+            append(TAG_DICT)
+            varint(len(v))
+            for k, item in v.items():
+                if not isinstance(k, str):
+                    raise MeritInvalidMetadata("Non-string key: {!r}".format(k))
+                string(k)
+                value(item)
+        elif isinstance(v, (list, tuple)):
+            append(TAG_LIST)
+            varint(len(v))
+            for item in v:
+                value(item)
+        elif v is None:
+            append(TAG_NONE)
+        elif v is True:
+            append(TAG_TRUE)
+        elif v is False:
+            append(TAG_FALSE)
+        elif isinstance(v, int):
+            if v >= 0:
+                append(TAG_INT)
+                varint(v)
+            else:
+                append(TAG_NEGINT)
+                varint(-v)
+        elif isinstance(v, float):
+            append(TAG_FLOAT)
+            body.extend(_double.pack(v))
+        else:
+            raise MeritInvalidMetadata("Cannot encode {}".format(type(v).__name__))
+
+    value(obj)
+
+    header = bytearray(magic)
+    append = header.append
+    varint(len(strings))
+    for s in strings:
+        b = s.encode('utf-8')
+        varint(len(b))
+        header.extend(b)
+
+    return bytes(header + body)
+
+def decode(data):
+    """
+    Decode a binary merit document
+
+    :rtype: dict
+    """
+    if not is_binary(data):
+        raise MeritInvalidMetadata("Not a binary merit document")
+
+    data = bytes(data)
+    pos = len(magic)
+
+    def varint():
+        nonlocal pos
+        n = 0
+        shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    try:
+        table = []
+        for i in range(varint()):
+            length = varint()
+            table.append(data[pos:pos + length].decode('utf-8'))
+            pos += length
+
+        def value():
+            nonlocal pos
+            tag = data[pos]
+            pos += 1
+            if tag == TAG_STR:
+                return table[varint()]
+            elif tag == TAG_DICT:
+                # Keys are read before their values. A dict comprehension
+                # evaluates the value first before Python 3.8.
+                d = {}
+                for i in range(varint()):
+                    k = table[varint()]
+                    d[k] = value()
+                return d
+            elif tag == TAG_LIST:
+                return [value() for i in range(varint())]
+            elif tag == TAG_INT:
+                return varint()
+            elif tag == TAG_NEGINT:
+                return -varint()
+            elif tag == TAG_FLOAT:
+                pos += 8
+                return _double.unpack_from(data, pos - 8)[0]
+            elif tag == TAG_NONE:
+                return None
+            elif tag == TAG_TRUE:
+                return True
+            elif tag == TAG_FALSE:
+                return False
+            raise MeritInvalidMetadata("Invalid tag {} at offset {}".format(tag, pos - 1))
+
+        result = value()
+    except (IndexError, UnicodeDecodeError, struct.error):
+        raise MeritInvalidMetadata("Truncated or corrupt binary merit document")
+
+    return result
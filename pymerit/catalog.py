@@ -0,0 +1,377 @@
+"""
+Catalog
+-------
+
+Local SQLite index over many merit documents. The namespace, path,
+name, schema, context fields and resource paths of each document are
+indexed so that questions such as "which run produced
+/data/x.parquet" are answered without parsing every document.
+
+Builds are incremental: a document is re-indexed only when its size
+or mtime changes, and documents under the scanned paths that no longer
+exist are dropped. A document that cannot be read or indexed is
+counted as failed without affecting the others, and its previous
+entry is dropped.
+
+Sharded documents (see pymerit.shards) are indexed through their
+manifest, with the resources of all shards; shard files themselves
+are not documents.
+
+The catalog also stores a context pool (see pymerit.pool). Contexts of
+the documents' context tables are added to it, and context references
+are resolved through it when documents are indexed.
+"""
+import os
+import json
+import fnmatch
+import sqlite3
+import threading
+from .exceptions import *
+from .backends import get_json_backend
+from .pool import MeritContextPool, is_context_ref
+from . import shards
+
+catalog_tables = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    file TEXT UNIQUE,
+    mtime_ns INTEGER,
+    size INTEGER,
+    schema TEXT,
+    namespace TEXT,
+    path TEXT,
+    name TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS contexts (
+    doc_id INTEGER,
+    position INTEGER,
+    schema TEXT,
+    field TEXT,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS resources (
+    doc_id INTEGER,
+    position INTEGER,
+    schema TEXT,
+    name TEXT,
+    path TEXT
+);
+CREATE TABLE IF NOT EXISTS context_pool (
+    ref TEXT PRIMARY KEY,
+    schema TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_nspath ON documents (namespace, path);
+CREATE INDEX IF NOT EXISTS documents_schema ON documents (schema);
+CREATE INDEX IF NOT EXISTS contexts_field ON contexts (field, value);
+CREATE INDEX IF NOT EXISTS contexts_doc ON contexts (doc_id);
+CREATE INDEX IF NOT EXISTS resources_path ON resources (path);
+CREATE INDEX IF NOT EXISTS resources_doc ON resources (doc_id);
+"""
+
+def find_documents(paths, pattern="*.json"):
+    """
+    Expand files and directories into a list of document files
+
+    :param list paths: Files or directories (searched recursively)
+    :param str pattern: Glob for document files inside directories
+    """
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                for f in sorted(files):
+                    if fnmatch.fnmatch(f, pattern):
+                        yield os.path.join(root, f)
+        else:
+            yield p
+
+class MeritCatalogContextPool(MeritContextPool):
+    """
+    Context pool persisted in the catalog database
+    """
+
+    def __init__(self, catalog):
+        super().__init__()
+        self.catalog = catalog
+
+    def fetch(self, ref):
+        with self.catalog.lock:
+            row = self.catalog.conn.execute(
+                "SELECT content FROM context_pool WHERE ref=?", (ref,)).fetchone()
+        if row is None:
+            return None
+        return self.catalog.backend.loads(row[0])
+
+    def store(self, ref, content):
+        conn = self.catalog.conn
+        row = (ref, str(content.get('schema')), json.dumps(content, ensure_ascii=False))
+        with self.catalog.lock:
+            if conn.in_transaction:
+                # Part of a build, committed with it
+                conn.execute("INSERT OR IGNORE INTO context_pool VALUES (?, ?, ?)", row)
+                return
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO context_pool VALUES (?, ?, ?)", row)
+
+class MeritCatalog(object):
+    """
+    SQLite catalog of merit documents. The connection is shared by all
+    threads (e.g., the aio executor resolving context references) and
+    guarded by a lock.
+    """
+
+    def __init__(self, filename, backend=None):
+        """
+        :param str filename: SQLite database file
+        :param str backend: JSON backend used to parse documents
+        """
+        self.filename = filename
+        self.backend = get_json_backend(backend)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.executescript(catalog_tables)
+        self.pool = None
+
+    def context_pool(self):
+        """
+        Context pool stored in the catalog, e.g., for
+        pymerit.pool.set_context_pool or a document's context_pool
+        """
+        if self.pool is None:
+            self.pool = MeritCatalogContextPool(self)
+        return self.pool
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def build(self, paths, pattern="*.json"):
+        """
+        Index documents. Unchanged documents are skipped.
+
+        :param list paths: Files or directories with merit documents
+        :param str pattern: Glob for document files inside directories
+        :rtype: dict
+        :return: Counts of indexed, skipped, failed and removed documents
+        """
+        summary = {'indexed': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+        with self.lock, self.conn:
+            for filename in find_documents(paths, pattern):
+                filename = os.path.abspath(filename)
+                if shards.is_shard_file(filename):
+                    continue
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    summary['failed'] += 1
+                    continue
+
+                row = self.conn.execute(
+                    "SELECT id, mtime_ns, size FROM documents WHERE file=?",
+                    (filename,)).fetchone()
+                if row is not None and row[1:] == (st.st_mtime_ns, st.st_size):
+                    summary['skipped'] += 1
+                    continue
+
+                try:
+                    with open(filename, 'rb') as fd:
+                        metadata = self.backend.load(fd)
+                    if not isinstance(metadata, dict) or 'schema' not in metadata:
+                        raise MeritMissingSchema()
+                    shard = shards.is_shard(metadata)
+                    if not shard:
+                        if shards.is_manifest(metadata):
+                            metadata = shards.expand_manifest(
+                                metadata, os.path.dirname(filename),
+                                pool="thread", backend=self.backend)
+                        rows = self.prepare(metadata)
+                except (ValueError, TypeError, OSError, MeritMissingSchema,
+                        MeritInvalidMetadata):
+                    # The previous content of the file is no longer valid
+                    if row is not None:
+                        self.remove(row[0])
+                    summary['failed'] += 1
+                    continue
+
+                if row is not None:
+                    self.remove(row[0])
+                if shard:
+                    # Shards are indexed through their manifest
+                    if row is not None:
+                        summary['removed'] += 1
+                    continue
+                self.insert(filename, st, metadata, rows)
+                summary['indexed'] += 1
+
+            summary['removed'] += self.prune(paths)
+
+        return summary
+
+    def prune(self, paths):
+        """
+        Drop indexed documents under paths (files or directories) that
+        no longer exist
+
+        :rtype: int
+        :return: Number of documents dropped
+        """
+        roots = [os.path.abspath(p) for p in paths]
+        prefixes = tuple(os.path.join(r, '') for r in roots)
+
+        removed = 0
+        for doc_id, filename in self.conn.execute(
+                "SELECT id, file FROM documents").fetchall():
+            if filename not in roots and not filename.startswith(prefixes):
+                continue
+            if not os.path.exists(filename):
+                self.remove(doc_id)
+                removed += 1
+        return removed
+
+    def remove(self, doc_id):
+        """
+        Drop a document from the index
+        """
+        for table in ['contexts', 'resources']:
+            self.conn.execute("DELETE FROM {} WHERE doc_id=?".format(table), (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id=?", (doc_id,))
+
+    def prepare(self, metadata):
+        """
+        Check and convert the indexed values of a document before
+        anything is written
+
+        :rtype: tuple
+        :return: (document values, context rows, resource rows); rows
+                 are without the document id
+        :raises MeritInvalidMetadata: A value cannot be indexed
+        """
+        def column(value, label):
+            if value is None or isinstance(value, (str, int, float)):
+                return value
+            raise MeritInvalidMetadata("Invalid {}: not a scalar".format(label))
+
+        document = (str(metadata['schema']),) + tuple(
+            column(metadata.get(k), k) for k in ['namespace', 'path', 'name', 'description'])
+
+        # Contexts of the document's table are shared through the pool
+        shared = self.context_pool()
+        table = metadata.get('context_table')
+        table = table if isinstance(table, dict) else {}
+
+        for k in ['contexts', 'resources']:
+            if not isinstance(metadata.get(k, []), list):
+                raise MeritInvalidMetadata("Invalid {}: not a list".format(k))
+
+        contexts = []
+        for i, c in enumerate(metadata.get('contexts', [])):
+            if is_context_ref(c):
+                c = table.get(c['ref']) or shared.get(c['ref'], c)
+            if not isinstance(c, dict):
+                continue
+            for k, v in c.items():
+                if k == 'schema':
+                    continue
+                if not isinstance(v, str):
+                    v = json.dumps(v)
+                contexts.append((i, column(c.get('schema'), 'context schema'), str(k), v))
+
+        resources = []
+        for i, r in enumerate(metadata.get('resources', [])):
+            if not isinstance(r, dict):
+                continue
+            path = r.get('path', r.get('s3path'))
+            resources.append((i, column(r.get('schema'), 'resource schema'),
+                              column(r.get('name'), 'resource name'),
+                              column(path, 'resource path')))
+
+        return document, contexts, resources
+
+    def insert(self, filename, st, metadata, rows=None):
+        """
+        Index one document
+
+        :param tuple rows: Result of prepare(metadata), if already computed
+        """
+        document, contexts, resources = rows or self.prepare(metadata)
+        cursor = self.conn.execute(
+            "INSERT INTO documents (file, mtime_ns, size, schema, namespace, "
+            "path, name, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (filename, st.st_mtime_ns, st.st_size) + document)
+        doc_id = cursor.lastrowid
+
+        shared = self.context_pool()
+        table = metadata.get('context_table')
+        table = table if isinstance(table, dict) else {}
+        for ref, content in table.items():
+            if isinstance(content, dict):
+                shared.put(ref, content)
+
+        self.conn.executemany("INSERT INTO contexts VALUES (?, ?, ?, ?, ?)",
+                              [(doc_id,) + r for r in contexts])
+        self.conn.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?)",
+                              [(doc_id,) + r for r in resources])
+
+    def query(self, resource=None, namespace=None, path=None, name=None,
+              schema=None, context=None):
+        """
+        Find documents. All conditions must match.
+
+        :param str resource: Path of a resource in the document
+        :param str namespace: Document namespace
+        :param str path: Document path
+        :param str name: Document name
+        :param str schema: Document schema
+        :param dict context: Context field values, e.g., {'node': 'whale'}
+        :rtype: list
+        :return: List of (file, schema, namespace, path, name)
+        """
+        sql = ("SELECT DISTINCT d.file, d.schema, d.namespace, d.path, d.name "
+               "FROM documents d")
+        joins = []
+        conditions = []
+        params = []
+
+        if resource is not None:
+            joins.append("JOIN resources r ON r.doc_id = d.id")
+            conditions.append("r.path = ?")
+            params.append(resource)
+
+        for i, (k, v) in enumerate(sorted((context or {}).items())):
+            alias = "c{}".format(i)
+            joins.append("JOIN contexts {0} ON {0}.doc_id = d.id".format(alias))
+            conditions.append("{0}.field = ? AND {0}.value = ?".format(alias))
+            params.extend([k, v if isinstance(v, str) else json.dumps(v)])
+
+        for column, value in [('namespace', namespace), ('path', path),
+                              ('name', name), ('schema', schema)]:
+            if value is not None:
+                conditions.append("d.{} = ?".format(column))
+                params.append(value)
+
+        if len(joins) > 0:
+            sql += " " + " ".join(joins)
+        if len(conditions) > 0:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY d.file"
+
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def resources(self, filename):
+        """
+        List (schema, name, path) of the resources of an indexed document
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT r.schema, r.name, r.path FROM resources r "
+                "JOIN documents d ON r.doc_id = d.id WHERE d.file = ? "
+                "ORDER BY r.position", (os.path.abspath(filename),)).fetchall()
@@ -5,12 +5,12 @@ Merit Command Line
 """
 import os
 import sys
-from texttable import Texttable
 import click
 
 from .base import * 
 from .contrib import * 
 from .utils import *
+from . import digest
 
 @click.group()
 def main():
@@ -32,8 +32,12 @@ def _schema_list():
     List available schemas 
     """
 
-    merit = MeritDefault() 
-    summary = merit.schema_list()
+    summary = MeritBase.schema_list()
+
+    # Rows carry the class id after the schema; show schema, class, module
+    summary = summary[:1] + [(s, c, m) for s, _, c, m in summary[1:]]
+
+    from texttable import Texttable
     table = Texttable()
     # table.set_deco(Texttable.HEADER)
     table.add_rows(summary)
@@ -47,8 +51,7 @@ def _schema_show(schema):
     Show details of a schema
     """
 
-    merit = MeritDefault() 
-    cls = merit.schema_get(schema)
+    cls = MeritBase.schema_get(schema)
     help(cls)
 
 @main.group("metadata")
@@ -60,11 +63,120 @@ def metadata():
 
 @metadata.command("show")
 @click.argument("filename")
-def _metadata_show(filename):
+@click.option("--mode", default="json", type=click.Choice(["json", "yaml"]))
+def _metadata_show(filename, mode):
     """
     Show metadata content
     """
 
-    merit = news(open(filename).read())
+    with open(filename) as fd:
+        merit = new(fd, mode=mode)
     print(merit.prettyprint())
 
+
+@metadata.command("stream")
+@click.argument("filename")
+@click.option("--skip-errors", is_flag=True, default=False,
+              help="Skip documents that cannot be loaded")
+@click.option("--mode", default="jsonl", type=click.Choice(["jsonl", "yaml"]))
+def _metadata_stream(filename, skip_errors, mode):
+    """
+    Summarize a JSON Lines or multi-document YAML file
+    """
+
+    for merit in iter_new(filename, mode=mode, skip_errors=skip_errors):
+        row = [merit.schema] + [merit.metadata.get(k, "")
+                                for k in ['namespace', 'path', 'name']]
+        print("\t".join([str(v) for v in row]))
+
+@metadata.command("verify")
+@click.argument("filename")
+@click.option("--workers", default=4, help="Number of files hashed concurrently")
+@click.option("--cache", default=None, help="Digest cache database")
+def _metadata_verify(filename, workers, cache):
+    """
+    Re-check the recorded digests of file resources
+    """
+
+    with open(filename) as fd:
+        merit = get_json_backend().load(fd)
+
+    if cache is not None:
+        cache = MeritDigestCache(cache)
+
+    resources = merit.get('resources', [])
+    failures = digest.verify_digests(resources, max_workers=workers, cache=cache)
+    for path, reason in failures:
+        print("FAILED\t{}\t{}".format(reason, path))
+
+    print("{} resources, {} failed".format(len(resources), len(failures)))
+    if len(failures) > 0:
+        sys.exit(1)
+
+@main.group("catalog")
+def catalog():
+    """
+    Index and search many metadata files
+    """
+    pass
+
+@catalog.command("build")
+@click.argument("database")
+@click.argument("paths", nargs=-1, required=True)
+@click.option("--pattern", default="*.json", help="Metadata file glob")
+def _catalog_build(database, paths, pattern):
+    """
+    Index metadata files and directories
+    """
+    from .catalog import MeritCatalog
+
+    with MeritCatalog(database) as c:
+        summary = c.build(paths, pattern=pattern)
+
+    print("indexed {indexed}, skipped {skipped}, failed {failed}, "
+          "removed {removed}".format(**summary))
+
+@catalog.command("query")
+@click.argument("database")
+@click.option("--resource", default=None, help="Resource path")
+@click.option("--namespace", default=None)
+@click.option("--path", default=None)
+@click.option("--name", default=None)
+@click.option("--schema", default=None)
+@click.option("--context", multiple=True, help="Context field=value")
+def _catalog_query(database, resource, namespace, path, name, schema, context):
+    """
+    Find indexed metadata files
+    """
+    from .catalog import MeritCatalog
+
+    fields = dict([c.split("=", 1) for c in context])
+    with MeritCatalog(database) as c:
+        rows = c.query(resource=resource, namespace=namespace, path=path,
+                       name=name, schema=schema, context=fields)
+
+    for row in rows:
+        print("\t".join([str(v) for v in row]))
+
+@metadata.command("scan")
+@click.argument("root")
+@click.option("--namespace", required=True)
+@click.option("--path", required=True)
+@click.option("--name", required=True)
+@click.option("--description", required=True)
+@click.option("--include", multiple=True, help="Glob of files to include")
+@click.option("--exclude", multiple=True, help="Glob of files to exclude")
+@click.option("--workers", default=8, help="Number of concurrent stat calls")
+def _metadata_scan(root, namespace, path, name, description, include, exclude, workers):
+    """
+    Generate metadata for all files in a directory
+    """
+
+    merit = MeritDefault()
+    merit.namespace = namespace
+    merit.path = path
+    merit.name = name
+    merit.description = description
+    merit.add_directory(root, include=list(include) or None,
+                        exclude=list(exclude) or None, max_workers=workers)
+    print(merit.dumps())
@@ -0,0 +1,419 @@
+"""
+Columnar
+--------
+
+Column-oriented view of the resources of a global document. Each
+resource field (path, schema, name) and each scalar attribute becomes
+one column, so that aggregates over many resources run over arrays
+instead of handler objects::
+
+    columns = obj.columns()
+    columns.sum('size')
+    columns.group_by_extension('size')
+    columns.top_k('size', 10)
+
+Columns are built from the raw resource dicts of lazily loaded
+documents (including MeritReader and shards) and from the metadata of
+handler objects that already exist; no handler object is created.
+
+Numeric columns are NumPy arrays when NumPy is installed and
+array.array otherwise. Other columns are object arrays or lists.
+Missing numeric values are NaN (integer columns with missing values
+become float columns) and other missing values are None.
+"""
+import math
+import heapq
+import array
+import collections
+
+fields = ('path', 'schema', 'name')
+"""
+Resource fields stored as columns. The path of S3 resources is their
+s3path.
+"""
+
+def get_numpy():
+    """
+    NumPy module, or None if it is not installed. Imported on first use.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def resource_specs(resources):
+    """
+    Iterate over the raw dicts of resources: the specs of elements of
+    a MeritLazyList that were never accessed, and the metadata of
+    handler objects otherwise
+
+    :rtype: iterator
+    :return: (schema, metadata) pairs
+    """
+    from .base import MeritBase, MeritLazyList
+
+    if isinstance(resources, MeritLazyList):
+        specs = resources.specs
+        for i, obj in enumerate(resources.objects):
+            if obj is None:
+                spec = specs[i]
+                yield spec.get('schema'), spec
+            else:
+                yield obj.metadata.get('schema', obj.schema), obj.metadata
+        return
+
+    for r in resources:
+        if isinstance(r, MeritBase):
+            yield r.metadata.get('schema', r.schema), r.metadata
+        else:
+            yield r.get('schema'), r
+
+def column_type(values):
+    """
+    Type of a column from its non-missing values: int, float, bool,
+    str or object
+    """
+    types = set(type(v) for v in values)
+    if types == {bool}:
+        return 'bool'
+    if types == {int}:
+        return 'int'
+    if len(types) > 0 and types <= {int, float}:
+        return 'float'
+    if types == {str}:
+        return 'str'
+    return 'object'
+
+def column_name(key):
+    """
+    Column of an attribute key. Keys that clash with a resource field
+    are prefixed with 'attributes.'
+    """
+    return 'attributes.' + key if key in fields else key
+
+scalar_types = frozenset([str, int, float, bool, type(None)])
+
+def is_scalar(value):
+    return value is None or isinstance(value, (str, int, float))
+
+def path_extension(path):
+    """
+    Lowercase extension of a path or S3 URL, as os.path.splitext
+    """
+    if not isinstance(path, str):
+        return ''
+    base = path[path.rfind('/') + 1:].lstrip('.')
+    i = base.rfind('.')
+    return base[i:].lower() if i >= 0 else ''
+
+class MeritColumns(object):
+    """
+    Columns of the resources of a global document
+    """
+
+    def __init__(self, columns, length, numpy=None):
+        """
+        :param dict columns: Column name to column
+        :param int length: Number of resources
+        :param numpy: NumPy module used for the columns, or None
+        """
+        self.columns = columns
+        self.length = length
+        self.np = numpy
+        self.extensions = None
+
+    @classmethod
+    def from_resources(cls, resources, attributes=None, use_numpy=True):
+        """
+        Build the columns from resources
+
+        :param resources: MeritLazyList, list of handler objects or
+               list of raw resource dicts
+        :param list attributes: Attribute keys to include. Default is
+               every key with scalar values.
+        :param bool use_numpy: Use NumPy arrays if it is installed
+        """
+        np = get_numpy() if use_numpy else None
+
+        base = {f: [] for f in fields}
+        paths, schemas, names = base['path'], base['schema'], base['name']
+        selected = None if attributes is None else set(attributes)
+
+        # Attribute values are collected as (rows, values) lists and
+        # placed in full-length columns at the end
+        collected = collections.OrderedDict()
+        skipped = set()
+
+        n = 0
+        for schema, spec in resource_specs(resources):
+            get = spec.get
+            path = get('path')
+            paths.append(get('s3path') if path is None else path)
+            schemas.append(schema)
+            names.append(get('name'))
+
+            attrs = get('attributes')
+            if attrs:
+                for k, v in attrs.items():
+                    entry = collected.get(k)
+                    if entry is None:
+                        if k in skipped or (selected is not None and k not in selected):
+                            continue
+                        entry = collected[k] = ([], [])
+                    if type(v) not in scalar_types and not is_scalar(v):
+                        # Keys with nested values are not columns
+                        skipped.add(k)
+                        del collected[k]
+                        continue
+                    if v is not None:
+                        entry[0].append(n)
+                        entry[1].append(v)
+            n += 1
+
+        columns = collections.OrderedDict()
+        for f in fields:
+            columns[f] = base[f] if np is None else cls.object_array(np, base[f])
+        for k, (rows, values) in collected.items():
+            columns[column_name(k)] = cls.make_column(np, n, rows, values)
+        if selected is not None:
+            for k in attributes:
+                if column_name(k) not in columns:
+                    columns[column_name(k)] = ([None] * n if np is None else
+                                               np.full(n, None, dtype=object))
+
+        return cls(columns, n, np)
+
+    @classmethod
+    def from_document(cls, obj, attributes=None, use_numpy=True):
+        """
+        Build the columns from the resources of a global document
+        """
+        return cls.from_resources(obj.metadata.get('resources', []),
+                                  attributes=attributes, use_numpy=use_numpy)
+
+    @staticmethod
+    def object_array(np, values):
+        arr = np.empty(len(values), dtype=object)
+        arr[:] = values
+        return arr
+
+    @classmethod
+    def make_column(cls, np, n, rows, values):
+        """
+        Typed column of length n with values at the given rows
+        """
+        kind = column_type(values)
+        complete = len(rows) == n
+        if kind == 'int' and not complete:
+            kind = 'float'
+        if kind == 'bool' and not complete:
+            kind = 'object'
+
+        if np is not None:
+            if kind in ('int', 'float'):
+                try:
+                    if kind == 'int':
+                        return np.array(values, dtype=np.int64)
+                    column = np.full(n, np.nan)
+                    column[np.array(rows, dtype=np.int64)] = values
+                    return column
+                except OverflowError:
+                    pass
+            if kind == 'bool':
+                return np.array(values, dtype=bool)
+            column = np.full(n, None, dtype=object)
+            column[np.array(rows, dtype=np.int64)] = cls.object_array(np, values)
+            return column
+
+        if kind in ('int', 'float'):
+            try:
+                if kind == 'int':
+                    return array.array('q', values)
+                column = array.array('d', [math.nan]) * n
+                for i, v in zip(rows, values):
+                    column[i] = v
+                return column
+            except OverflowError:
+                pass
+        if complete:
+            return list(values)
+        column = [None] * n
+        for i, v in zip(rows, values):
+            column[i] = v
+        return column
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def names(self):
+        """
+        Column names
+        """
+        return list(self.columns)
+
+    def column(self, name):
+        """
+        Return a column
+
+        :raises KeyError: Unknown column
+        """
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError("Unknown column: {}".format(name))
+
+    def is_numeric(self, name):
+        """
+        Check if a column holds numbers (int or float)
+        """
+        column = self.column(name)
+        if self.np is not None:
+            return column.dtype.kind in 'if'
+        return isinstance(column, array.array)
+
+    def numeric(self, name):
+        """
+        Return a numeric column
+
+        :raises TypeError: The column does not hold numbers
+        """
+        if not self.is_numeric(name):
+            raise TypeError("Not a numeric column: {}".format(name))
+        return self.column(name)
+
+    def sum(self, name):
+        """
+        Sum of a numeric column, ignoring missing values
+        """
+        column = self.numeric(name)
+        if self.np is not None:
+            return self.np.nansum(column).item()
+        if column.typecode == 'd':
+            return math.fsum(v for v in column if v == v)
+        return sum(column)
+
+    def count(self, name):
+        """
+        Number of resources with a value in a column
+        """
+        column = self.column(name)
+        if self.np is not None and column.dtype.kind == 'f':
+            return int(self.np.count_nonzero(~self.np.isnan(column)))
+        if self.np is not None and column.dtype.kind in 'ib':
+            return len(column)
+        if isinstance(column, array.array):
+            return len(column) if column.typecode == 'q' else sum(1 for v in column if v == v)
+        return sum(1 for v in column if v is not None)
+
+    def group_by(self, keys, name=None):
+        """
+        Aggregate by the values of a column
+
+        :param keys: Column name, or a sequence with one key per resource
+        :param str name: Numeric column to sum. Default is to count
+               resources.
+        :rtype: dict
+        :return: Key to count or sum, in order of first appearance
+        """
+        if isinstance(keys, str):
+            keys = self.column(keys)
+        if len(keys) != self.length:
+            raise ValueError("Expected {} keys, got {}".format(self.length, len(keys)))
+        column = None if name is None else self.numeric(name)
+
+        # Keys are factorized in one pass; the aggregate itself is
+        # vectorized when NumPy is available
+        index = {}
+        codes = [index.setdefault(k, len(index)) for k in keys]
+        groups = list(index)
+
+        if self.np is not None:
+            np = self.np
+            codes = np.array(codes, dtype=np.int64)
+            if column is None:
+                totals = np.bincount(codes, minlength=len(groups)).tolist()
+            else:
+                weights = np.nan_to_num(column, nan=0.0) if column.dtype.kind == 'f' else column
+                totals = np.bincount(codes, weights=weights, minlength=len(groups))
+                if column.dtype.kind == 'i':
+                    totals = totals.round().astype(np.int64)
+                totals = totals.tolist()
+            return dict(zip(groups, totals))
+
+        if column is None:
+            totals = [0] * len(groups)
+            for c in codes:
+                totals[c] += 1
+        elif column.typecode == 'q':
+            totals = [0] * len(groups)
+            for c, v in zip(codes, column):
+                totals[c] += v
+        else:
+            totals = [0.0] * len(groups)
+            for c, v in zip(codes, column):
+                if v == v:
+                    totals[c] += v
+        return dict(zip(groups, totals))
+
+    def extension_keys(self):
+        """
+        Extension of each resource: the extension attribute when it is
+        set, else the lowercase extension of the path ('' if none)
+        """
+        if self.extensions is None:
+            extensions = [path_extension(p) for p in self.column('path')]
+            given = self.columns.get('extension')
+            if given is not None:
+                extensions = [e if isinstance(e, str) else x
+                              for e, x in zip(given, extensions)]
+            self.extensions = extensions
+        return self.extensions
+
+    def group_by_extension(self, name=None):
+        """
+        Count resources, or sum a numeric column, by extension
+
+        :param str name: Numeric column to sum (e.g., size)
+        """
+        return self.group_by(self.extension_keys(), name)
+
+    def top_k(self, name, k=10):
+        """
+        Resources with the largest values in a numeric column. Missing
+        values are ignored and ties are returned in resource order.
+
+        :rtype: list
+        :return: (path, value) pairs, largest first
+        """
+        column = self.numeric(name)
+        paths = self.column('path')
+        if k <= 0:
+            return []
+
+        if self.np is not None:
+            np = self.np
+            idx = np.arange(self.length)
+            if column.dtype.kind == 'f':
+                idx = idx[~np.isnan(column)]
+            values = column[idx]
+            if k < len(idx):
+                # Partition to find the k-th largest value, then sort
+                # only the candidates
+                threshold = np.partition(values, len(idx) - k)[len(idx) - k]
+                keep = values >= threshold
+                idx, values = idx[keep], values[keep]
+            order = np.lexsort((idx, -values))[:k]
+            return [(paths[i], v) for i, v in zip(idx[order].tolist(), values[order].tolist())]
+
+        rows = range(self.length)
+        if column.typecode == 'd':
+            rows = (i for i in rows if column[i] == column[i])
+        rows = heapq.nlargest(k, rows, key=column.__getitem__)
+        return [(paths[i], column[i]) for i in rows]
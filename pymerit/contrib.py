@@ -3,36 +3,92 @@ Extensible pymerit libraries
 """
 import os
 import sys
-import platform
 
 from .base import *
+from . import digest
+
+_context_cache = {}
+"""
+Host and process facts captured once per process
+"""
+
+def host_facts():
+    """
+    Node, platform and python version of this host. platform.platform()
+    probes libc and uname, so the facts are captured once per process.
+    """
+    facts = _context_cache.get('host')
+    if facts is None:
+        import platform
+        facts = {
+            "node":  platform.node(),
+            'platform': platform.platform(),
+            "python": platform.python_version(),
+        }
+        _context_cache['host'] = facts
+    return facts
+
+def process_facts():
+    """
+    pid and ppid of this process. Refreshed when the pid changes, e.g.,
+    in the child after os.fork.
+    """
+    pid = os.getpid()
+    facts = _context_cache.get('process')
+    if facts is None or facts['pid'] != pid:
+        facts = {
+            "pid":  pid,
+            "ppid":  os.getppid(),
+        }
+        _context_cache['process'] = facts
+    return facts
+
+def clear_context_cache(host=True):
+    """
+    Drop the cached facts so that they are captured again
+
+    :param bool host: Also drop the host facts (not just pid/ppid)
+    """
+    _context_cache.pop('process', None)
+    if host:
+        _context_cache.pop('host', None)
 
 class MeritContextPlatform(MeritContextBase):
     schema = 'context:platform:v1'
+
+    __slots__ = ()
     
     def initialize(self, *args, **kwargs):
         self.metadata = {
             "name": "PlatformContext",
             "description": "Host on which the execution took place",
-            "node":  platform.node(),
-            'platform': platform.platform(),
-            "python": platform.python_version(),
         }
+        self.metadata.update(host_facts())
 
 class MeritContextProcess(MeritContextBase):
     schema = 'context:process:v1'
+
+    __slots__ = ()
     
     def initialize(self, *args, **kwargs):
         self.metadata = {
             "name": "ProcessContext",
             "description": "Process generating this metadata",
-            "pid":  os.getpid(),
-            "ppid":  os.getppid(),
-            "cmdline": list(sys.argv)
         }
+        self.metadata.update(process_facts())
+        self.metadata["cmdline"] = list(sys.argv)
 
 class MeritResourceFile(MeritResourceBase):
     schema = 'resource:filebase:v1'
+
+    __slots__ = ()
+
+    required = MeritResourceBase.required + ('path', 'attributes')
+
+    fields = {
+        'path': Field(str),
+        'attributes': Field(dict),
+    }
     
     def initialize(self, *args, **kwargs):
         
@@ -43,15 +99,40 @@ class MeritResourceFile(MeritResourceBase):
             "description": "File saved on disk",
             "attributes": {}, 
         }        
-        self.required.extend([
-            "path",
-            "attributes" 
-        ])
 
 
     path = get_metadata_attribute('path')
     attributes = get_metadata_attribute('attributes')    
     
+    @classmethod
+    def from_stat(cls, path, st):
+        """
+        Build a resource from a path and its stat result. Attributes
+        hold the size, mtime and extension of the file.
+        """
+        r = cls()
+        r.metadata['path'] = path
+        r.metadata['attributes'] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'extension': os.path.splitext(path)[1]
+        }
+        return r
+
+    def local_paths(self):
+        path = self.metadata.get('path')
+        return [path] if isinstance(path, str) else []
+
+    def compute_digest(self, algorithms=digest.default_algorithms, cache=None):
+        """
+        Record the size, mtime and content digests of the file
+
+        :param list algorithms: hashlib algorithm names (e.g., sha256, blake2b)
+        :param MeritDigestCache cache: Optional digest cache
+        """
+        self.metadata['digest'] = digest.file_digest(self.path, algorithms, cache=cache)
+        return self.metadata['digest']
+
     def validate_path(self, path):
         """
         Check if the path exists 
@@ -60,25 +141,38 @@ class MeritResourceFile(MeritResourceBase):
         if not isinstance(path, str): 
             raise MeritInvalidMetadata("Invalid path for file resource specified. Not a string")
         
-        if not os.path.exists(path):
+        if instrument.enabled:
+            with instrument.phase('stat', self.schema):
+                exists = path_exists(path)
+        else:
+            exists = path_exists(path)
+
+        if not exists:
             raise MeritInvalidMetadata("Invalid path for file resource specified. Missing file") 
         
 class MeritResourceS3File(MeritResourceBase):
     schema = 'resource:s3filebase:v1'
+
+    __slots__ = ()
+
+    required = MeritResourceBase.required + ('s3path', 'attributes')
+
+    fields = {
+        's3path': Field(str),
+        'attributes': Field(dict),
+    }
     
     def initialize(self, *args, **kwargs):
         self.metadata = {
             "name": "File",
             "description": "S3 file"
         }        
-        self.required.extend([
-            "s3path",
-            "attributes",
-        ])        
 
 
 class MeritDefault(MeritGlobalBase):
     schema = 'global:default:v1'
+
+    __slots__ = ()
     
     def initialize(self, *args, **kwargs):
         super().initialize(*args, **kwargs)
@@ -86,3 +180,23 @@ class MeritDefault(MeritGlobalBase):
         # Add contexts 
         self.add_context(MeritContextPlatform())
         self.add_context(MeritContextProcess())        
+
+    def add_directory(self, root, include=None, exclude=None, recursive=True,
+                      max_workers=8, cls=MeritResourceFile):
+        """
+        Add a file resource for every file under a directory
+
+        :param str root: Directory to scan
+        :param list include: Globs (relative to root) of files to include
+        :param list exclude: Globs (relative to root) of files to exclude
+        :param bool recursive: Descend into subdirectories
+        :param int max_workers: Number of concurrent stat calls
+        :param class cls: Resource class (MeritResourceFile or a subclass)
+        :rtype: list
+        :return: Resources added
+        """
+        resources = [cls.from_stat(path, st)
+                     for path, st in scan_files(root, include, exclude, recursive,
+                                                max_workers=max_workers)]
+        self.add_resources(resources)
+        return resources
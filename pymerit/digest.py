@@ -0,0 +1,245 @@
+"""
+Digest
+------
+
+Content digests for file resources. Files are hashed with chunked
+reads or memory-mapped, in parallel across resources, and the results
+can be kept in a persistent cache keyed by (device, inode, size,
+mtime_ns) so that unchanged files are never hashed twice.
+
+A digest is recorded in the resource metadata as::
+
+    "digest": {
+        "size": 5,
+        "mtime_ns": 1546214400000000000,
+        "sha256": "185f8db3..."
+    }
+"""
+import os
+import threading
+from .exceptions import *
+from . import instrument
+
+default_algorithms = ('sha256',)
+"""
+Algorithms used when none are specified
+"""
+
+chunk_size = 1 << 20
+"""
+Read size for chunked hashing
+"""
+
+mmap_threshold = 16 << 20
+"""
+Files at least this large are memory-mapped instead of read in chunks
+"""
+
+def check_algorithms(algorithms):
+    """
+    Validate a list of hashlib algorithm names
+    """
+    import hashlib
+
+    if isinstance(algorithms, str):
+        algorithms = (algorithms,)
+    for a in algorithms:
+        if a not in hashlib.algorithms_available:
+            raise MeritInvalidMetadata("Unknown digest algorithm: {}".format(a))
+    return tuple(algorithms)
+
+def hash_file(path, algorithms=default_algorithms, use_mmap=None):
+    """
+    Hash the content of a file
+
+    :param str path: File to hash
+    :param list algorithms: hashlib algorithm names
+    :param bool use_mmap: Memory-map the file. Default is to map files
+           larger than mmap_threshold
+    :rtype: dict
+    :return: Mapping of algorithm to hex digest
+    """
+    import mmap
+    import hashlib
+
+    hashes = [hashlib.new(a) for a in algorithms]
+    with open(path, 'rb') as fd:
+        size = os.fstat(fd.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= mmap_threshold
+        if use_mmap and size > 0:
+            with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for h in hashes:
+                    h.update(mm)
+        else:
+            buf = bytearray(chunk_size)
+            view = memoryview(buf)
+            while True:
+                n = fd.readinto(buf)
+                if not n:
+                    break
+                for h in hashes:
+                    h.update(view[:n])
+    return {a: h.hexdigest() for a, h in zip(algorithms, hashes)}
+
+class MeritDigestCache(object):
+    """
+    Persistent SQLite cache of file digests keyed by (device, inode,
+    size, mtime_ns, algorithm)
+    """
+
+    def __init__(self, filename=":memory:"):
+        """
+        :param str filename: SQLite database file
+        """
+        import sqlite3
+
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS digests (
+            dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+            algorithm TEXT, digest TEXT,
+            PRIMARY KEY (dev, ino, size, mtime_ns, algorithm))
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def key(st):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, st, algorithms):
+        """
+        Cached digests for a stat result. None unless every algorithm is cached.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT algorithm, digest FROM digests WHERE "
+                "dev=? AND ino=? AND size=? AND mtime_ns=?",
+                self.key(st)).fetchall()
+        found = dict(rows)
+        if not all(a in found for a in algorithms):
+            return None
+        return {a: found[a] for a in algorithms}
+
+    def put(self, st, digests):
+        """
+        Save digests for a stat result
+        """
+        key = self.key(st)
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                [key + (a, d) for a, d in digests.items()])
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def file_digest(path, algorithms=default_algorithms, cache=None, use_mmap=None):
+    """
+    Compute the digest record (size, mtime_ns and hashes) of a file
+
+    :param str path: File to hash
+    :param list algorithms: hashlib algorithm names
+    :param MeritDigestCache cache: Optional digest cache
+    :param bool use_mmap: See hash_file
+    :rtype: dict
+    """
+    algorithms = check_algorithms(algorithms)
+    st = os.stat(path)
+    digests = cache.get(st, algorithms) if cache is not None else None
+    if digests is None:
+        if instrument.enabled:
+            digests = instrument.call('digest', None, hash_file, path, algorithms, use_mmap)
+        else:
+            digests = hash_file(path, algorithms, use_mmap=use_mmap)
+        # Only cache if the file did not change while hashing
+        if cache is not None and MeritDigestCache.key(os.stat(path)) == MeritDigestCache.key(st):
+            cache.put(st, digests)
+
+    record = {
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns
+    }
+    record.update(digests)
+    return record
+
+def file_digests(paths, algorithms=default_algorithms, max_workers=4, cache=None):
+    """
+    Compute digest records of many files in parallel
+
+    :param list paths: Files to hash
+    :param int max_workers: Number of files hashed concurrently
+    :rtype: list
+    :return: Digest records in the order of paths
+    """
+    algorithms = check_algorithms(algorithms)
+
+    def compute(path):
+        return file_digest(path, algorithms, cache=cache)
+
+    if max_workers <= 1:
+        return [compute(p) for p in paths]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(compute, paths))
+
+def resource_metadata(r):
+    """
+    Metadata dict of a resource object or raw resource dict
+    """
+    return r.metadata if hasattr(r, 'metadata') else r
+
+def add_digests(resources, algorithms=default_algorithms, max_workers=4, cache=None):
+    """
+    Record digests for all file resources
+
+    :param list resources: Resource objects (e.g., merit.metadata['resources'])
+    """
+    targets = [r for r in resources if len(r.local_paths()) > 0]
+    paths = [r.local_paths()[0] for r in targets]
+    records = file_digests(paths, algorithms, max_workers=max_workers, cache=cache)
+    for r, record in zip(targets, records):
+        r.metadata['digest'] = record
+
+def verify_digests(resources, max_workers=4, cache=None):
+    """
+    Re-check recorded digests
+
+    :param list resources: Resource objects or raw resource dicts
+    :param MeritDigestCache cache: Optional digest cache. By default
+           every file is hashed again.
+    :rtype: list
+    :return: List of (path, reason) for resources that do not match
+    """
+    targets = []
+    for r in resources:
+        metadata = resource_metadata(r)
+        if isinstance(metadata.get('digest'), dict) and isinstance(metadata.get('path'), str):
+            targets.append((metadata['path'], metadata['digest']))
+
+    def check(target):
+        path, recorded = target
+        algorithms = [a for a in recorded if a not in ('size', 'mtime_ns')]
+        try:
+            current = file_digest(path, algorithms, cache=cache)
+        except OSError:
+            return (path, "missing")
+        if current['size'] != recorded.get('size'):
+            return (path, "size")
+        for a in algorithms:
+            if current[a] != recorded[a]:
+                return (path, a)
+        return None
+
+    if max_workers <= 1:
+        results = [check(t) for t in targets]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(check, targets))
+
+    return [r for r in results if r is not None]
@@ -62,3 +62,21 @@ class MeritNotRegistered(Exception):
     Class not a registered handler for any schema 
     """
     pass
+
+class MeritUnknownBackend(Exception):
+    """
+    Unknown or unavailable serialization backend or output mode
+    """
+    pass
+
+class MeritMissingPaths(MeritInvalidMetadata):
+    """
+    One or more resource paths do not exist. The full list is
+    available as the paths attribute.
+    """
+    def __init__(self, paths, shown=10):
+        self.paths = list(paths)
+        summary = ", ".join(self.paths[:shown])
+        if len(self.paths) > shown:
+            summary += ", ... ({} total)".format(len(self.paths))
+        super().__init__("Invalid path for file resource specified. Missing file(s): {}".format(summary))
@@ -0,0 +1,317 @@
+"""
+Fields
+------
+
+Declarative field specs. A handler class describes its elements in a
+class-level fields dict, e.g.::
+
+    class MeritResourceCSV(MeritResourceFile):
+        schema = "resource:csv:v1"
+        fields = {
+            'path': Field(str, pattern=r'\\.csv$'),
+            'rows': Field(int, required=False),
+        }
+
+Fields are inherited and merged along the class hierarchy. MeritMeta
+compiles the fields, the required elements and the validate_<field>
+hooks of each class into one validator function. Field specs can be
+exported to and imported from JSON Schema.
+"""
+import re
+import collections
+import collections.abc
+from .exceptions import *
+from . import instrument
+
+json_schema_draft = "http://json-schema.org/draft-07/schema#"
+
+json_types = collections.OrderedDict([
+    ('boolean', bool),
+    ('integer', int),
+    ('number', float),
+    ('string', str),
+    ('null', type(None)),
+    ('object', dict),
+    ('array', list),
+])
+"""
+JSON Schema type names and the corresponding Python types
+"""
+
+def json_type(t):
+    """
+    JSON Schema type name of a Python type
+    """
+    for name, pytype in json_types.items():
+        if issubclass(t, pytype):
+            return name
+    if issubclass(t, collections.abc.Mapping):
+        return 'object'
+    if issubclass(t, collections.abc.Sequence):
+        return 'array'
+    raise MeritInvalidSchema("No JSON Schema type for {}".format(t.__name__))
+
+builtins_type = type
+
+class Field(object):
+    """
+    Spec of one metadata element
+    """
+    __slots__ = ('type', 'required', 'pattern', 'schema', 'description')
+
+    def __init__(self, type=None, required=True, pattern=None, schema=None,
+                 description=None):
+        """
+        :param type: Python type or tuple of types of the value. Any
+               type if not specified.
+        :param bool required: Element must be present
+        :param str pattern: Regular expression that string values must match
+        :param dict schema: Fields of a nested object. Applies to each
+               item if the value is a list.
+        :param str description: Human readable description
+        """
+        if type is not None:
+            if not isinstance(type, tuple):
+                type = (type,)
+            if len(type) == 0 or not all(isinstance(t, builtins_type) for t in type):
+                raise MeritInvalidSchema("Invalid field type: {!r}".format(type))
+
+        if schema is not None:
+            if (not isinstance(schema, dict) or
+                not all(isinstance(f, Field) for f in schema.values())):
+                raise MeritInvalidSchema("Nested schema must be a dict of fields")
+
+        self.type = type
+        self.required = required
+        self.pattern = None if pattern is None else re.compile(pattern)
+        self.schema = schema
+        self.description = description
+
+    def __repr__(self):
+        return "Field({})".format(", ".join("{}={!r}".format(k, getattr(self, k))
+                                            for k in self.__slots__
+                                            if getattr(self, k) is not None))
+
+    def json_schema(self):
+        """
+        Export the field as a JSON Schema property
+        """
+        prop = collections.OrderedDict()
+        if self.type is not None:
+            names = []
+            for t in self.type:
+                name = json_type(t)
+                if name not in names:
+                    names.append(name)
+            prop['type'] = names[0] if len(names) == 1 else names
+        if self.pattern is not None:
+            prop['pattern'] = self.pattern.pattern
+        if self.description is not None:
+            prop['description'] = self.description
+        if self.schema is not None:
+            nested = object_json_schema(self.schema)
+            if self.type is None or dict in self.type:
+                prop.update(nested)
+            if self.type is None or list in self.type:
+                prop['items'] = nested
+        return prop
+
+    @classmethod
+    def from_json_schema(cls, prop, required=True):
+        """
+        Import a field from a JSON Schema property. Keywords other than
+        type, pattern, description, properties, required and items are
+        ignored.
+        """
+        names = prop.get('type')
+        if isinstance(names, str):
+            names = [names]
+
+        types = None
+        if names is not None:
+            types = []
+            for name in names:
+                if name not in json_types:
+                    raise MeritInvalidSchema("Unknown JSON Schema type: {}".format(name))
+                types.append(json_types[name])
+                # Integers are numbers as well
+                if name == 'number' and int not in types:
+                    types.append(int)
+            types = tuple(types)
+
+        schema = None
+        if 'properties' in prop:
+            schema = from_json_schema(prop)
+        elif isinstance(prop.get('items'), dict) and 'properties' in prop['items']:
+            schema = from_json_schema(prop['items'])
+
+        return cls(types, required=required, pattern=prop.get('pattern'),
+                   schema=schema, description=prop.get('description'))
+
+def object_json_schema(fields, required=()):
+    """
+    JSON Schema object with a property for each field
+    """
+    props = collections.OrderedDict()
+    names = []
+    for name in required:
+        props[name] = {}
+        names.append(name)
+    for name, field in fields.items():
+        props[name] = field.json_schema()
+        if field.required and name not in names:
+            names.append(name)
+    return collections.OrderedDict([('type', 'object'),
+                                    ('properties', props),
+                                    ('required', names)])
+
+def to_json_schema(fields, required=(), schema=None, title=None):
+    """
+    Export field specs as a JSON Schema document
+
+    :param dict fields: Field name to Field
+    :param list required: Elements required in addition to required fields
+    :param schema: Schema string or list of strings of the handler
+    :param str title: Document title (e.g., the handler class name)
+    """
+    doc = collections.OrderedDict([('$schema', json_schema_draft)])
+    if title is not None:
+        doc['title'] = title
+
+    obj = object_json_schema(fields, required)
+    if schema is not None:
+        spec = {'const': schema} if isinstance(schema, str) else {'enum': list(schema)}
+        props = collections.OrderedDict([('schema', spec)])
+        props.update(obj['properties'])
+        obj['properties'] = props
+        obj['required'] = ['schema'] + obj['required']
+
+    doc.update(obj)
+    return doc
+
+def from_json_schema(doc):
+    """
+    Import field specs from a JSON Schema object. The schema
+    property, if any, is skipped as it identifies the handler.
+
+    :rtype: dict
+    :return: Field name to Field
+    """
+    if doc.get('type', 'object') != 'object':
+        raise MeritInvalidSchema("JSON Schema does not describe an object")
+
+    required = doc.get('required', [])
+    fields = collections.OrderedDict()
+    for name, prop in doc.get('properties', {}).items():
+        if name == 'schema':
+            continue
+        fields[name] = Field.from_json_schema(prop, required=name in required)
+    for name in required:
+        if name not in fields and name != 'schema':
+            fields[name] = Field()
+    return fields
+
+def check_nested(func, value, prefix):
+    """
+    Apply a compiled nested validator to an object or to each item of a list
+    """
+    if isinstance(value, collections.abc.Mapping):
+        func(None, value, prefix + '.')
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            if not isinstance(item, collections.abc.Mapping):
+                raise MeritInvalidMetadata(
+                    "Invalid type for {}[{}]: expected object".format(prefix, i))
+            func(None, item, "{}[{}].".format(prefix, i))
+    else:
+        raise MeritInvalidMetadata("Invalid type for {}: expected object".format(prefix))
+
+def compile_validator(fields, required=(), hooks=None, timed=False):
+    """
+    Compile the field specs, required elements and validate_<field>
+    hooks into one function validate(self, metadata). Each element is
+    checked in turn: presence, type, pattern, nested fields and
+    finally the hook. Hooks are called for required elements and for
+    declared optional elements that are present.
+
+    :param dict fields: Field name to Field
+    :param list required: Required elements
+    :param dict hooks: Field name to func(self, value)
+    :param bool timed: Time each hook using the instrument module
+    """
+    hooks = hooks or {}
+    env = {
+        '_E': MeritInvalidMetadata,
+        '_nested': check_nested,
+        '_call': instrument.call,
+    }
+
+    names = list(required)
+    for name, field in fields.items():
+        if name not in names and (field.required or
+                                  field.type or field.pattern or
+                                  field.schema or name in hooks):
+            names.append(name)
+
+    lines = ["def validate(self, metadata, prefix=''):"]
+    for i, name in enumerate(names):
+        key = repr(name)
+        field = fields.get(name)
+        hook = hooks.get(name) if name in required or field is not None else None
+
+        indent = '    '
+        if name in required or field.required:
+            lines += [
+                "    if {} not in metadata:".format(key),
+                "        raise _E('Missing: ' + prefix + {})".format(key),
+            ]
+        else:
+            lines.append("    if {} in metadata:".format(key))
+            indent = '        '
+
+        if field is None and hook is None:
+            if indent != '    ':
+                lines.append(indent + "pass")
+            continue
+
+        lines.append(indent + "v = metadata[{}]".format(key))
+
+        if field is not None and field.type is not None:
+            env['_t{}'.format(i)] = field.type
+            test = "not isinstance(v, _t{})".format(i)
+            # bool is a subclass of int but not a JSON integer
+            if int in field.type and bool not in field.type:
+                test += " or v.__class__ is bool"
+            expected = " or ".join(json_type(t) for t in field.type)
+            lines += [
+                indent + "if {}:".format(test),
+                indent + "    raise _E('Invalid type for ' + prefix + {}"
+                " + ': expected {}')".format(key, expected),
+            ]
+
+        if field is not None and field.pattern is not None:
+            env['_p{}'.format(i)] = field.pattern.search
+            lines += [
+                indent + "if isinstance(v, str) and _p{}(v) is None:".format(i),
+                indent + "    raise _E('Invalid value for ' + prefix + {}"
+                " + ': does not match ' + {})".format(key, repr(field.pattern.pattern)),
+            ]
+
+        if field is not None and field.schema is not None:
+            env['_n{}'.format(i)] = compile_validator(
+                field.schema, [n for n, f in field.schema.items() if f.required])
+            lines.append(indent + "_nested(_n{}, v, prefix + {})".format(i, key))
+
+        if hook is not None:
+            env['_h{}'.format(i)] = hook
+            if timed:
+                lines.append(indent + "_call({}, self.schema, _h{}, self, v)".format(
+                    repr('validate_' + name), i))
+            else:
+                lines.append(indent + "_h{}(self, v)".format(i))
+
+    if len(lines) == 1:
+        lines.append("    pass")
+
+    exec("\n".join(lines), env)
+    return env['validate']
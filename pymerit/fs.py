@@ -0,0 +1,211 @@
+"""
+Filesystem
+----------
+
+Filesystem helpers: a short-lived stat cache, parallel stat of many
+paths using a bounded thread pool, and directory scanning.
+"""
+import os
+import time
+import fnmatch
+import threading
+import contextlib
+
+class MeritStatCache(object):
+    """
+    Short-lived cache of os.stat results. Missing paths are cached
+    as None.
+    """
+
+    def __init__(self, ttl=2.0, maxsize=1000000):
+        """
+        :param float ttl: Seconds for which a result is reused
+        :param int maxsize: Number of entries after which the cache is flushed
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = {}
+
+    def get(self, path):
+        """
+        Return (hit, stat result)
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def put(self, path, st):
+        """
+        Cache a stat result (None for a missing path)
+        """
+        if len(self.entries) >= self.maxsize:
+            self.entries = {}
+        self.entries[path] = (time.monotonic() + self.ttl, st)
+
+    def clear(self):
+        """
+        Drop all entries
+        """
+        self.entries = {}
+
+    def stat(self, path):
+        """
+        Cached os.stat. Returns None if the path cannot be stat'ed
+        """
+        hit, st = self.get(path)
+        if hit:
+            return st
+        st = stat_path(path)
+        self.put(path, st)
+        return st
+
+stat_cache = MeritStatCache()
+"""
+Process-wide stat cache used during validation
+"""
+
+def stat_path(path):
+    """
+    os.stat that returns None instead of raising for missing paths
+    """
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+_verified = threading.local()
+
+@contextlib.contextmanager
+def verified_paths(stats):
+    """
+    Within the block, path_exists answers from stats (e.g., the result
+    of stat_paths) for the paths it contains, on the current thread.
+    Used to validate resources whose paths were just checked in a
+    batch without a second stat of each path.
+
+    :param dict stats: Mapping of path to stat result (None if missing)
+    """
+    previous = getattr(_verified, 'stats', None)
+    _verified.stats = stats
+    try:
+        yield
+    finally:
+        _verified.stats = previous
+
+def path_exists(path, cache=stat_cache):
+    """
+    Cached equivalent of os.path.exists
+
+    :param str path: Path to check
+    :param MeritStatCache cache: Cache to use. None disables caching
+    """
+    stats = getattr(_verified, 'stats', None)
+    if stats is not None and path in stats:
+        return stats[path] is not None
+    if cache is None:
+        return stat_path(path) is not None
+    return cache.stat(path) is not None
+
+def stat_paths(paths, max_workers=8, cache=stat_cache):
+    """
+    Stat many paths using a bounded thread pool
+
+    :param list paths: Paths to stat
+    :param int max_workers: Maximum number of concurrent stat calls
+    :param MeritStatCache cache: Cache to use. None disables caching
+    :rtype: dict
+    :return: Mapping of path to stat result (None if missing)
+    """
+    result = {}
+    pending = []
+    for path in paths:
+        if path in result:
+            continue
+        hit, st = cache.get(path) if cache is not None else (False, None)
+        if hit:
+            result[path] = st
+        else:
+            result[path] = None
+            pending.append(path)
+
+    if len(pending) == 0:
+        return result
+
+    if max_workers <= 1 or len(pending) == 1:
+        stats = [stat_path(path) for path in pending]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            stats = list(executor.map(stat_path, pending, chunksize=64))
+
+    for path, st in zip(pending, stats):
+        result[path] = st
+        if cache is not None:
+            cache.put(path, st)
+
+    return result
+
+def match_globs(relpath, include=None, exclude=None):
+    """
+    Check a relative path against include and exclude globs
+
+    :param str relpath: Path relative to the scanned root
+    :param list include: Globs of which at least one must match (None matches all)
+    :param list exclude: Globs of which none may match
+    """
+    if include and not any(fnmatch.fnmatch(relpath, g) for g in include):
+        return False
+    if exclude and any(fnmatch.fnmatch(relpath, g) for g in exclude):
+        return False
+    return True
+
+def scan_directory(root, include=None, exclude=None, recursive=True):
+    """
+    Walk a directory with os.scandir and yield the paths of regular
+    files matching the globs. Symlinked directories are not followed.
+
+    :param str root: Directory to scan. Paths are absolute whether or
+           not root is.
+    :param list include: Globs (relative to root) of files to include
+    :param list exclude: Globs (relative to root) of files to exclude
+    :param bool recursive: Descend into subdirectories
+    """
+    root = os.path.abspath(root)
+    stack = [root]
+    while len(stack) > 0:
+        current = stack.pop()
+        it = os.scandir(current)
+        try:
+            entries = sorted(it, key=lambda e: e.name)
+        finally:
+            # scandir iterators have close() from Python 3.6
+            if hasattr(it, 'close'):
+                it.close()
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    subdirs.append(entry.path)
+                continue
+            if not entry.is_file():
+                continue
+            relpath = os.path.relpath(entry.path, root)
+            if match_globs(relpath, include, exclude):
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+def scan_files(root, include=None, exclude=None, recursive=True,
+               max_workers=8, cache=stat_cache):
+    """
+    Scan a directory and stat the matching files in parallel
+
+    :param str root: Directory to scan
+    :param int max_workers: Maximum number of concurrent stat calls
+    :param MeritStatCache cache: Cache that receives the stat results
+    :rtype: list
+    :return: List of (path, stat result) for files that still exist
+    """
+    paths = list(scan_directory(root, include, exclude, recursive))
+    stats = stat_paths(paths, max_workers=max_workers, cache=cache)
+    return [(p, stats[p]) for p in paths if stats[p] is not None]
@@ -0,0 +1,128 @@
+"""
+Instrument
+----------
+
+Opt-in instrumentation of the hot paths. When enabled, pymerit
+records call counts and cumulative time per phase and per schema:
+
+* lookup - handler lookup by schema
+* load, dump, validate - MeritBase methods (nested calls are included
+  in the time of the caller)
+* validate_<field> - per-field validation hooks
+* stat - filesystem checks of resource paths
+* digest - content hashing
+* encode, decode - JSON encoding and decoding
+
+When disabled (the default) the cost is one flag check per call.
+Hooks receive every measurement as hook(phase, schema, seconds), e.g.,
+to forward it to a metrics system.
+"""
+import time
+import threading
+
+enabled = False
+"""
+Whether measurements are recorded. Use enable_stats/disable_stats.
+"""
+
+clock = time.perf_counter
+
+_stats = {}
+_hooks = []
+_lock = threading.Lock()
+
+def schema_key(schema):
+    """
+    Key used for a schema (the first one for multi-schema classes)
+    """
+    if schema is None:
+        return ""
+    if isinstance(schema, str):
+        return schema
+    return schema[0] if len(schema) > 0 else ""
+
+def record(phase, schema, seconds):
+    """
+    Record one measurement
+    """
+    schema = schema_key(schema)
+    with _lock:
+        entry = _stats.setdefault(phase, {}).setdefault(schema, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+    for hook in list(_hooks):
+        hook(phase, schema, seconds)
+
+class phase(object):
+    """
+    Context manager that records the time of a block
+    """
+    __slots__ = ('name', 'schema', 'start')
+
+    def __init__(self, name, schema=None):
+        self.name = name
+        self.schema = schema
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *args):
+        record(self.name, self.schema, clock() - self.start)
+        return False
+
+def call(name, schema, func, *args):
+    """
+    Call func(*args) and record its time
+    """
+    start = clock()
+    try:
+        return func(*args)
+    finally:
+        record(name, schema, clock() - start)
+
+def enable_stats():
+    """
+    Start recording measurements
+    """
+    global enabled
+    enabled = True
+
+def disable_stats():
+    """
+    Stop recording measurements. Collected numbers are kept.
+    """
+    global enabled
+    enabled = False
+
+def reset_stats():
+    """
+    Drop collected numbers
+    """
+    with _lock:
+        _stats.clear()
+
+def stats():
+    """
+    Collected numbers
+
+    :rtype: dict
+    :return: {phase: {schema: {'count': n, 'seconds': t}}}
+    """
+    with _lock:
+        return {
+            p: {s: {'count': e[0], 'seconds': e[1]} for s, e in schemas.items()}
+            for p, schemas in _stats.items()
+        }
+
+def add_stats_hook(hook):
+    """
+    Call hook(phase, schema, seconds) for every measurement
+    """
+    _hooks.append(hook)
+
+def remove_stats_hook(hook):
+    """
+    Remove a hook added with add_stats_hook
+    """
+    _hooks.remove(hook)
@@ -0,0 +1,167 @@
+"""
+Context pool
+------------
+
+Content-addressed storage of contexts. Contexts that are identical
+across documents (e.g., the platform of a host) can be written by
+reference::
+
+    {"schema": "context:platform:v1", "ref": "sha256:..."}
+
+The referenced content is kept either in the document, in a
+context_table element, or in a pool shared by many documents. The
+pool of a MeritCatalog is persisted in its database. References are
+resolved when a context is first accessed, and a pool decodes each
+content once.
+"""
+import re
+import json
+import threading
+import collections
+import collections.abc
+from .exceptions import *
+
+ref_prefix = "sha256:"
+
+def context_ref(content):
+    """
+    Content address of a dumped context: the sha256 of its canonical
+    JSON encoding (sorted keys, no whitespace)
+    """
+    import hashlib
+    data = json.dumps(content, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+    return ref_prefix + hashlib.sha256(data).hexdigest()
+
+def is_context_ref(spec):
+    """
+    Check if a context spec is a reference
+    """
+    return (isinstance(spec, dict) and 'ref' in spec and
+            all(k in ('schema', 'ref') for k in spec))
+
+_ref_pattern = re.compile(r'sha256:[0-9a-f]{64}$')
+
+def check_context_ref(spec):
+    """
+    Check that a reference spec is well-formed, without resolving it
+
+    :raises MeritInvalidMetadata: Invalid schema or reference
+    """
+    if not isinstance(spec.get('schema'), str):
+        raise MeritInvalidMetadata("Context reference without a schema")
+    ref = spec['ref']
+    if not isinstance(ref, str) or _ref_pattern.match(ref) is None:
+        raise MeritInvalidMetadata("Invalid context reference: {!r}".format(ref))
+
+def make_context_ref(content, ref):
+    """
+    Reference spec for a dumped context
+    """
+    return collections.OrderedDict([('schema', content['schema']), ('ref', ref)])
+
+class MeritContextPool(object):
+    """
+    In-memory pool of dumped contexts, indexed by content address.
+    Subclasses persist the contents by implementing fetch and store.
+    """
+
+    def __init__(self, contents=None):
+        """
+        :param dict contents: Initial content, reference to dumped context
+        """
+        self.contents = collections.OrderedDict(contents or {})
+        self.lock = threading.Lock()
+
+    def fetch(self, ref):
+        """
+        Return the content of a reference that is not in memory, or None
+        """
+        return None
+
+    def store(self, ref, content):
+        """
+        Persist a new content
+        """
+        pass
+
+    def __contains__(self, ref):
+        return self.get(ref, None) is not None
+
+    def get(self, ref, default=KeyError):
+        """
+        Return the content of a reference
+
+        :param str ref: Reference (sha256:...)
+        :param default: Returned if the reference is unknown. By
+               default, MeritInvalidMetadata is raised.
+        """
+        content = self.contents.get(ref)
+        if content is None:
+            with self.lock:
+                content = self.contents.get(ref)
+                if content is None:
+                    content = self.fetch(ref)
+                    if content is not None:
+                        self.contents[ref] = content
+        if content is None:
+            if default is KeyError:
+                raise MeritInvalidMetadata("Unknown context reference: {}".format(ref))
+            return default
+        return content
+
+    def put(self, ref, content):
+        """
+        Add a content under a known reference
+        """
+        with self.lock:
+            if ref not in self.contents:
+                if self.fetch(ref) is None:
+                    self.store(ref, content)
+                self.contents[ref] = content
+        return ref
+
+    def add(self, content):
+        """
+        Add a dumped context and return its reference
+        """
+        return self.put(context_ref(content), content)
+
+_default_pool = None
+
+def get_context_pool():
+    """
+    Pool used to resolve references when a document has no
+    context_pool of its own. None unless set with set_context_pool.
+    """
+    return _default_pool
+
+def set_context_pool(pool):
+    """
+    Set the default pool (e.g., MeritCatalog(...).context_pool())
+    """
+    global _default_pool
+    _default_pool = pool
+
+class MeritContextRefs(collections.abc.Sequence):
+    """
+    Context specs in which references are resolved on access. Used as
+    the raw specs of a MeritLazyList.
+    """
+
+    def __init__(self, entries, resolve):
+        """
+        :param list entries: Context specs, some of which are references
+        :param resolve: Function returning the content of a reference spec
+        """
+        self.entries = entries
+        self.resolve = resolve
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        spec = self.entries[i]
+        return self.resolve(spec) if is_context_ref(spec) else spec
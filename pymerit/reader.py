@@ -0,0 +1,312 @@
+"""
+Reader
+------
+
+Memory-mapped reader for large JSON metadata files. The file is
+scanned once to index the byte offsets of the top-level elements and
+of each item of the contexts and resources lists. Only the slices that
+are accessed are decoded::
+
+    with MeritReader("metadata.json") as reader:
+        print(reader['namespace'])
+        print(reader['resources'][12345]['path'])
+        obj = reader.new()
+
+The scan matches each list item, up to a few levels of nesting, with
+one regular expression. Deeper items fall back to a loop over their
+brackets in which strings and scalars are still skipped by a regular
+expression.
+"""
+import re
+import array
+import collections.abc
+from .exceptions import *
+from .backends import get_json_backend
+
+def nested_pattern(depth):
+    """
+    Regular expression for the content of a JSON container with up to
+    depth levels of nested containers. Brackets are not paired by type;
+    the decoder checks that when the value is accessed.
+    """
+    string = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+    flat = rb'[^"\[\]{}]*(?:' + string + rb'[^"\[\]{}]*)*'
+    pattern = flat
+    for i in range(depth):
+        pattern = flat + rb'(?:[\[{]' + pattern + rb'[\]}]' + flat + rb')*'
+    return pattern
+
+_patterns = {}
+
+def patterns():
+    """
+    Compiled regular expressions, built on first use:
+
+    * ws - whitespace
+    * string - a string
+    * scalar - a number, true, false or null
+    * flat - content without brackets
+    * item - a list item with up to three levels of nesting,
+      followed by its separator
+    """
+    if len(_patterns) == 0:
+        _patterns.update(
+            ws=re.compile(rb'[ \t\n\r]*'),
+            string=re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL),
+            scalar=re.compile(rb'[^,:\[\]{}" \t\n\r]+'),
+            flat=re.compile(nested_pattern(0), re.DOTALL),
+            item=re.compile(rb'[ \t\n\r]*([\[{]' + nested_pattern(3) +
+                            rb'[\]}])[ \t\n\r]*([,\]])', re.DOTALL))
+    return _patterns
+
+_open = frozenset(b'[{')
+_close = frozenset(b']}')
+
+indexed_fields = ('contexts', 'resources')
+"""
+Top-level lists whose items are indexed individually
+"""
+
+class MeritLazyArray(collections.abc.Sequence):
+    """
+    Read-only sequence of the items of an indexed list. Each item is
+    decoded when it is accessed. Usable as the raw specs of a
+    MeritLazyList.
+    """
+
+    def __init__(self, reader, starts, ends):
+        self.reader = reader
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def span(self, i):
+        """
+        Byte offsets (start, end) of item i
+        """
+        return self.starts[i], self.ends[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        return self.reader.decode(self.starts[i], self.ends[i])
+
+class MeritReader(collections.abc.Mapping):
+    """
+    Mapping of the top-level elements of a memory-mapped JSON file.
+    Values are decoded on first access and kept. Indexed lists are
+    returned as MeritLazyArray.
+
+    Objects built from the reader (see new()) read from the file
+    until they are fully loaded, so the reader must stay open while
+    they are used.
+    """
+
+    def __init__(self, filename, backend=None, indexed=indexed_fields):
+        """
+        :param str filename: JSON file to read
+        :param str backend: JSON backend. Default is the global backend
+        :param list indexed: Top-level lists whose items are indexed
+        """
+        import mmap
+
+        self.filename = filename
+        self.decoder = get_json_backend(backend)
+        self.values = {}
+        self.buf = None
+        self.re = patterns()
+
+        with open(filename, 'rb') as fd:
+            try:
+                self.buf = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise MeritInvalidMetadata("Empty file: {}".format(filename))
+
+        try:
+            self.spans, self.indexes = self.scan(indexed)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Unmap the file
+        """
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+
+    def decode(self, start, end):
+        """
+        Decode the bytes between two offsets
+        """
+        return self.decoder.loads(self.buf[start:end])
+
+    def error(self, pos, message):
+        return MeritInvalidMetadata("{} at offset {} of {}".format(
+            message, pos, self.filename))
+
+    def skip_ws(self, pos):
+        return self.re['ws'].match(self.buf, pos).end()
+
+    def skip_value(self, pos):
+        """
+        Return the offset after the value starting at pos
+        """
+        buf = self.buf
+        if pos >= len(buf):
+            raise self.error(pos, "Truncated value")
+
+        c = buf[pos]
+        if c == 0x22:
+            m = self.re['string'].match(buf, pos)
+            if m is None:
+                raise self.error(pos, "Unterminated string")
+            return m.end()
+
+        if c not in _open:
+            m = self.re['scalar'].match(buf, pos)
+            if m is None:
+                raise self.error(pos, "Unexpected character")
+            return m.end()
+
+        # Containers: only brackets are handled here, strings and
+        # scalars in between are skipped by the regular expression
+        flat = self.re['flat']
+        depth = 0
+        n = len(buf)
+        while True:
+            pos = flat.match(buf, pos).end()
+            if pos >= n:
+                raise self.error(pos, "Truncated value")
+            c = buf[pos]
+            if c in _open:
+                depth += 1
+            elif c in _close:
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            else:
+                raise self.error(pos, "Unterminated string")
+            pos += 1
+
+    def expect(self, pos, chars):
+        pos = self.skip_ws(pos)
+        if pos >= len(self.buf) or self.buf[pos] not in chars:
+            raise self.error(pos, "Expected one of {!r}".format(chars))
+        return pos
+
+    def scan_items(self, pos):
+        """
+        Index the items of the list starting at pos
+        """
+        starts = array.array('q')
+        ends = array.array('q')
+
+        pos = self.skip_ws(pos + 1)
+        if pos < len(self.buf) and self.buf[pos] == 0x5d:
+            return pos + 1, starts, ends
+
+        buf = self.buf
+        item = self.re['item']
+        while True:
+            m = item.match(buf, pos)
+            if m is not None:
+                starts.append(m.start(1))
+                ends.append(m.end(1))
+                if m.group(2) == b']':
+                    return m.end(), starts, ends
+                pos = m.end()
+                continue
+
+            # Scalars and deeply nested items
+            pos = self.skip_ws(pos)
+            end = self.skip_value(pos)
+            starts.append(pos)
+            ends.append(end)
+            pos = self.expect(end, b',]')
+            if self.buf[pos] == 0x5d:
+                return pos + 1, starts, ends
+            pos += 1
+
+    def scan(self, indexed):
+        """
+        Index the top-level elements and the items of the indexed lists
+
+        :rtype: tuple
+        :return: (OrderedDict of key to (start, end), dict of key to (starts, ends))
+        """
+        spans = collections.OrderedDict()
+        indexes = {}
+
+        pos = self.expect(0, b'{')
+        pos = self.skip_ws(pos + 1)
+        if pos < len(self.buf) and self.buf[pos] == 0x7d:
+            return spans, indexes
+
+        while True:
+            pos = self.expect(pos, b'"')
+            end = self.skip_value(pos)
+            key = self.decode(pos, end)
+            pos = self.expect(end, b':')
+            pos = self.skip_ws(pos + 1)
+
+            if key in indexed and pos < len(self.buf) and self.buf[pos] == 0x5b:
+                end, starts, ends = self.scan_items(pos)
+                indexes[key] = (starts, ends)
+            else:
+                end = self.skip_value(pos)
+            spans[key] = (pos, end)
+
+            pos = self.expect(end, b',}')
+            if self.buf[pos] == 0x7d:
+                break
+            pos += 1
+
+        if self.skip_ws(pos + 1) != len(self.buf):
+            raise self.error(pos + 1, "Extra data")
+        return spans, indexes
+
+    def __getitem__(self, key):
+        if key not in self.values:
+            if key in self.indexes:
+                starts, ends = self.indexes[key]
+                self.values[key] = MeritLazyArray(self, starts, ends)
+            else:
+                start, end = self.spans[key]
+                self.values[key] = self.decode(start, end)
+        return self.values[key]
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def span(self, key):
+        """
+        Byte offsets (start, end) of a top-level value
+        """
+        return self.spans[key]
+
+    def new(self):
+        """
+        Create a Merit object whose resources are built (and their
+        items decoded) only when accessed. The other top-level
+        elements, including contexts, are decoded.
+        """
+        from .base import MeritBase, MeritGlobalBase
+
+        metadata = dict(self.items())
+        cls = MeritBase.find_handler_for_dict(metadata)
+        obj = cls(lazy=True) if issubclass(cls, MeritGlobalBase) else cls()
+        obj.load(metadata)
+        return obj
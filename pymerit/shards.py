@@ -0,0 +1,313 @@
+"""
+Shards
+------
+
+Sharded on-disk layout for global documents with many resources. The
+resources are split into shard files and a manifest holds the other
+elements of the document, including the contexts, and the size and
+checksum of each shard::
+
+    directory/
+        manifest.json
+        shard-<generation>-00000.json
+        shard-<generation>-00001.json
+        ...
+
+Shards are written in parallel (threads) and loaded in parallel
+(processes by default). Each save writes a new generation of shards,
+then atomically replaces the manifest and finally removes the shards
+of the previous generation, so a reader never sees a manifest pointing
+to incomplete shards.
+
+A manifest can be loaded with pymerit.new like any other document.
+"""
+import os
+import re
+import collections
+from .exceptions import *
+from .backends import get_json_backend
+from . import writer
+
+manifest_schema = "manifest:shards:v1"
+"""
+Schema of manifest files
+"""
+
+shard_schema = "shard:resources:v1"
+"""
+Schema of shard files
+"""
+
+manifest_name = "manifest.json"
+
+_shard_name = re.compile(r'shard-[0-9a-f]+-[0-9]+\.json$')
+
+shard_size = 100000
+"""
+Default number of resources per shard
+"""
+
+def is_manifest(metadata):
+    """
+    Check if decoded metadata is a shard manifest
+    """
+    return isinstance(metadata, dict) and metadata.get('schema') == manifest_schema
+
+def is_shard_file(filename):
+    """
+    Check if a file is a shard of a manifest in the same directory,
+    from its name
+    """
+    if _shard_name.match(os.path.basename(filename)) is None:
+        return False
+    return os.path.exists(os.path.join(os.path.dirname(filename), manifest_name))
+
+def is_shard(metadata):
+    """
+    Check if decoded metadata is a shard
+    """
+    return isinstance(metadata, dict) and metadata.get('schema') == shard_schema
+
+class MeritHashingWriter(object):
+    """
+    File handle wrapper that computes the sha256 and size of the content
+    """
+
+    def __init__(self, fp):
+        import hashlib
+        self.fp = fp
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, b):
+        self.hash.update(b)
+        self.size += len(b)
+        return self.fp.write(b)
+
+def write_shard(path, schema, index, dumped, backend=None, fsync=True):
+    """
+    Write one shard file atomically
+
+    :param str path: Shard filename
+    :param str schema: Schema of the global document
+    :param int index: Position of the shard
+    :param dumped: Iterable of dumped resources
+    :rtype: dict
+    :return: Shard entry of the manifest (without the path)
+    """
+    result = {}
+
+    def write(fp):
+        out = MeritHashingWriter(fp)
+        writer.write_json(out, iter([
+            ('schema', shard_schema),
+            ('document', schema),
+            ('index', index),
+            ('resources', dumped),
+        ]), backend=backend)
+        result['size'] = out.size
+        result['sha256'] = out.hash.hexdigest()
+
+    writer.atomic_write(path, write, fsync=fsync)
+    return result
+
+def previous_shards(directory):
+    """
+    Shard filenames listed in the current manifest, if any
+    """
+    filename = os.path.join(directory, manifest_name)
+    try:
+        with open(filename, 'rb') as fd:
+            manifest = get_json_backend().loads(fd.read())
+    except (OSError, ValueError):
+        return []
+    if not is_manifest(manifest):
+        return []
+    return [os.path.join(directory, s['path']) for s in manifest.get('shards', [])]
+
+def save(obj, directory, size=None, max_workers=4, backend=None, fsync=True):
+    """
+    Write a global document as a manifest and shards
+
+    :param MeritGlobalBase obj: Document
+    :param str directory: Output directory. Created if needed.
+    :param int size: Resources per shard. Default is shard_size
+    :param int max_workers: Number of shards written concurrently
+    :param str backend: JSON backend. Default is the global backend
+    :param bool fsync: Flush each file to disk before it is renamed
+    :rtype: str
+    :return: Manifest filename
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from .base import MeritLazyList
+
+    size = size or shard_size
+    if size < 1:
+        raise ValueError("Invalid shard size: {}".format(size))
+
+    obj.validate()
+    os.makedirs(directory, exist_ok=True)
+    old = previous_shards(directory)
+
+    # Everything except the resources goes to the manifest
+    document = []
+    resources = []
+    for k, v in obj.iter_dump():
+        if k == 'resources':
+            resources = obj.metadata['resources']
+            continue
+        if k == 'contexts':
+            v = list(v)
+        document.append((k, v))
+
+    def dump_range(start, end):
+        if isinstance(resources, MeritLazyList):
+            return resources.iter_dump(start, end)
+        return (r.dump() for r in resources[start:end])
+
+    generation = os.urandom(4).hex()
+    ranges = [(i, min(i + size, len(resources)))
+              for i in range(0, len(resources), size)]
+    names = ["shard-{}-{:05d}.json".format(generation, i) for i in range(len(ranges))]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(write_shard, os.path.join(directory, name),
+                                   obj.schema, i, dump_range(start, end),
+                                   backend, fsync)
+                   for i, (name, (start, end)) in enumerate(zip(names, ranges))]
+        try:
+            entries = [f.result() for f in futures]
+        except BaseException:
+            for name in names:
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except OSError:
+                    pass
+            raise
+
+    shards = []
+    for name, (start, end), entry in zip(names, ranges, entries):
+        shards.append([('path', name), ('count', end - start),
+                       ('size', entry['size']), ('sha256', entry['sha256'])])
+
+    manifest = collections.OrderedDict([
+        ('schema', manifest_schema),
+        ('document', collections.OrderedDict(document)),
+        ('count', len(resources)),
+        ('shards', [collections.OrderedDict(s) for s in shards]),
+    ])
+    filename = os.path.join(directory, manifest_name)
+    data = get_json_backend(backend).dumps(manifest, mode="pretty").encode('utf-8')
+    writer.atomic_write(filename, lambda fp: fp.write(data), fsync=fsync)
+
+    # The new manifest is in place, the old generation can go
+    current = set(os.path.join(directory, name) for name in names)
+    for path in old:
+        if path not in current:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    return filename
+
+def read_shard(path, sha256, document, backend=None):
+    """
+    Read, verify and decode one shard (runs in a worker process)
+
+    :rtype: list
+    :return: Raw resource dicts
+    """
+    import hashlib
+
+    with open(path, 'rb') as fd:
+        data = fd.read()
+    if hashlib.sha256(data).hexdigest() != sha256:
+        raise MeritInvalidMetadata("Checksum mismatch: {}".format(path))
+
+    shard = get_json_backend(backend).loads(data)
+    if not is_shard(shard):
+        raise MeritInvalidMetadata("Not a shard: {}".format(path))
+    if shard.get('document') != document:
+        raise MeritInvalidMetadata("Shard of another document: {}".format(path))
+    return shard['resources']
+
+def expand_manifest(manifest, root=".", max_workers=None, pool="process",
+                    backend=None):
+    """
+    Read the shards of a decoded manifest
+
+    :param dict manifest: Decoded manifest
+    :param str root: Directory of the shards
+    :param int max_workers: Number of shards read concurrently
+    :param str pool: process or thread
+    :param str backend: JSON backend name. Default is the global backend
+    :rtype: dict
+    :return: Raw metadata of the document, with its resources
+    """
+    if not is_manifest(manifest):
+        raise MeritInvalidMetadata("Not a shard manifest")
+    if pool not in ["process", "thread"]:
+        raise ValueError("Unsupported pool: {}".format(pool))
+
+    metadata = dict(manifest['document'])
+    shards = manifest.get('shards', [])
+
+    if pool == "process":
+        from concurrent.futures import ProcessPoolExecutor as Executor
+    else:
+        from concurrent.futures import ThreadPoolExecutor as Executor
+
+    resources = []
+    if len(shards) > 0:
+        with Executor(max_workers=max_workers or min(len(shards), os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(read_shard, os.path.join(root, s['path']),
+                                       s['sha256'], metadata.get('schema'), backend)
+                       for s in shards]
+            for s, f in zip(shards, futures):
+                items = f.result()
+                if len(items) != s['count']:
+                    raise MeritInvalidMetadata("Unexpected resource count: {}".format(s['path']))
+                resources.extend(items)
+
+    metadata['resources'] = resources
+    return metadata
+
+def load_manifest(manifest, root=".", lazy=False, max_workers=None,
+                  pool="process", backend=None):
+    """
+    Load a document from a decoded manifest and its shards
+
+    :param dict manifest: Decoded manifest
+    :param str root: Directory of the shards
+    :param bool lazy: Build resource objects only when accessed
+    :param int max_workers: Number of shards read concurrently
+    :param str pool: process or thread
+    :param str backend: JSON backend name. Default is the global backend
+    """
+    from .base import MeritBase
+
+    metadata = expand_manifest(manifest, root, max_workers=max_workers,
+                               pool=pool, backend=backend)
+    cls = MeritBase.find_handler_for_dict(metadata)
+    obj = cls(lazy=True) if lazy else cls()
+    obj.load(metadata)
+    return obj
+
+def load(path, lazy=False, max_workers=None, pool="process", backend=None):
+    """
+    Load a sharded document
+
+    :param str path: Manifest filename or its directory
+    :param bool lazy: Build resource objects only when accessed
+    :param int max_workers: Number of shards read concurrently
+    :param str pool: process or thread
+    :param str backend: JSON backend name. Default is the global backend
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, manifest_name)
+    with open(path, 'rb') as fd:
+        manifest = get_json_backend(backend).loads(fd.read())
+    return load_manifest(manifest, os.path.dirname(os.path.abspath(path)),
+                         lazy=lazy, max_workers=max_workers, pool=pool,
+                         backend=backend)
@@ -0,0 +1,94 @@
+import os
+import asyncio
+import tempfile
+import pytest
+import pymerit
+from pymerit import aio
+
+def run(coro):
+    """
+    Run a coroutine on a new event loop (asyncio.run needs Python 3.7)
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+@pytest.fixture
+def document():
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+    return h
+
+def test_anew_roundtrip(document, tmp_path):
+    """
+    Check async save and load
+    """
+    files = []
+    for i in range(150):
+        path = tmp_path / "file{}.txt".format(i)
+        path.write_text("data")
+        r = pymerit.MeritResourceFile()
+        r.path = str(path)
+        files.append(r)
+    document.add_resources(files)
+
+    filename = str(tmp_path / "metadata.json")
+
+    async def roundtrip():
+        await document.asave(filename, mode="compact")
+        return await pymerit.anew(filename)
+
+    obj = run(roundtrip())
+    assert obj.dump() == document.dump()
+    assert all(not r.is_dirty() for r in obj.metadata['resources'])
+    with open(filename) as fd:
+        assert fd.read() == document.dumps(mode="compact")
+
+def test_avalidate_missing(document, tmp_path):
+    """
+    Check all missing paths are reported together
+    """
+    resources = []
+    for name in ["a", "b", "c"]:
+        r = pymerit.MeritResourceFile()
+        r.path = str(tmp_path / name)
+        resources.append(r)
+    (tmp_path / "b").write_text("data")
+    document.add_resources(resources)
+
+    with pytest.raises(pymerit.MeritMissingPaths) as exc:
+        run(document.avalidate())
+    assert exc.value.paths == [str(tmp_path / "a"), str(tmp_path / "c")]
+    assert not resources[1].is_dirty()
+
+def test_avalidate_resource():
+    """
+    Check async validation of a single resource
+    """
+    r = pymerit.MeritResourceFile()
+    r.path = "/nonexistent/file"
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        run(r.avalidate())
+
+    r.path = "/"
+    run(r.avalidate())
+    assert not r.is_dirty()
+
+def test_anew_executor(document, tmp_path):
+    """
+    Check a caller-provided executor and binary input
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    filename = str(tmp_path / "metadata.bin")
+    with open(filename, "wb") as fd:
+        fd.write(document.dumpb())
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        obj = run(pymerit.anew(filename, executor=executor, lazy=True))
+    assert obj.dump() == document.dump()
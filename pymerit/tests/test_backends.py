@@ -0,0 +1,165 @@
+import json
+import math
+import pytest
+import pymerit
+
+backends = pymerit.available_json_backends()
+
+@pytest.fixture
+def default_merit():
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output é"
+    h.description = "Run output / 1.5"
+    return h
+
+def test_stdlib_available():
+    """
+    Standard library backend is always available; the fastest
+    installed backend is the default
+    """
+    assert 'json' in backends
+    assert pymerit.get_json_backend().name == backends[0]
+
+def test_unknown_backend():
+    """
+    Check unknown backend and mode
+    """
+    with pytest.raises(pymerit.MeritUnknownBackend) as exc:
+        pymerit.get_json_backend("hello")
+
+    with pytest.raises(pymerit.MeritUnknownBackend) as exc:
+        pymerit.get_json_backend("json").dumps({}, mode="hello")
+
+def test_pretty_default(default_merit):
+    """
+    Default output is unchanged
+    """
+    assert default_merit.dumps() == json.dumps(default_merit.dump(), indent=4)
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("mode", pymerit.json_modes)
+def test_roundtrip(default_merit, backend, mode):
+    """
+    Check round trip through every backend and mode
+    """
+    s = default_merit.dumps(mode=mode, backend=backend)
+    assert isinstance(s, bytes if mode == "bytes" else str)
+
+    for loader in backends:
+        h = pymerit.MeritDefault()
+        h.loads(s, backend=loader)
+        assert h.dump() == default_merit.dump()
+
+@pytest.mark.parametrize("value", [float('nan'), float('inf'), 2**64, -2**63 - 1,
+                                   2**64 - 1, -2**63, 1700000000123456789,
+                                   1e16, 1e-7, 1.5e300, None, "/dev/null"])
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("mode", ["compact", "bytes"])
+def test_roundtrip_values(default_merit, backend, mode, value):
+    """
+    Values outside the range of the fast backends read back identically
+    """
+    default_merit.description = "Run output"
+    default_merit.metadata['extra'] = {'value': value, 'list': [value, 1]}
+    s = default_merit.dumps(mode=mode, backend=backend)
+
+    if backend == "orjson" and isinstance(value, float) and not math.isfinite(value):
+        # JSON has no NaN or Infinity
+        default_merit.metadata['extra'] = {'value': None, 'list': [None, 1]}
+    expected = json.dumps(default_merit.dump(), sort_keys=True)
+    for loader in backends:
+        h = pymerit.MeritDefault()
+        h.loads(s, backend=loader)
+        assert json.dumps(h.dump(), sort_keys=True) == expected
+
+def test_stdlib_bytes(monkeypatch):
+    """
+    Bytes are decoded before json.loads, which only accepts str before
+    Python 3.6
+    """
+    from pymerit import backends as module
+    loads = json.loads
+
+    def str_loads(s, **kwargs):
+        if not isinstance(s, str):
+            raise TypeError("the JSON object must be str")
+        return loads(s, **kwargs)
+
+    monkeypatch.setattr(module.json, 'loads', str_loads)
+    backend = pymerit.get_json_backend("json")
+    for data in [b'{"a": "\xc3\xa9"}', bytearray(b'{"a": "\xc3\xa9"}')]:
+        assert backend.loads(data) == {'a': 'é'}
+
+@pytest.mark.parametrize("text", [
+    '[18446744073709551616]', '{"a": -9223372036854775809}',
+    '{"a":\n    123456789012345678901234567890\n}'])
+@pytest.mark.parametrize("backend", backends)
+def test_loads_long_integers(backend, text):
+    """
+    Integers outside the 64-bit range are not read as floats
+    """
+    expected = json.loads(text)
+    b = pymerit.get_json_backend(backend)
+    assert b.loads(text) == expected
+    assert b.loads(text.encode('utf-8')) == expected
+    assert json.dumps(b.loads(text)) == json.dumps(expected)
+
+def test_long_integer_candidates():
+    """
+    Long digit runs in strings, floats and in-range integers are not
+    out of range
+    """
+    from pymerit.backends import has_long_integer
+    assert not has_long_integer(b'{"mtime_ns":1700000000123456789}')
+    assert not has_long_integer(b'[18446744073709551615,-9223372036854775808]')
+    assert not has_long_integer(b'{"sha":"a12345678901234567890123b"}')
+    assert not has_long_integer(b'{"12345678901234567890":"-12345678901234567890"}')
+    assert not has_long_integer(b'[1.12345678901234567890,12345678901234567890e5]')
+    assert has_long_integer(b'18446744073709551616')
+    assert has_long_integer(b'[1, -9223372036854775809]')
+
+@pytest.mark.parametrize("backend", backends)
+def test_new_default_dumps(default_merit, tmpdir, backend):
+    """
+    Documents written by the default dumps() load with any backend
+    """
+    default_merit.metadata['extra'] = [float('nan'), 2**70, 1e16]
+    filename = str(tmpdir.join("merit.json"))
+    with open(filename, 'w') as fd:
+        fd.write(default_merit.dumps())
+
+    pymerit.set_json_backend(backend)
+    try:
+        with open(filename) as fd:
+            obj = pymerit.new(fd)
+        assert obj.metadata['extra'][1] == 2**70
+        assert json.dumps(obj.dump()) == json.dumps(default_merit.dump())
+    finally:
+        pymerit.set_json_backend(None)
+
+@pytest.mark.parametrize("backend", backends)
+def test_identical_compact(default_merit, backend):
+    """
+    Compact output is identical across backends
+    """
+    expected = default_merit.dumps(mode="compact", backend="json")
+    assert default_merit.dumps(mode="compact", backend=backend) == expected
+
+@pytest.mark.parametrize("backend", backends)
+def test_global_backend(default_merit, tmpdir, backend):
+    """
+    Check global backend selection
+    """
+    pymerit.set_json_backend(backend)
+    try:
+        assert pymerit.get_json_backend().name == backend
+        filename = str(tmpdir.join("merit.json"))
+        with open(filename, 'w') as fd:
+            fd.write(default_merit.dumps(mode="compact"))
+        with open(filename) as fd:
+            obj = pymerit.new(fd)
+        assert obj.dump() == default_merit.dump()
+    finally:
+        pymerit.set_json_backend(None)
@@ -0,0 +1,14 @@
+import pytest
+from benchmarks import suite
+
+def test_suite_smoke():
+    """
+    Run the benchmark suite on a tiny document and compare with itself
+    """
+    results = suite.run(sizes=[5], handlers=2, repeat=1)
+    assert sorted(r['op'] for r in results['results']) == sorted(suite.operations)
+    assert all(r['peak_bytes'] >= 0 for r in results['results'])
+
+    rows = suite.compare(results, results)
+    assert len(rows) == len(suite.operations)
+    assert not any(r[-1] for r in rows)
@@ -0,0 +1,69 @@
+import io
+import pytest
+import pymerit
+from pymerit import binary
+
+def make_document(count):
+    return {
+        "schema": "global:default:v1",
+        "namespace": "test",
+        "path": "project=alpha/run=20134",
+        "name": "Run output",
+        "description": "Run output",
+        "contexts": [],
+        "resources": [
+            {
+                "schema": "resource:filebase:v1",
+                "name": "File",
+                "description": "File saved on disk",
+                "path": "/data/part-{:05d}.parquet".format(i),
+                "attributes": {"size": i * 1000, "rows": i, "extension": ".parquet"}
+            }
+            for i in range(count)
+        ]
+    }
+
+@pytest.mark.parametrize("value", [
+    None, True, False, 0, 127, 128, -1, -300, 2 ** 70, -2 ** 70,
+    1.5, -0.0, float("inf"), "", "héllo ✓", [], {}, [1, [2, {"a": None}]],
+    {"a": {"b": ["a", "a", "b"]}, "é": 3.25}
+])
+def test_binary_values(value):
+    """
+    Check round trip of JSON-compatible values
+    """
+    assert binary.decode(binary.encode(value)) == value
+
+def test_binary_errors():
+    """
+    Check invalid input
+    """
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        binary.encode({1: "a"})
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        binary.encode({"a": object()})
+
+    data = binary.encode(make_document(3))
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        binary.decode(data[:-5])
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        binary.decode(b"{}")
+
+def test_binary_document():
+    """
+    Check documents round trip and are smaller than compact JSON
+    """
+    metadata = make_document(100)
+    obj = pymerit.new(metadata, lazy=True)
+    data = obj.dumpb()
+    assert binary.is_binary(data)
+    assert len(data) < len(obj.dumps(mode="compact")) / 2
+
+    assert pymerit.new(data, lazy=True).dump() == obj.dump()
+    assert pymerit.new(io.BytesIO(data), mode="binary", lazy=True).dump() == obj.dump()
+
+    h = pymerit.MeritDefault(lazy=True)
+    h.loadb(data)
+    assert h.dump() == obj.dump()
@@ -0,0 +1,163 @@
+import os
+import pytest
+import pymerit
+from pymerit.catalog import MeritCatalog
+
+def write_run(tmpdir, run, resources):
+    """
+    Write a run document referencing resources
+    """
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run={}".format(run)
+    h.name = "Run {}".format(run)
+    h.description = "Run output"
+    for path in resources:
+        r = pymerit.MeritResourceFile()
+        r.path = path
+        h.add_resource(r)
+    filename = tmpdir.join("runs", "run-{}.json".format(run))
+    filename.write(h.dumps(), ensure=True)
+    return str(filename)
+
+@pytest.fixture
+def runs(tmpdir):
+    data = [str(tmpdir.join("part-{}".format(i))) for i in range(3)]
+    for p in data:
+        open(p, 'w').close()
+    return [write_run(tmpdir, 1, data[:2]), write_run(tmpdir, 2, data[2:])], data
+
+def test_catalog_query(tmpdir, runs):
+    """
+    Find the run that produced a file
+    """
+    files, data = runs
+    with MeritCatalog(str(tmpdir.join("catalog.db"))) as c:
+        summary = c.build([str(tmpdir.join("runs"))])
+        assert summary == {'indexed': 2, 'skipped': 0, 'failed': 0, 'removed': 0}
+
+        rows = c.query(resource=data[2])
+        assert [r[0] for r in rows] == [files[1]]
+        assert rows[0][1:] == ("global:default:v1", "test", "project=alpha/run=2", "Run 2")
+
+        assert len(c.query(namespace="test")) == 2
+        assert len(c.query(context={'pid': os.getpid()})) == 2
+        assert c.query(context={'node': 'nonexistent'}) == []
+        assert [r[2] for r in c.resources(files[0])] == data[:2]
+
+def test_catalog_incremental(tmpdir, runs):
+    """
+    Only changed documents are indexed again
+    """
+    files, data = runs
+    dbfile = str(tmpdir.join("catalog.db"))
+    with MeritCatalog(dbfile) as c:
+        c.build(files)
+
+    write_run(tmpdir, 2, data)
+    tmpdir.join("runs", "broken.json").write("{")
+    with MeritCatalog(dbfile) as c:
+        summary = c.build([str(tmpdir.join("runs"))])
+        assert summary == {'indexed': 1, 'skipped': 1, 'failed': 1, 'removed': 0}
+        assert [r[0] for r in c.query(resource=data[0])] == files
+
+def test_catalog_invalid_fields(tmpdir, runs):
+    """
+    A document with non-scalar fields fails alone
+    """
+    files, data = runs
+    tmpdir.join("runs", "bad.json").write(
+        '{"schema": "global:default:v1", "namespace": {"a": 1}, "resources": []}')
+    with MeritCatalog(str(tmpdir.join("catalog.db"))) as c:
+        summary = c.build([str(tmpdir.join("runs"))])
+        assert summary == {'indexed': 2, 'skipped': 0, 'failed': 1, 'removed': 0}
+        assert len(c.query(namespace="test")) == 2
+
+def test_catalog_removed(tmpdir, runs):
+    """
+    Documents deleted under the scanned paths are dropped
+    """
+    files, data = runs
+    dbfile = str(tmpdir.join("catalog.db"))
+    with MeritCatalog(dbfile) as c:
+        c.build([str(tmpdir.join("runs"))])
+
+    os.unlink(files[1])
+    with MeritCatalog(dbfile) as c:
+        summary = c.build([str(tmpdir.join("runs"))])
+        assert summary == {'indexed': 0, 'skipped': 1, 'failed': 0, 'removed': 1}
+        assert c.query(resource=data[2]) == []
+        assert len(c.query(resource=data[0])) == 1
+
+def test_catalog_atomic(tmpdir, runs, monkeypatch):
+    """
+    Context pool entries are committed with the build, not before
+    """
+    files, data = runs
+    with open(files[0]) as fd:
+        h = pymerit.new(fd)
+    h.context_refs = "table"
+    tmpdir.join("runs", "run-1.json").write(h.dumps())
+
+    dbfile = str(tmpdir.join("catalog.db"))
+    with MeritCatalog(dbfile) as c:
+        insert = c.insert
+        def failing(filename, *args):
+            if filename == files[1]:
+                raise RuntimeError("interrupted")
+            return insert(filename, *args)
+        monkeypatch.setattr(c, 'insert', failing)
+        with pytest.raises(RuntimeError):
+            c.build(files)
+
+    with MeritCatalog(dbfile) as c:
+        assert c.conn.execute("SELECT COUNT(*) FROM context_pool").fetchone()[0] == 0
+        assert c.query() == []
+
+def test_catalog_unreadable(tmpdir, runs, monkeypatch):
+    """
+    Unreadable documents are counted as failed
+    """
+    import pymerit.catalog
+    files, data = runs
+
+    def denied(filename, *args):
+        if filename == files[0]:
+            raise PermissionError(filename)
+        return open(filename, *args)
+    monkeypatch.setattr(pymerit.catalog, 'open', denied, raising=False)
+
+    with MeritCatalog(str(tmpdir.join("catalog.db"))) as c:
+        summary = c.build(files)
+        assert summary == {'indexed': 1, 'skipped': 0, 'failed': 1, 'removed': 0}
+
+def test_catalog_stale(tmpdir, runs):
+    """
+    A changed document that fails or becomes a shard is no longer
+    returned with its previous content
+    """
+    from pymerit import shards
+    files, data = runs
+    dbfile = str(tmpdir.join("catalog.db"))
+    with MeritCatalog(dbfile) as c:
+        c.build(files)
+
+    tmpdir.join("runs", "run-1.json").write("{")
+    tmpdir.join("runs", "run-2.json").write(
+        '{"schema": "%s", "resources": []}' % shards.shard_schema)
+    with MeritCatalog(dbfile) as c:
+        summary = c.build(files)
+        assert summary == {'indexed': 0, 'skipped': 0, 'failed': 1, 'removed': 1}
+        assert c.query() == []
+
+@pytest.mark.parametrize("key", ["contexts", "resources"])
+def test_catalog_not_list(tmpdir, runs, key):
+    """
+    A document whose contexts or resources is not a list fails alone
+    """
+    files, data = runs
+    tmpdir.join("runs", "bad.json").write(
+        '{"schema": "global:default:v1", "namespace": "test", "%s": 1}' % key)
+    with MeritCatalog(str(tmpdir.join("catalog.db"))) as c:
+        summary = c.build([str(tmpdir.join("runs"))])
+        assert summary == {'indexed': 2, 'skipped': 0, 'failed': 1, 'removed': 0}
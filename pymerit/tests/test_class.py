@@ -54,3 +54,184 @@ def test_duplicate():
         pymerit.schema_register(HelloMerit2)
         
     pymerit.schema_unregister(HelloMerit1) 
+
+def test_multiple_schemas():
+    """
+    Test registry index for a class with a list of schemas
+    """
+
+    class HelloMerit3(pymerit.MeritBase):
+        schema = ['hello:a:v1', 'hello:b:v1']
+        def initialize(self):
+            pass
+
+    pymerit.schema_register(HelloMerit3)
+    assert pymerit.find_handler('hello:a:v1') is HelloMerit3
+    assert pymerit.find_handler('hello:b:v1') is HelloMerit3
+    assert pymerit.MeritBase.schema_get(['unknown', 'hello:b:v1']) is HelloMerit3
+
+    summary = pymerit.MeritBase.schema_list()
+    assert [row[0] for row in summary].count('hello:a:v1') == 1
+
+    pymerit.schema_unregister(HelloMerit3)
+    with pytest.raises(pymerit.MeritNoHandler) as exc:
+        pymerit.find_handler('hello:b:v1')
+
+def test_field_hooks():
+    """
+    Test precomputed dump/load/validate hooks
+    """
+
+    class HelloMerit4(pymerit.MeritBase):
+        schema = 'hello:hooks:v1'
+        def initialize(self):
+            self.metadata = {'name': 'x', 'description': 'y', 'count': 1}
+            self.order = ['count']
+            self.required = ['name', 'description', 'count']
+        def dump_count(self, v):
+            return str(v)
+        @staticmethod
+        def load_count(v):
+            return int(v)
+        def validate_count(self, v):
+            if v < 0:
+                raise pymerit.MeritInvalidMetadata("Negative count")
+
+    assert set(HelloMerit4._dump_hooks) == {'count'}
+    assert 'schema' not in HelloMerit4._validate_hooks
+
+    h = HelloMerit4()
+    d = h.dump()
+    assert list(d.keys()) == ['schema', 'count', 'name', 'description']
+    assert d['count'] == '1'
+    assert h.order == ['count']
+
+    h.load(d)
+    assert h.metadata['count'] == 1
+
+    d['count'] = '-1'
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        h.load(d)
+
+def test_slots():
+    """
+    Built-in handlers share the class-level field names and accept
+    ad-hoc attributes
+    """
+    r = pymerit.MeritResourceFile()
+    assert r._specs is None
+    assert r.required == ('name', 'description', 'path', 'attributes')
+    assert r.required == ['name', 'description', 'path', 'attributes']
+    assert pymerit.MeritResourceFile.required == ('name', 'description', 'path', 'attributes')
+
+    r.tag = 1
+    assert r.tag == 1
+
+def test_required_extend():
+    """
+    Old-style handlers extend required/order in initialize() without
+    affecting the class or other instances
+    """
+
+    class HelloMerit6(pymerit.MeritResourceBase):
+        schema = 'hello:extend:v1'
+        def initialize(self, *args, **kwargs):
+            self.metadata = {'name': 'x', 'description': 'y', 'count': 1}
+            self.required.extend(['count'])
+            self.order.append('count')
+
+    h = HelloMerit6()
+    assert h.required == ['name', 'description', 'count']
+    assert list(h.dump().keys()) == ['schema', 'count', 'name', 'description']
+    assert HelloMerit6.required == ('name', 'description')
+    assert pymerit.MeritResourceBase.required == ('name', 'description')
+    assert pymerit.MeritResourceBase().required == ['name', 'description']
+
+    del h.metadata['count']
+    with pytest.raises(pymerit.MeritInvalidMetadata):
+        h.validate()
+
+def test_compact_record():
+    """
+    Compact metadata storage behaves like a dict
+    """
+
+    class HelloMerit5(pymerit.MeritResourceFile):
+        schema = 'hello:compact:v1'
+        compact = True
+
+    spec = {
+        "schema": "hello:compact:v1",
+        "name": "File",
+        "description": "File saved on disk",
+        "path": "/",
+        "attributes": {},
+        "extra": 1
+    }
+
+    r = HelloMerit5()
+    assert isinstance(r.metadata, pymerit.MeritRecord)
+    assert 'path' not in r.metadata
+    r.load(spec)
+    assert isinstance(r.metadata, pymerit.MeritRecord)
+    assert r.metadata == spec
+    assert list(r.dump().items()) == list(spec.items())
+
+    r.path = "/tmp"
+    del r.metadata['extra']
+    assert r.metadata.get('extra') is None
+    assert len(r.metadata) == 5
+    with pytest.raises(KeyError) as exc:
+        del r.metadata['missing']
+
+class HelloCompact(pymerit.MeritResourceFile):
+    schema = 'hello:pickle:v1'
+    compact = True
+
+def test_pickle_weakref(tmp_path):
+    """
+    Handlers, including compact ones, can be pickled and weakly
+    referenced
+    """
+    import pickle
+    import weakref
+
+    tf = tmp_path / "file.txt"
+    tf.write_text("data")
+    for cls in [pymerit.MeritResourceFile, HelloCompact]:
+        r = cls()
+        r.name = "File"
+        r.description = "File saved on disk"
+        r.path = str(tf)
+        r.attributes = {'size': 4}
+        copy = pickle.loads(pickle.dumps(r))
+        assert type(copy.metadata) is type(r.metadata)
+        assert copy.dump() == r.dump()
+        assert weakref.ref(r)() is r
+
+def test_init_without_super():
+    """
+    Handlers that override __init__ without calling it still load
+    """
+
+    class HelloMerit7(pymerit.MeritDefault):
+        schema = 'hello:init:v1'
+        def __init__(self, *args, **kwargs):
+            self.metadata = {}
+            self.required = ['namespace', 'path', 'name', 'description',
+                             'contexts', 'resources']
+            self.order = []
+
+    h = HelloMerit7()
+    assert h.lazy is False
+    h.load({
+        'schema': 'hello:init:v1',
+        'namespace': 'test',
+        'path': 'a',
+        'name': 'A',
+        'description': 'A',
+        'contexts': [],
+        'resources': [],
+    })
+    assert h.namespace == 'test'
+    assert h.metadata['resources'] == []
@@ -0,0 +1,111 @@
+import math
+import array
+import pytest
+import pymerit
+from pymerit.columnar import MeritColumns, get_numpy
+
+backends = [False] + ([True] if get_numpy() is not None else [])
+
+@pytest.fixture
+def document(tmp_path):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+
+    resources = []
+    for i, ext in enumerate(['csv', 'json', 'csv', 'txt', 'CSV']):
+        tf = tmp_path / "file{}.{}".format(i, ext)
+        tf.write_text("data")
+        r = pymerit.MeritResourceFile()
+        r.path = str(tf)
+        r.attributes = {'size': (i + 1) * 10, 'rows': i, 'nested': {'a': 1}}
+        if i != 3:
+            r.attributes['ratio'] = i / 2
+        resources.append(r)
+    h.add_resources(resources)
+    return h
+
+@pytest.mark.parametrize("use_numpy", backends)
+def test_columns(document, use_numpy):
+    """
+    Check the columns and their types
+    """
+    columns = document.columns(use_numpy=use_numpy)
+    assert len(columns) == 5
+    assert columns.names() == ['path', 'schema', 'name', 'size', 'rows', 'ratio']
+    assert 'nested' not in columns
+    assert list(columns['schema']) == [pymerit.MeritResourceFile.schema] * 5
+    assert list(columns['size']) == [10, 20, 30, 40, 50]
+    assert math.isnan(columns['ratio'][3])
+    if not use_numpy:
+        assert isinstance(columns['size'], array.array)
+        assert columns['size'].typecode == 'q'
+        assert columns['ratio'].typecode == 'd'
+    else:
+        assert columns['size'].dtype.kind == 'i'
+
+    with pytest.raises(KeyError):
+        columns['missing']
+
+@pytest.mark.parametrize("use_numpy", backends)
+def test_aggregates(document, use_numpy):
+    """
+    Check sum, group by extension and top k
+    """
+    columns = document.columns(use_numpy=use_numpy)
+    assert columns.sum('size') == 150
+    assert columns.sum('ratio') == 3.5
+    assert columns.count('ratio') == 4
+    assert columns.group_by_extension() == {'.csv': 3, '.json': 1, '.txt': 1}
+    assert columns.group_by_extension('size') == {'.csv': 90, '.json': 20, '.txt': 40}
+
+    top = columns.top_k('size', 2)
+    assert [v for p, v in top] == [50, 40]
+    assert top[0][0].endswith("file4.CSV")
+    assert [v for p, v in columns.top_k('ratio', 10)] == [2.0, 1.0, 0.5, 0.0]
+
+    with pytest.raises(TypeError):
+        columns.sum('path')
+
+@pytest.mark.parametrize("use_numpy", backends)
+def test_columns_lazy(document, tmp_path, use_numpy):
+    """
+    Resources of lazy documents and readers are not materialized
+    """
+    filename = str(tmp_path / "metadata.json")
+    document.save(filename)
+
+    with open(filename) as fd:
+        obj = pymerit.new(fd, lazy=True)
+    obj.metadata['resources'][1].attributes['size'] = 1000
+    columns = obj.columns(use_numpy=use_numpy)
+    assert columns.sum('size') == 1130
+    assert len(list(obj.metadata['resources'].loaded())) == 1
+
+    with pymerit.MeritReader(filename) as reader:
+        columns = MeritColumns.from_resources(reader['resources'], attributes=['size', 'path'],
+                                              use_numpy=use_numpy)
+        assert columns.names() == ['path', 'schema', 'name', 'size', 'attributes.path']
+        assert columns.top_k('size', 1)[0][1] == 50
+        assert list(columns['attributes.path']) == [None] * 5
+
+@pytest.mark.parametrize("use_numpy", backends)
+def test_columns_dicts(use_numpy):
+    """
+    Check raw dicts with S3 paths and mixed attribute types
+    """
+    resources = [
+        {'schema': 'resource:s3file:v1', 's3path': 's3://bucket/a.parquet',
+         'attributes': {'size': 1, 'kind': 'x', 'flag': True}},
+        {'schema': 'resource:s3file:v1', 's3path': 's3://bucket/b.parquet',
+         'attributes': {'size': 2.5, 'kind': None, 'flag': False}},
+    ]
+    columns = MeritColumns.from_resources(resources, use_numpy=use_numpy)
+    assert list(columns['path']) == ['s3://bucket/a.parquet', 's3://bucket/b.parquet']
+    assert list(columns['size']) == [1.0, 2.5]
+    assert list(columns['kind']) == ['x', None]
+    assert list(columns['flag']) == [True, False]
+    assert columns.group_by('kind') == {'x': 1, None: 1}
+    assert columns.group_by_extension('size') == {'.parquet': 3.5}
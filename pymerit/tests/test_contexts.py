@@ -64,3 +64,22 @@ def test_default_contexts_invalid_5(default_merit):
         
     assert "Missing: description" in str(exc) 
 
+
+def test_add_contexts_deferred(default_merit):
+    """
+    Check bulk add of contexts defers validation
+    """
+
+    class Context(pymerit.MeritContextBase):
+        schema = "Hello"
+
+    default_merit.add_contexts([pymerit.MeritContextProcess(), Context()])
+    assert len(default_merit.metadata['contexts']) == 4
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        default_merit.validate()
+
+    assert "Missing: name" in str(exc)
+
+    with pytest.raises(pymerit.MeritInvalidContext) as exc:
+        default_merit.add_contexts([None])
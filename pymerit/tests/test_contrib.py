@@ -1,3 +1,6 @@
+import os
+import json
+import platform
 import pytest
 import pymerit
 
@@ -17,3 +20,43 @@ def test_contrib_process():
     h.validate()     
     
     
+
+def test_contrib_cached(monkeypatch):
+    """
+    Host facts are captured once per process
+    """
+    pymerit.MeritContextPlatform()
+
+    def fail():
+        raise AssertionError("platform probed again")
+
+    monkeypatch.setattr(platform, "platform", fail)
+    h = pymerit.MeritContextPlatform()
+    assert h.metadata['platform'] == pymerit.host_facts()['platform']
+
+    pymerit.clear_context_cache()
+    with pytest.raises(AssertionError) as exc:
+        pymerit.MeritContextPlatform()
+    monkeypatch.undo()
+    pymerit.clear_context_cache()
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+def test_contrib_fork():
+    """
+    pid and ppid are refreshed in a forked child
+    """
+    parent = pymerit.MeritContextProcess()
+    assert parent.metadata['pid'] == os.getpid()
+
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        child = pymerit.MeritContextProcess()
+        os.write(wfd, json.dumps([child.metadata['pid'], child.metadata['ppid']]).encode())
+        os._exit(0)
+
+    os.close(wfd)
+    os.waitpid(pid, 0)
+    result = json.loads(os.read(rfd, 1024).decode())
+    os.close(rfd)
+    assert result == [pid, os.getpid()]
@@ -0,0 +1,83 @@
+import os
+import hashlib
+import pytest
+import pymerit
+from pymerit import digest
+
+@pytest.fixture
+def files(tmpdir):
+    paths = []
+    for i in range(5):
+        p = tmpdir.join("part-{}".format(i))
+        p.write_binary(b"hello" * (i + 1))
+        paths.append(str(p))
+    return paths
+
+@pytest.fixture
+def default_merit(files):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+    for path in files:
+        r = pymerit.MeritResourceFile()
+        r.path = path
+        h.add_resource(r)
+    return h
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_hash_file(files, use_mmap):
+    """
+    Chunked and memory-mapped hashing agree with hashlib
+    """
+    result = digest.hash_file(files[2], ('sha256', 'blake2b'), use_mmap=use_mmap)
+    content = open(files[2], 'rb').read()
+    assert result['sha256'] == hashlib.sha256(content).hexdigest()
+    assert result['blake2b'] == hashlib.blake2b(content).hexdigest()
+
+def test_unknown_algorithm(files):
+    """
+    Check unknown algorithm
+    """
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        digest.file_digest(files[0], ['hello'])
+
+def test_resource_digest(files):
+    """
+    Check digest record of a single resource
+    """
+    r = pymerit.MeritResourceFile()
+    r.path = files[0]
+    record = r.compute_digest()
+    assert record['size'] == 5
+    assert record['mtime_ns'] == os.stat(files[0]).st_mtime_ns
+    assert r.dump()['digest'] == record
+
+def test_digest_cache(files, tmpdir, monkeypatch):
+    """
+    Unchanged files are not hashed again
+    """
+    cache = pymerit.MeritDigestCache(str(tmpdir.join("digests.db")))
+    first = digest.file_digests(files, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("File hashed again")
+
+    monkeypatch.setattr(digest, "hash_file", fail)
+    cache = pymerit.MeritDigestCache(str(tmpdir.join("digests.db")))
+    assert digest.file_digests(files, cache=cache) == first
+
+def test_add_verify_digests(default_merit, files):
+    """
+    Check parallel digests and verification
+    """
+    default_merit.add_digests(algorithms=['sha256', 'blake2b'], max_workers=3)
+    obj = pymerit.new(default_merit.dump(), lazy=True)
+    assert obj.verify_digests() == []
+
+    with open(files[1], 'wb') as fd:
+        fd.write(b"changed")
+    os.remove(files[3])
+    failures = obj.verify_digests(max_workers=1)
+    assert sorted(failures) == [(files[1], 'size'), (files[3], 'missing')]
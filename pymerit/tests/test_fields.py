@@ -0,0 +1,157 @@
+import json
+import pytest
+import pymerit
+from pymerit import Field
+
+class ResourceTyped(pymerit.MeritResourceBase):
+    schema = "resource:typed:v1"
+
+    __slots__ = ()
+
+    fields = {
+        'rows': Field(int),
+        'ratio': Field((int, float), required=False),
+        'url': Field(str, pattern=r'^https?://', required=False),
+        'columns': Field(list, required=False, schema={
+            'name': Field(str),
+            'dtype': Field(str, required=False),
+        }),
+    }
+
+    def initialize(self, *args, **kwargs):
+        self.metadata = {
+            'name': 'Table',
+            'description': 'Typed table',
+            'rows': 10,
+        }
+
+    def validate_rows(self, rows):
+        if rows < 0:
+            raise pymerit.MeritInvalidMetadata("Negative rows")
+
+def test_fields_required():
+    """
+    Check required fields extend the required elements
+    """
+    assert ResourceTyped.required == ('name', 'description', 'rows')
+    assert 'url' not in ResourceTyped.required
+    assert set(ResourceTyped._fields) >= {'name', 'description', 'rows'}
+
+    r = ResourceTyped()
+    r.validate()
+    del r.metadata['rows']
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+    assert "Missing: rows" in str(exc)
+
+@pytest.mark.parametrize("field,value", [
+    ('rows', "10"),
+    ('rows', True),
+    ('name', 1),
+    ('ratio', "0.5"),
+    ('url', "ftp://host"),
+    ('columns', {'name': 'a'}),
+    ('columns', [{'dtype': 'int'}]),
+    ('columns', [{'name': 1}]),
+])
+def test_fields_invalid(field, value):
+    """
+    Check type, pattern and nested checks
+    """
+    r = ResourceTyped()
+    r.metadata[field] = value
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+    assert field in str(exc)
+
+def test_fields_valid():
+    """
+    Check valid optional and nested values
+    """
+    r = ResourceTyped()
+    r.metadata['ratio'] = 1
+    r.metadata['url'] = "https://host/table"
+    r.metadata['columns'] = [{'name': 'a'}, {'name': 'b', 'dtype': 'int'}]
+    r.validate()
+
+    r.metadata['rows'] = -1
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+    assert "Negative rows" in str(exc)
+
+def test_fields_contrib():
+    """
+    Check the types of the standard elements
+    """
+    r = pymerit.MeritResourceS3File()
+    r.metadata['s3path'] = ["s3://bucket/key"]
+    r.metadata['attributes'] = {}
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+
+    for s3path in ["s3://bucket/key", "s3a://bucket/key", "s3n://bucket/key"]:
+        r.metadata['s3path'] = s3path
+        r.validate()
+
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = ["not", "a", "string"]
+    h.name = "Run"
+    h.description = "Run"
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        h.dump()
+
+def test_fields_invalid_spec():
+    """
+    Check errors in field specs
+    """
+    with pytest.raises(pymerit.MeritInvalidSchema) as exc:
+        Field("string")
+
+    with pytest.raises(pymerit.MeritInvalidSchema) as exc:
+        Field(dict, schema={'a': str})
+
+    with pytest.raises(pymerit.MeritInvalidSchema) as exc:
+        class Resource(pymerit.MeritResourceBase):
+            schema = "resource:badfields:v1"
+            fields = {'rows': int}
+
+def test_json_schema_export():
+    """
+    Check JSON Schema export
+    """
+    doc = ResourceTyped.json_schema()
+    json.dumps(doc)
+    assert doc['title'] == 'ResourceTyped'
+    assert doc['properties']['schema'] == {'const': "resource:typed:v1"}
+    assert doc['required'] == ['schema', 'name', 'description', 'rows']
+    assert doc['properties']['rows'] == {'type': 'integer'}
+    assert doc['properties']['ratio'] == {'type': ['integer', 'number']}
+    assert doc['properties']['url']['pattern'] == '^https?://'
+    columns = doc['properties']['columns']
+    assert columns['type'] == 'array'
+    assert columns['items']['required'] == ['name']
+
+def test_json_schema_import():
+    """
+    Check fields imported from JSON Schema validate the same way
+    """
+    fields = pymerit.from_json_schema(ResourceTyped.json_schema())
+    assert fields['rows'].required
+    assert not fields['url'].required
+    assert float in fields['ratio'].type
+    assert 'name' in fields['columns'].schema
+
+    class ResourceImported(pymerit.MeritResourceBase):
+        schema = "resource:imported:v1"
+
+    ResourceImported.fields = fields
+    ResourceImported.compile_plan()
+
+    r = ResourceImported()
+    r.metadata.update(name="Table", description="Imported", rows=3)
+    r.validate()
+
+    r.metadata['columns'] = [{'dtype': 'int'}]
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import pytest
+import pymerit
+
+def test_stat_cache():
+    """
+    Check stat results are cached until they expire
+    """
+    cache = pymerit.MeritStatCache(ttl=60)
+    tf = tempfile.NamedTemporaryFile()
+    assert pymerit.path_exists(tf.name, cache=cache)
+    tf.close()
+    assert pymerit.path_exists(tf.name, cache=cache)
+    assert not pymerit.path_exists(tf.name, cache=None)
+
+    cache.ttl = -1
+    cache.clear()
+    assert not pymerit.path_exists(tf.name, cache=cache)
+
+def test_stat_paths(tmpdir):
+    """
+    Check parallel stat of many paths
+    """
+    paths = []
+    for i in range(10):
+        p = tmpdir.join("part-{}".format(i))
+        p.write("x" * i)
+        paths.append(str(p))
+    paths.append(str(tmpdir.join("missing")))
+
+    stats = pymerit.stat_paths(paths, max_workers=4,
+                               cache=pymerit.MeritStatCache())
+    assert len(stats) == 11
+    assert stats[paths[-1]] is None
+    assert stats[paths[3]].st_size == 3
+
+@pytest.fixture
+def tree(tmpdir):
+    for name in ["a.parquet", "b.csv", "sub/c.parquet", "sub/_SUCCESS", "sub/deep/d.parquet"]:
+        tmpdir.join(name).write("x" * len(name), ensure=True)
+    return tmpdir
+
+def test_scan_directory(tree):
+    """
+    Check directory walk with globs
+    """
+    root = str(tree)
+    relpaths = lambda paths: [os.path.relpath(p, root) for p in paths]
+
+    assert relpaths(pymerit.scan_directory(root)) == [
+        "a.parquet", "b.csv", "sub/_SUCCESS", "sub/c.parquet", "sub/deep/d.parquet"]
+    assert relpaths(pymerit.scan_directory(root, include=["*.parquet"],
+                                           exclude=["sub/deep/*"])) == [
+        "a.parquet", "sub/c.parquet"]
+    assert relpaths(pymerit.scan_directory(root, recursive=False)) == [
+        "a.parquet", "b.csv"]
+
+def test_scan_relative(tree, monkeypatch):
+    """
+    Paths are absolute when the root is relative
+    """
+    monkeypatch.chdir(str(tree.join("sub")))
+    assert list(pymerit.scan_directory("deep")) == [str(tree.join("sub", "deep", "d.parquet"))]
+    assert [p for p, st in pymerit.scan_files(".", include=["*.parquet"])] == [
+        str(tree.join("sub", "c.parquet")), str(tree.join("sub", "deep", "d.parquet"))]
+
+def test_add_directory(tree):
+    """
+    Check bulk resources from a directory
+    """
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+    resources = h.add_directory(str(tree), exclude=["*_SUCCESS"], max_workers=2)
+    assert len(resources) == 4
+
+    attributes = h.dump()['resources'][0]['attributes']
+    assert attributes['size'] == len("a.parquet")
+    assert attributes['extension'] == ".parquet"
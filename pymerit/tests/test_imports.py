@@ -0,0 +1,13 @@
+import sys
+import pytest
+from benchmarks import importtime
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7")
+def test_import_lazy():
+    """
+    Importing pymerit does not load optional or heavy modules, and
+    stays within a (generous) import time budget
+    """
+    result = importtime.measure(repeat=3)
+    assert result['loaded'] == []
+    assert result['microseconds'] < 5 * importtime.budget_ms * 1000
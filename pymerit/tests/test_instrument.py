@@ -0,0 +1,68 @@
+import tempfile
+import pytest
+import pymerit
+
+@pytest.fixture
+def stats():
+    pymerit.reset_stats()
+    pymerit.enable_stats()
+    yield
+    pymerit.disable_stats()
+    pymerit.reset_stats()
+
+def make_merit():
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+    return h
+
+def test_stats_disabled():
+    """
+    Nothing is recorded by default
+    """
+    pymerit.reset_stats()
+    make_merit().dumps()
+    assert pymerit.stats() == {}
+
+def test_stats(stats):
+    """
+    Phases are recorded per schema
+    """
+    tf = tempfile.NamedTemporaryFile()
+    h = make_merit()
+    r = pymerit.MeritResourceFile()
+    r.path = tf.name
+    h.add_resource(r)
+
+    s = h.dumps()
+    pymerit.new(pymerit.get_json_backend().loads(s))
+
+    result = pymerit.stats()
+    for phase in ['dump', 'validate', 'encode', 'lookup', 'load', 'stat', 'validate_path']:
+        assert phase in result, phase
+
+    assert result['dump']['global:default:v1']['count'] == 1
+    assert result['dump']['resource:filebase:v1']['count'] == 1
+    assert result['lookup']['resource:filebase:v1']['count'] == 1
+    assert result['validate_path']['resource:filebase:v1']['seconds'] >= 0
+    tf.close()
+
+    pymerit.reset_stats()
+    assert pymerit.stats() == {}
+
+def test_stats_hook(stats):
+    """
+    Hooks receive every measurement
+    """
+    seen = []
+    hook = lambda phase, schema, seconds: seen.append((phase, schema))
+    pymerit.add_stats_hook(hook)
+    try:
+        make_merit().dump()
+    finally:
+        pymerit.remove_stats_hook(hook)
+
+    assert ('dump', 'global:default:v1') in seen
+    assert ('validate', 'context:platform:v1') in seen
@@ -0,0 +1,181 @@
+import json
+import pytest
+import pymerit
+from pymerit import pool
+from pymerit.catalog import MeritCatalog
+
+@pytest.fixture
+def document():
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+    return h
+
+@pytest.fixture
+def shared():
+    p = pool.MeritContextPool()
+    yield p
+    pool.set_context_pool(None)
+
+def test_context_ref():
+    """
+    Check content addresses ignore key order
+    """
+    a = pool.context_ref({'schema': 'x', 'a': 1, 'b': [1, 2]})
+    b = pool.context_ref({'b': [1, 2], 'a': 1, 'schema': 'x'})
+    assert a == b
+    assert a.startswith("sha256:")
+    assert pool.is_context_ref({'schema': 'x', 'ref': a})
+    assert not pool.is_context_ref({'schema': 'x', 'ref': a, 'name': 'y'})
+
+def test_context_table(document):
+    """
+    Check references with a document-level table
+    """
+    document.context_refs = "table"
+    dumped = json.loads(document.dumps())
+    contexts = dumped['contexts']
+    assert all(set(c) == {'schema', 'ref'} for c in contexts)
+    assert set(dumped['context_table']) == set(c['ref'] for c in contexts)
+
+    obj = pymerit.new(dumped)
+    assert obj.context_refs == "table"
+    lazy = obj.metadata['contexts']
+    assert isinstance(lazy, pymerit.MeritLazyList)
+    assert list(lazy.loaded()) == []
+    assert json.loads(obj.dumps()) == dumped
+
+    # Accessed contexts are the same as the inline ones
+    assert lazy[0].dump() == document.metadata['contexts'][0].dump()
+    assert json.loads(obj.dumps()) == dumped
+
+    obj.context_refs = None
+    inline = json.loads(obj.dumps())
+    assert 'context_table' not in inline
+    document.context_refs = None
+    assert inline['contexts'] == json.loads(document.dumps())['contexts']
+
+def test_context_table_encoded_once(document, monkeypatch):
+    """
+    Each context is encoded once per dump
+    """
+    calls = []
+    context_ref = pool.context_ref
+    monkeypatch.setattr(pool, 'context_ref', lambda c: calls.append(c) or context_ref(c))
+    document.context_refs = "table"
+
+    document.dump()
+    assert len(calls) == 2
+    list(document.iter_dump())
+    assert len(calls) == 4
+
+def test_context_pool(document, shared):
+    """
+    Check references to a shared pool
+    """
+    document.context_refs = "pool"
+    document.context_pool = shared
+    dumped = json.loads(document.dumps())
+    assert 'context_table' not in dumped
+    assert len(shared.contents) == 2
+
+    # References are resolved on access, not when loaded
+    obj = pymerit.new(dumped)
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        obj.metadata['contexts'][0]
+    assert "Unknown context reference" in str(exc)
+
+    broken = json.loads(json.dumps(dumped))
+    broken['contexts'][0]['ref'] = "sha256:xyz"
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        pymerit.new(broken)
+    assert "Invalid context reference" in str(exc)
+
+    pool.set_context_pool(shared)
+    obj = pymerit.new(dumped)
+    assert obj.context_refs == "pool"
+    assert obj.metadata['contexts'][1].name == "ProcessContext"
+    assert json.loads(obj.dumps()) == dumped
+
+    # Identical contexts are stored once
+    other = pymerit.MeritDefault()
+    other.namespace = "test"
+    other.path = "other"
+    other.name = "Other"
+    other.description = "Other"
+    other.context_refs = "pool"
+    other.dumps()
+    assert len(shared.contents) == 2
+
+def test_context_catalog(document, tmp_path):
+    """
+    Check the catalog learns contexts from tables and resolves references
+    """
+    document.context_refs = "table"
+    with open(str(tmp_path / "a.json"), "w") as fd:
+        fd.write(document.dumps())
+
+    catalog = MeritCatalog(str(tmp_path / "catalog.db"))
+    catalog.build([str(tmp_path / "a.json")])
+    node = document.metadata['contexts'][0].metadata['node']
+    assert len(catalog.query(context={'node': node})) == 1
+
+    # Documents referencing the catalog pool
+    document.context_refs = "pool"
+    document.context_pool = catalog.context_pool()
+    with open(str(tmp_path / "b.json"), "w") as fd:
+        fd.write(document.dumps())
+    catalog.build([str(tmp_path / "b.json")])
+    assert len(catalog.query(context={'node': node})) == 2
+    catalog.close()
+
+    # A new process resolves through the persisted pool
+    catalog = MeritCatalog(str(tmp_path / "catalog.db"))
+    pool.set_context_pool(catalog.context_pool())
+    try:
+        with open(str(tmp_path / "b.json")) as fd:
+            obj = pymerit.new(fd)
+        assert obj.metadata['contexts'][0].metadata['node'] == node
+    finally:
+        pool.set_context_pool(None)
+        catalog.close()
+
+def test_context_catalog_aio(document, tmp_path):
+    """
+    Check the catalog pool is usable from the aio executor threads
+    """
+    import asyncio
+
+    catalog = MeritCatalog(str(tmp_path / "catalog.db"))
+    pool.set_context_pool(catalog.context_pool())
+    filename = str(tmp_path / "a.json")
+    loop = asyncio.new_event_loop()
+    try:
+        document.context_refs = "pool"
+        loop.run_until_complete(document.asave(filename))
+        obj = loop.run_until_complete(pymerit.aio.anew(filename))
+        assert obj.dumps() == document.dumps()
+        node = document.metadata['contexts'][0].metadata['node']
+        assert obj.metadata['contexts'][0].metadata['node'] == node
+        stored = catalog.conn.execute("SELECT COUNT(*) FROM context_pool").fetchone()[0]
+        assert stored == len(document.metadata['contexts'])
+    finally:
+        loop.close()
+        pool.set_context_pool(None)
+        catalog.close()
+
+def test_context_refs_stream(document, tmp_path):
+    """
+    Check streamed and sharded documents keep the references
+    """
+    import io
+    from pymerit import shards
+    document.context_refs = "table"
+    fd = io.BytesIO()
+    document.dump_stream(fd)
+    assert fd.getvalue() == document.dumps(mode="bytes")
+
+    obj = shards.load(document.save_shards(str(tmp_path / "doc")), pool="thread")
+    assert obj.dumps() == document.dumps()
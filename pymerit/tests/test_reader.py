@@ -0,0 +1,87 @@
+import json
+import pytest
+import pymerit
+from pymerit import MeritReader
+
+@pytest.fixture
+def document(tmp_path):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run \"output\" [1] {x}"
+    h.description = "Run output ü"
+    h.metadata['count'] = -1.5e3
+    h.metadata['flags'] = [True, None, {"a": [1, 2, {"b": "]"}]}]
+
+    tf = tmp_path / "file.txt"
+    tf.write_text("data")
+    resources = []
+    for i in range(20):
+        r = pymerit.MeritResourceFile()
+        r.path = str(tf)
+        r.attributes = {'index': i, 'nested': {'brackets': "[{\\\"}]"}}
+        resources.append(r)
+    h.add_resources(resources)
+    return h
+
+@pytest.mark.parametrize("mode", ["pretty", "compact"])
+def test_reader_index(document, tmp_path, mode):
+    """
+    Check top-level elements and list items are decoded on access
+    """
+    filename = str(tmp_path / "metadata.json")
+    with open(filename, "w") as fd:
+        fd.write(document.dumps(mode=mode))
+    expected = json.loads(document.dumps())
+
+    with MeritReader(filename) as reader:
+        assert list(reader) == list(expected)
+        assert reader['namespace'] == "test"
+        assert reader['name'] == document.name
+        assert reader['flags'] == expected['flags']
+        assert reader.values.keys() == {'namespace', 'name', 'flags'}
+
+        resources = reader['resources']
+        assert len(resources) == 20
+        assert resources[7] == expected['resources'][7]
+        assert resources[-1]['attributes']['index'] == 19
+        assert list(reader['contexts']) == expected['contexts']
+
+        start, end = resources.span(3)
+        with open(filename, "rb") as fd:
+            data = fd.read()
+        assert json.loads(data[start:end]) == expected['resources'][3]
+
+def test_reader_new(document, tmp_path):
+    """
+    Check objects built from the reader
+    """
+    filename = str(tmp_path / "metadata.json")
+    document.save(filename)
+
+    obj = pymerit.new(filename, mode="mmap")
+    resources = obj.metadata['resources']
+    assert isinstance(resources, pymerit.MeritLazyList)
+    assert list(resources.loaded()) == []
+    assert resources[2].attributes['index'] == 2
+    assert obj.dumps(mode="compact") == document.dumps(mode="compact")
+
+@pytest.mark.parametrize("content", [
+    "",
+    "[]",
+    "{\"a\": 1",
+    "{\"a\": \"x}",
+    "{\"a\": [1, 2}",
+    "{\"a\": 1} x",
+    "{\"resources\": [{}, ]}",
+])
+def test_reader_invalid(tmp_path, content):
+    """
+    Check malformed files
+    """
+    filename = str(tmp_path / "metadata.json")
+    with open(filename, "w") as fd:
+        fd.write(content)
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        MeritReader(filename)
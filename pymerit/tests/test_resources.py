@@ -191,3 +191,221 @@ def test_file_resources_valid_2(default_merit):
         
     
     
+def lazy_metadata(path):
+    """
+    Serialized document with one file resource
+    """
+    return {
+        "schema": "global:default:v1",
+        "namespace": "test",
+        "path": "project=alpha/run=20134",
+        "name": "Run output",
+        "description": "Run output",
+        "contexts": [],
+        "resources": [
+            {
+                "schema": "resource:filebase:v1",
+                "name": "runlog",
+                "description": "Run log from execution",
+                "path": path,
+                "attributes": {}
+            }
+        ]
+    }
+
+def test_lazy_resources_passthrough():
+    """
+    Check untouched lazy resources are not built
+    """
+    metadata = lazy_metadata("/nonexistent/file")
+    obj = pymerit.new(metadata, lazy=True)
+    assert obj.namespace == "test"
+    assert len(obj.metadata['resources']) == 1
+    assert obj.dump()['resources'] == metadata['resources']
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        obj.metadata['resources'][0]
+
+    assert "Missing file" in str(exc)
+
+def test_lazy_resources_access():
+    """
+    Check lazy resources are built on access
+    """
+    tf = tempfile.NamedTemporaryFile()
+    obj = pymerit.new(lazy_metadata(tf.name), lazy=True)
+    resources = obj.metadata['resources']
+    assert list(resources.loaded()) == []
+
+    r = resources[-1]
+    assert isinstance(r, pymerit.MeritResourceFile)
+    assert resources[0] is r
+
+    obj.add_resource(r)
+    assert len(resources) == 2
+    dumped = obj.dump()['resources']
+    assert dumped[0] == dumped[1]
+
+    del resources[0]
+    assert len(resources) == 1
+    tf.close()
+
+def test_lazy_resources_prettyprint():
+    """
+    Check lazy resources are printed as a list
+    """
+    tf = tempfile.NamedTemporaryFile()
+    obj = pymerit.new(lazy_metadata(tf.name), lazy=True)
+    output = obj.prettyprint(max_width=200)
+    assert "MeritLazyList" not in output
+    assert tf.name in output
+    tf.close()
+
+def test_batch_missing_paths():
+    """
+    Check all missing paths are reported together
+    """
+    metadata = lazy_metadata("/nonexistent/file1")
+    second = dict(metadata['resources'][0], path="/nonexistent/file2")
+    metadata['resources'].append(second)
+
+    with pytest.raises(pymerit.MeritMissingPaths) as exc:
+        pymerit.new(metadata)
+
+    assert exc.value.paths == ["/nonexistent/file1", "/nonexistent/file2"]
+    assert "Missing file" in str(exc)
+
+def test_batch_valid_paths(default_merit):
+    """
+    Check batch validation of many existing paths
+    """
+    files = [tempfile.NamedTemporaryFile() for i in range(20)]
+    for tf in files:
+        r = pymerit.MeritResourceFile()
+        r.path = tf.name
+        default_merit.add_resource(r)
+
+    default_merit.validate_workers = 4
+    obj = pymerit.new(default_merit.dump())
+    assert len(obj.metadata['resources']) == 20
+
+    for tf in files:
+        tf.close()
+
+def test_batch_single_stat(default_merit, monkeypatch):
+    """
+    Paths checked in the batch are not stat'ed again by each resource,
+    even when the stat cache has expired
+    """
+    import pymerit.fs
+    files = [tempfile.NamedTemporaryFile() for i in range(10)]
+    resources = []
+    for tf in files:
+        r = pymerit.MeritResourceFile()
+        r.path = tf.name
+        resources.append(r)
+    default_merit.add_resources(resources)
+
+    calls = []
+    stat_path = pymerit.fs.stat_path
+    monkeypatch.setattr(pymerit.fs, 'stat_path', lambda p: calls.append(p) or stat_path(p))
+    monkeypatch.setattr(pymerit.fs.stat_cache, 'ttl', -1)
+    default_merit.validate_workers = 1
+    default_merit.validate()
+    assert sorted(calls) == sorted(tf.name for tf in files)
+
+    for tf in files:
+        tf.close()
+
+def test_add_resources_deferred(default_merit):
+    """
+    Check bulk add defers validation to dump
+    """
+    files = [tempfile.NamedTemporaryFile() for i in range(3)]
+    resources = []
+    for tf in files:
+        r = pymerit.MeritResourceFile()
+        r.path = tf.name
+        resources.append(r)
+    resources[1].path = "/nonexistent/file"
+
+    default_merit.add_resources(resources)
+    assert len(default_merit.metadata['resources']) == 3
+
+    with pytest.raises(pymerit.MeritMissingPaths) as exc:
+        default_merit.dump()
+    assert exc.value.paths == ["/nonexistent/file"]
+
+    resources[1].path = files[1].name
+    default_merit.validate()
+    assert len(default_merit.dump()['resources']) == 3
+
+    for tf in files:
+        tf.close()
+
+def test_add_resources_invalid(default_merit):
+    """
+    Check type errors in bulk add
+    """
+    r = pymerit.MeritResourceFile()
+    with pytest.raises(pymerit.MeritInvalidResource) as exc:
+        default_merit.add_resources([r, None])
+
+    with pytest.raises(pymerit.MeritInvalidResource) as exc:
+        default_merit.add_resources([r, pymerit.MeritContextProcess()])
+
+    assert len(default_merit.metadata['resources']) == 0
+
+def test_validation_cached(default_merit):
+    """
+    Check unchanged resources are not validated again
+    """
+    tf = tempfile.NamedTemporaryFile()
+    r = pymerit.MeritResourceFile()
+    r.path = tf.name
+    assert r.is_dirty()
+
+    default_merit.add_resource(r)
+    assert not r.is_dirty()
+
+    # The removed file goes unnoticed until the resource changes
+    tf.close()
+    pymerit.fs.stat_cache.clear()
+    default_merit.dump()
+
+    default_merit.invalidate()
+    assert r.is_dirty()
+    with pytest.raises(pymerit.MeritMissingPaths) as exc:
+        default_merit.dump()
+    assert exc.value.paths == [tf.name]
+
+def test_validation_dirty():
+    """
+    Check attribute and metadata changes mark the object dirty
+    """
+    r = pymerit.MeritResourceFile()
+    r.path = "/"
+    r.validate()
+    assert not r.is_dirty()
+
+    r.path = "/nonexistent/file"
+    assert r.is_dirty()
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+    assert r.is_dirty()
+
+    r.metadata.update(path="/")
+    r.validate()
+    r.metadata.pop('description')
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        r.validate()
+
+def test_validation_loaded():
+    """
+    Check loaded resources are validated once
+    """
+    metadata = lazy_metadata("/")
+    obj = pymerit.new(metadata)
+    r = obj.metadata['resources'][0]
+    assert not r.is_dirty()
+    assert not obj.is_dirty()
@@ -0,0 +1,136 @@
+import os
+import json
+import pytest
+import pymerit
+from pymerit import shards
+
+@pytest.fixture
+def document(tmp_path):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output"
+    h.description = "Run output"
+
+    tf = tmp_path / "file.txt"
+    tf.write_text("data")
+    resources = []
+    for i in range(25):
+        r = pymerit.MeritResourceFile()
+        r.path = str(tf)
+        r.attributes = {'index': i}
+        resources.append(r)
+    h.add_resources(resources)
+    return h
+
+@pytest.mark.parametrize("pool", ["process", "thread"])
+def test_shards_roundtrip(document, tmp_path, pool):
+    """
+    Check save and load through the manifest
+    """
+    directory = str(tmp_path / "doc")
+    filename = document.save_shards(directory, size=10)
+
+    with open(filename) as fd:
+        manifest = json.load(fd)
+    assert manifest['schema'] == shards.manifest_schema
+    assert manifest['count'] == 25
+    assert [s['count'] for s in manifest['shards']] == [10, 10, 5]
+    assert 'resources' not in manifest['document']
+    assert len(manifest['document']['contexts']) == 2
+
+    with open(os.path.join(directory, manifest['shards'][1]['path'])) as fd:
+        shard = json.load(fd)
+    assert shard['schema'] == shards.shard_schema
+    assert shard['document'] == document.schema
+    assert shard['index'] == 1
+
+    obj = shards.load(directory, pool=pool, max_workers=2)
+    assert obj.dump() == document.dump()
+
+    with open(filename) as fd:
+        obj = pymerit.new(fd)
+    assert obj.dumps() == document.dumps()
+
+def test_shards_lazy(document, tmp_path):
+    """
+    Check lazily loaded documents and replacement of old shards
+    """
+    directory = str(tmp_path / "doc")
+    document.save_shards(directory, size=10)
+    obj = shards.load(directory, lazy=True, pool="thread")
+    assert isinstance(obj.metadata['resources'], pymerit.MeritLazyList)
+
+    obj.metadata['resources'][12].name = "Changed"
+    obj.save_shards(directory, size=4)
+    names = sorted(n for n in os.listdir(directory) if n.startswith("shard-"))
+    assert len(names) == 7
+
+    loaded = shards.load(directory, pool="thread")
+    assert loaded.metadata['resources'][12].name == "Changed"
+    assert loaded.dump() == obj.dump()
+
+def test_shards_empty(tmp_path):
+    """
+    Check documents without resources
+    """
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "path"
+    h.name = "name"
+    h.description = "description"
+
+    directory = str(tmp_path / "doc")
+    h.save_shards(directory)
+    assert os.listdir(directory) == ["manifest.json"]
+    assert shards.load(directory).dump() == h.dump()
+
+def test_shards_corrupt(document, tmp_path):
+    """
+    Check checksum verification
+    """
+    directory = str(tmp_path / "doc")
+    filename = document.save_shards(directory, size=10)
+    with open(filename) as fd:
+        manifest = json.load(fd)
+
+    path = os.path.join(directory, manifest['shards'][2]['path'])
+    with open(path, "ab") as fd:
+        fd.write(b" ")
+
+    with pytest.raises(pymerit.MeritInvalidMetadata) as exc:
+        shards.load(filename, pool="thread")
+    assert "Checksum mismatch" in str(exc)
+
+def test_shards_catalog(document, tmp_path):
+    """
+    The catalog indexes the manifest with all resources, not the shards
+    """
+    from pymerit.catalog import MeritCatalog
+
+    directory = str(tmp_path / "doc")
+    filename = document.save_shards(directory, size=10)
+    resource = document.metadata['resources'][0].path
+
+    with MeritCatalog(str(tmp_path / "catalog.db")) as c:
+        summary = c.build([directory])
+        assert summary == {'indexed': 1, 'skipped': 0, 'failed': 0, 'removed': 0}
+        found = c.query(resource=resource)
+        assert [row[0] for row in found] == [filename]
+        assert found[0][2:4] == ("test", "project=alpha/run=20134")
+        assert len(c.resources(filename)) == 25
+
+def test_shards_anew(document, tmp_path):
+    """
+    Check async loading of a manifest
+    """
+    import asyncio
+    directory = str(tmp_path / "doc")
+    filename = document.save_shards(directory, size=10)
+
+    loop = asyncio.new_event_loop()
+    try:
+        obj = loop.run_until_complete(pymerit.anew(filename))
+    finally:
+        loop.close()
+    assert obj.dump() == document.dump()
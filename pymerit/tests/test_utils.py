@@ -80,3 +80,51 @@ def test_not_handler():
 
     with pytest.raises(pymerit.MeritNotRegistered) as exc: 
         pymerit.schema_unregister(HelloMerit) 
+
+def make_jsonl(count):
+    """
+    JSON Lines content with count documents
+    """
+    lines = []
+    for i in range(count):
+        h = pymerit.MeritDefault()
+        h.namespace = "test"
+        h.path = "run={}".format(i)
+        h.name = "Run output"
+        h.description = "Run output"
+        lines.append(h.dumps().replace("\n", "") + "\n")
+    return lines
+
+def test_iter_new():
+    """
+    Test streaming load of JSON Lines
+    """
+    lines = make_jsonl(3)
+    objs = list(pymerit.iter_new(iter(lines)))
+    assert [o.path for o in objs] == ['run=0', 'run=1', 'run=2']
+    assert isinstance(objs[0], pymerit.MeritDefault)
+
+def test_iter_new_errors():
+    """
+    Test error handling in streaming load
+    """
+    lines = make_jsonl(2)
+    lines.insert(1, '{"schema": "unknown"}\n')
+    lines.insert(1, '\n')
+
+    with pytest.raises(pymerit.MeritNoHandler) as exc:
+        list(pymerit.iter_new(lines))
+
+    objs = list(pymerit.iter_new(lines, skip_errors=True))
+    assert len(objs) == 2
+
+def test_iter_new_batch(tmpdir):
+    """
+    Test batched streaming load from a file
+    """
+    filename = str(tmpdir.join("runs.jsonl"))
+    with open(filename, 'w') as fd:
+        fd.writelines(make_jsonl(5))
+
+    batches = list(pymerit.iter_new(filename, batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
@@ -0,0 +1,112 @@
+import io
+import os
+import tracemalloc
+import pytest
+import pymerit
+from pymerit import writer
+
+def make_document(tmp_path, count):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run=20134"
+    h.name = "Run output ü"
+    h.description = "Run output"
+    h.metadata['extra'] = {'tags': ["a", "b"]}
+
+    tf = tmp_path / "file.txt"
+    tf.write_text("data")
+    resources = []
+    for i in range(count):
+        r = pymerit.MeritResourceFile()
+        r.path = str(tf)
+        r.attributes = {'index': i, 'ratio': i / 3.0}
+        resources.append(r)
+    h.add_resources(resources)
+    return h
+
+@pytest.mark.parametrize("backend", pymerit.available_json_backends())
+def test_dump_stream_identical(tmp_path, backend):
+    """
+    Check streamed output matches compact dumps
+    """
+    h = make_document(tmp_path, 50)
+    expected = h.dumps(mode="compact", backend=backend)
+
+    fd = io.BytesIO()
+    h.dump_stream(fd, backend=backend, buffer_size=100)
+    assert fd.getvalue() == expected.encode('utf-8')
+
+    fd = io.StringIO()
+    h.dump_stream(fd, backend=backend)
+    assert fd.getvalue() == expected
+
+def test_dump_stream_empty():
+    """
+    Check empty lists and non-global objects
+    """
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "path"
+    h.name = "name"
+    h.description = "description"
+    h.metadata['contexts'] = []
+
+    fd = io.BytesIO()
+    h.dump_stream(fd)
+    assert fd.getvalue() == h.dumps(mode="bytes")
+
+    r = pymerit.MeritResourceFile()
+    r.path = "/"
+    fd = io.BytesIO()
+    r.dump_stream(fd)
+    assert fd.getvalue() == r.dumps(mode="bytes")
+
+def test_dump_stream_lazy(tmp_path):
+    """
+    Check lazily loaded documents stream untouched elements
+    """
+    h = make_document(tmp_path, 10)
+    obj = pymerit.new(h.dump(), lazy=True)
+    obj.metadata['resources'][3].name = "Changed"
+
+    fd = io.BytesIO()
+    obj.dump_stream(fd)
+    assert fd.getvalue() == obj.dumps(mode="bytes")
+
+def test_save_atomic(tmp_path):
+    """
+    Check the file is replaced only when complete
+    """
+    h = make_document(tmp_path, 5)
+    filename = str(tmp_path / "metadata.json")
+    h.save(filename)
+    with open(filename) as fd:
+        assert fd.read() == h.dumps(mode="compact")
+
+    # A failure leaves the previous file and no temporary files
+    h.metadata['resources'][2].path = "/nonexistent/file"
+    with pytest.raises(pymerit.MeritMissingPaths) as exc:
+        h.save(filename)
+    assert sorted(os.listdir(str(tmp_path))) == ["file.txt", "metadata.json"]
+    assert pymerit.new(open(filename)).dump()['name'] == h.name
+
+def test_save_memory(tmp_path):
+    """
+    Check peak memory is lower than with dumps
+    """
+    h = make_document(tmp_path, 5000)
+    h.validate()
+
+    # One tracing session per peak (tracemalloc.reset_peak needs Python 3.9)
+    def peak(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    dumps_peak = peak(h.dumps, mode="compact")
+    save_peak = peak(h.save, io.BytesIO(), buffer_size=64 * 1024)
+
+    assert save_peak < dumps_peak / 2
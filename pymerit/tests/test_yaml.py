@@ -0,0 +1,50 @@
+import io
+import pytest
+import yaml
+import pymerit
+
+def make_merit(run):
+    h = pymerit.MeritDefault()
+    h.namespace = "test"
+    h.path = "project=alpha/run={}".format(run)
+    h.name = "Run output"
+    h.description = "Run output"
+    return h
+
+def test_yaml_roundtrip():
+    """
+    Check YAML dump and load keep content and key order
+    """
+    h = make_merit(1)
+    s = h.dumps_yaml()
+    assert s.startswith("---\nschema: global:default:v1\nnamespace: test\n")
+
+    obj = pymerit.MeritDefault()
+    obj.loads_yaml(s)
+    assert obj.dump() == h.dump()
+
+    obj = pymerit.new(io.StringIO(s), mode="yaml")
+    assert obj.dump() == h.dump()
+
+def test_yaml_stream(tmpdir):
+    """
+    Check multi-document YAML streams
+    """
+    filename = str(tmpdir.join("runs.yaml"))
+    with open(filename, 'w') as fd:
+        pymerit.dump_yaml((make_merit(i) for i in range(4)), fd)
+
+    objs = pymerit.iter_new(filename, mode="yaml")
+    assert next(objs).path == "project=alpha/run=0"
+    assert [o.path for o in objs] == ["project=alpha/run={}".format(i) for i in range(1, 4)]
+
+    batches = list(pymerit.iter_new(filename, mode="yaml", batch_size=3))
+    assert [len(b) for b in batches] == [3, 1]
+
+def test_yaml_safe():
+    """
+    Python object tags are rejected
+    """
+    s = "schema: !!python/object/apply:os.getcwd []\n"
+    with pytest.raises(yaml.YAMLError) as exc:
+        pymerit.new(io.StringIO(s), mode="yaml")
@@ -4,9 +4,10 @@ Utils
 
 Helper functions 
 """
-import json
-import yaml 
+import os
+import collections
 from .exceptions import *
+from .backends import get_json_backend
 
 def all_subclasses(cls):
     """
@@ -36,27 +37,187 @@ def get_metadata_attribute(name):
 
     return prop 
 
-def new(metadata, mode="json"):
+def new(metadata, mode="json", lazy=False, backend=None):
     """
     Create Merit object from dictionary
     
-    :param dict metadata: Metadata to be loaded 
+    :param dict metadata: Metadata to be loaded (dict, file handle or
+           bytes in the binary format). A filename for mode mmap.
+    :param str mode: Format of the file handle (json, yaml, binary),
+           or mmap to read a JSON file with MeritReader
+    :param bool lazy: Build resource objects only when accessed
+    :param str backend: JSON backend. Default is the global backend
     """
 
     from pymerit import MeritBase
+    from pymerit import binary
+
+    # => Memory-mapped, decoded on access
+    if mode == "mmap":
+        from pymerit.reader import MeritReader
+        return MeritReader(metadata, backend=backend).new()
 
     # => If it is a file descriptor, then load it as a json
+    root = "."
     if hasattr(metadata, 'read'):
+        if isinstance(getattr(metadata, 'name', None), str):
+            root = os.path.dirname(os.path.abspath(metadata.name))
         if mode == "json": 
-            metadata = json.load(metadata)
+            metadata = get_json_backend(backend).load(metadata)
         elif mode == "yaml":
-            metadata = yaml.load(metadata)            
+            import yaml
+            metadata = yaml.load(metadata, Loader=yaml_loader())
+        elif mode == "binary":
+            metadata = metadata.read()
+
+    # => Binary documents are detected by their header
+    if isinstance(metadata, (bytes, bytearray)):
+        metadata = binary.decode(metadata)
+
+    # => Sharded documents, with shards relative to the manifest
+    from pymerit import shards
+    if shards.is_manifest(metadata):
+        return shards.load_manifest(metadata, root, lazy=lazy, backend=backend)
     
     cls = MeritBase.find_handler_for_dict(metadata)
-    obj = cls() 
+    obj = cls(lazy=True) if lazy else cls()
     obj.load(metadata)
     return obj 
     
+async def anew(source, mode="json", lazy=False, backend=None, executor=None):
+    """
+    Create Merit object from a file without blocking the event loop.
+    The file is read and decoded on a bounded thread pool and resources
+    are validated concurrently (see pymerit.aio).
+
+    :param source: Filename, metadata dict, or bytes in the binary format
+    :param str mode: Format of the file (json, yaml, binary)
+    :param bool lazy: Build resource objects only when accessed
+    :param str backend: JSON backend. Default is the global backend
+    :param executor: concurrent.futures executor. Default is a shared pool
+    """
+    from pymerit import aio
+    return await aio.anew(source, mode=mode, lazy=lazy, backend=backend,
+                          executor=executor)
+
+def iter_new(source, mode="jsonl", skip_errors=False, batch_size=None,
+             backend=None):
+    """
+    Lazily create Merit objects from a JSON Lines stream (one document
+    per line) or a multi-document YAML stream. Only one document is
+    decoded at a time.
+
+    :param source: File handle, filename, or iterable of lines/dicts
+    :param str mode: Format of the stream (jsonl, yaml)
+    :param bool skip_errors: Skip documents that cannot be loaded. For
+           jsonl, lines that cannot be parsed are skipped as well
+    :param int batch_size: If specified, yield lists of up to batch_size objects
+    :param str backend: JSON backend. Default is the global backend
+    """
+
+    from pymerit import MeritBase
+
+    if mode not in ["jsonl", "yaml"]:
+        raise ValueError("Unsupported stream mode: {}".format(mode))
+
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("Invalid batch size: {}".format(batch_size))
+
+    if isinstance(source, str):
+        with open(source) as fd:
+            yield from iter_new(fd, mode=mode,
+                                skip_errors=skip_errors,
+                                batch_size=batch_size,
+                                backend=backend)
+        return
+
+    decoder = get_json_backend(backend)
+    if mode == "yaml":
+        import yaml
+        source = yaml.load_all(source, Loader=yaml_loader())
+
+    # Handlers resolved so far in this stream
+    handlers = {}
+
+    batch = []
+    for line in source:
+        try:
+            if isinstance(line, dict):
+                metadata = line
+            else:
+                if len(line.strip()) == 0:
+                    continue
+                metadata = decoder.loads(line)
+
+            schema = metadata.get('schema') if isinstance(metadata, dict) else None
+            cls = handlers.get(schema) if isinstance(schema, str) else None
+            if cls is None:
+                cls = MeritBase.find_handler_for_dict(metadata)
+                if isinstance(schema, str):
+                    handlers[schema] = cls
+
+            obj = cls()
+            obj.load(metadata)
+        except Exception:
+            if skip_errors:
+                continue
+            raise
+
+        if batch_size is None:
+            yield obj
+            continue
+
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if len(batch) > 0:
+        yield batch
+
+_yaml_classes = {}
+"""
+YAML loader and dumper classes, built on first use
+"""
+
+def yaml_loader():
+    """
+    Safe YAML loader. Uses the libyaml CSafeLoader when available.
+    """
+    if 'loader' not in _yaml_classes:
+        import yaml
+        _yaml_classes['loader'] = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return _yaml_classes['loader']
+
+def yaml_dumper():
+    """
+    Safe YAML dumper that keeps the key order of dumped metadata.
+    Uses the libyaml CSafeDumper when available.
+    """
+    if 'dumper' not in _yaml_classes:
+        import yaml
+
+        class MeritYAMLDumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+            pass
+
+        MeritYAMLDumper.add_representer(
+            collections.OrderedDict,
+            lambda dumper, data: dumper.represent_dict(data.items()))
+        _yaml_classes['dumper'] = MeritYAMLDumper
+    return _yaml_classes['dumper']
+
+def dump_yaml(objs, fd=None):
+    """
+    Write Merit objects as a multi-document YAML stream
+
+    :param list objs: Iterable of Merit objects. Consumed lazily.
+    :param fd: File handle. If not specified, the YAML is returned as a string
+    """
+    import yaml
+    return yaml.dump_all((o.dump() for o in objs), fd, Dumper=yaml_dumper(),
+                         default_flow_style=False, sort_keys=False,
+                         allow_unicode=True, explicit_start=True)
+
 def schema_register(cls):
     """
     Register a new handler class
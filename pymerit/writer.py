@@ -0,0 +1,111 @@
+"""
+Writer
+------
+
+Incremental JSON writer. A document is written as it is walked: each
+top-level element and each item of the streamed lists (e.g., the
+resources of a global document) is encoded separately and appended to
+a bounded buffer that is flushed to the file when full. The output is
+byte-identical to dumps(mode="compact") with the same backend.
+
+Files are written atomically: the content goes to a temporary file in
+the same directory, which is renamed over the target once complete.
+"""
+import os
+import io
+import collections.abc
+from .backends import get_json_backend
+
+buffer_size = 1 << 20
+"""
+Bytes buffered before a write to the underlying file
+"""
+
+class MeritBufferedWriter(object):
+    """
+    Collect encoded pieces and write them out in chunks of at least
+    buffer_size bytes
+    """
+
+    def __init__(self, fp, buffer_size=buffer_size):
+        self.fp = fp
+        self.text = isinstance(fp, io.TextIOBase)
+        self.buffer_size = buffer_size
+        self.pieces = []
+        self.size = 0
+
+    def write(self, b):
+        self.pieces.append(b)
+        self.size += len(b)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.pieces) == 0:
+            return
+        data = b''.join(self.pieces)
+        self.pieces = []
+        self.size = 0
+        self.fp.write(data.decode('utf-8') if self.text else data)
+
+def write_json(fp, pairs, backend=None, buffer_size=buffer_size):
+    """
+    Write a JSON object from (key, value) pairs. Values that are
+    iterators are written as arrays, one item at a time.
+
+    :param fp: File handle (text or binary) or any object with write()
+    :param pairs: Iterable of (key, value)
+    :param str backend: JSON backend. Default is the global backend
+    :param int buffer_size: Bytes buffered before each write
+    """
+    encode = get_json_backend(backend).dumps
+    out = MeritBufferedWriter(fp, buffer_size)
+
+    sep = b'{'
+    for k, v in pairs:
+        out.write(sep)
+        out.write(encode(k, mode="bytes"))
+        out.write(b':')
+        sep = b','
+
+        if not isinstance(v, collections.abc.Iterator):
+            out.write(encode(v, mode="bytes"))
+            continue
+
+        itemsep = b'['
+        for item in v:
+            out.write(itemsep)
+            out.write(encode(item, mode="bytes"))
+            itemsep = b','
+        out.write(b'[]' if itemsep == b'[' else b']')
+
+    out.write(b'{}' if sep == b'{' else b'}')
+    out.flush()
+
+def atomic_write(path, func, fsync=True):
+    """
+    Call func(fd) with a binary file handle on a temporary file next
+    to path, then rename it to path. The temporary file is removed if
+    func fails. The file is created with the default permissions
+    (subject to the umask).
+
+    :param str path: Target filename
+    :param func: Function writing the content
+    :param bool fsync: Flush the content to disk before the rename
+    """
+    path = os.path.abspath(path)
+    tmp = "{}.{}.tmp".format(path, os.urandom(4).hex())
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            func(fp)
+            fp.flush()
+            if fsync:
+                os.fsync(fp.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -55,11 +55,12 @@ requires = [
     'sphinx-click',
     'texttable',
     'coverage',
-    'pyyaml'
+    'pyyaml>=5.1'
 ]
 
 extras_require = {
     'reST': ['Sphinx'],
+    'fast': ['orjson'],
 }
 
 if os.environ.get('READTHEDOCS', None):
@@ -73,7 +74,7 @@ setup(name='pymerit',
       author_email='pingali@scribbledata.io',
       url='https://github.com/pingali/pymerit',
       classifiers=classifiers,
-      packages=['pymerit'],
+      packages=['pymerit', 'benchmarks'],
       data_files = [("", ["LICENSE.txt"])],
       install_requires=requires,
       include_package_data=True,